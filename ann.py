@@ -0,0 +1,192 @@
+"""IVF approximate nearest-neighbor index for top-K item retrieval by inner product."""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def _nearest_centroid(x, centroids, chunk=65536):
+    # argmin ||x - c||^2 == argmin ||c||^2 - 2 x.c, computed chunk by chunk
+    centroid_sq = (centroids ** 2).sum(axis=1)
+    assign = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), chunk):
+        assign[start:start + chunk] = np.argmin(centroid_sq - 2 * x[start:start + chunk] @ centroids.T, axis=1)
+    return assign
+
+
+def kmeans(x, k, iters=20, sample_size=None, seed=0):
+    """Lloyd's k-means on (a sample of) `x`; empty clusters are re-seeded from random points."""
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=np.float32)
+    if sample_size is not None and len(x) > sample_size:
+        x = x[rng.choice(len(x), sample_size, replace=False)]
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+
+    for _ in range(iters):
+        assign = _nearest_centroid(x, centroids)
+        counts = np.bincount(assign, minlength=k)
+        sums = np.stack([np.bincount(assign, weights=x[:, d], minlength=k) for d in range(x.shape[1])], axis=1)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        centroids[~filled] = x[rng.choice(len(x), int((~filled).sum()))]
+    return centroids
+
+
+def _merge_topk(top_scores, top_ids, scores, ids, k):
+    """Fold a new block of candidate scores into running [Q, k] top-k arrays (unsorted)."""
+    scores = np.concatenate([top_scores, scores], axis=1)
+    ids = np.concatenate([top_ids, ids], axis=1)
+    keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, keep, axis=1), np.take_along_axis(ids, keep, axis=1)
+
+
+def _sorted_topk(top_scores, top_ids):
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top_ids, order, axis=1)
+
+
+def exact_search(queries, item_emb, k=10, item_chunk=65536):
+    """Brute-force top-k item rows by inner product, scanning the catalog in chunks."""
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    top_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    top_ids = np.full((len(queries), k), -1, dtype=np.int64)
+    for start in range(0, len(item_emb), item_chunk):
+        block = np.asarray(item_emb[start:start + item_chunk], dtype=np.float32)
+        ids = np.broadcast_to(np.arange(start, start + len(block)), (len(queries), len(block)))
+        top_scores, top_ids = _merge_topk(top_scores, top_ids, queries @ block.T, ids, k)
+    return _sorted_topk(top_scores, top_ids)
+
+
+class IVFIndex:
+    """Inverted-file index over item embeddings.
+
+    Items are bucketed by their nearest k-means centroid (`nlist` buckets, stored contiguously)
+    and a query scans only the `nprobe` buckets whose centroids have the highest inner product
+    with it. `nlist` trades build time and bucket size; `nprobe` is the query-time recall/latency
+    knob (nprobe == nlist is exact).
+    """
+
+    def __init__(self, centroids, vectors, ids, offsets, nprobe=8):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    @property
+    def dim(self):
+        return self.centroids.shape[1]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, queries, k=10, nprobe=None, query_chunk=1024):
+        """Top-k (scores, item ids) per query, best first; missing slots are (-inf, -1)."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        results = [self._search_chunk(queries[start:start + query_chunk], k, nprobe)
+                   for start in range(0, len(queries), query_chunk)]
+        if not results:
+            return np.zeros((0, k), dtype=np.float32), np.zeros((0, k), dtype=np.int64)
+        scores, positions = (np.concatenate(parts) for parts in zip(*results))
+        return scores, np.where(positions >= 0, self.ids[np.maximum(positions, 0)], -1)
+
+    def _search_chunk(self, queries, k, nprobe):
+        num_queries = len(queries)
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        # Group (query, bucket) pairs by bucket so each bucket is scored once against all its queries
+        query_idx = np.repeat(np.arange(num_queries), nprobe)
+        buckets = probes.ravel()
+        order = np.argsort(buckets, kind='stable')
+        query_idx, buckets = query_idx[order], buckets[order]
+        bounds = np.searchsorted(buckets, np.arange(self.nlist + 1))
+
+        top_scores = np.full((num_queries, k), -np.inf, dtype=np.float32)
+        top_positions = np.full((num_queries, k), -1, dtype=np.int64)
+        for bucket in np.flatnonzero(bounds[1:] > bounds[:-1]):
+            start, stop = self.offsets[bucket], self.offsets[bucket + 1]
+            if stop == start:
+                continue
+            qs = query_idx[bounds[bucket]:bounds[bucket + 1]]
+            scores = queries[qs] @ np.asarray(self.vectors[start:stop]).T
+            positions = np.broadcast_to(np.arange(start, stop), scores.shape)
+            top_scores[qs], top_positions[qs] = _merge_topk(top_scores[qs], top_positions[qs], scores, positions, k)
+        return _sorted_topk(top_scores, top_positions)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'centroids.npy'), self.centroids)
+        np.save(os.path.join(path, 'vectors.npy'), np.asarray(self.vectors))
+        np.save(os.path.join(path, 'ids.npy'), np.asarray(self.ids))
+        np.save(os.path.join(path, 'offsets.npy'), self.offsets)
+        meta = {'nlist': self.nlist, 'dim': self.dim, 'num_items': len(self), 'nprobe': self.nprobe}
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+
+def build_ivf_index(item_emb, item_ids=None, nlist=None, nprobe=8, kmeans_iters=20, sample_size=None, seed=0):
+    """Cluster the item embeddings and lay the items out bucket by bucket.
+
+    `nlist` defaults to ~4 * sqrt(num_items); k-means can be trained on a `sample_size` subset
+    for large catalogs. `item_ids` (default: row numbers) are what `search` returns.
+    """
+    item_emb = np.asarray(item_emb, dtype=np.float32)
+    item_ids = np.arange(len(item_emb)) if item_ids is None else np.asarray(item_ids, dtype=np.int64)
+    if nlist is None:
+        nlist = max(1, int(4 * np.sqrt(len(item_emb))))
+    nlist = min(nlist, len(item_emb))
+
+    centroids = kmeans(item_emb, nlist, iters=kmeans_iters, sample_size=sample_size, seed=seed)
+    nlist = len(centroids)
+    assign = _nearest_centroid(item_emb, centroids)
+    order = np.argsort(assign, kind='stable')
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assign, minlength=nlist), out=offsets[1:])
+    return IVFIndex(centroids, item_emb[order], item_ids[order], offsets, nprobe=nprobe)
+
+
+def load_ivf_index(path, mmap_mode='r'):
+    """Open a saved index; the bucketed vectors and ids stay memory-mapped and are paged in on demand."""
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    return IVFIndex(np.load(os.path.join(path, 'centroids.npy')),
+                    np.load(os.path.join(path, 'vectors.npy'), mmap_mode=mmap_mode),
+                    np.load(os.path.join(path, 'ids.npy'), mmap_mode=mmap_mode),
+                    np.load(os.path.join(path, 'offsets.npy')),
+                    nprobe=meta['nprobe'])
+
+
+def benchmark_ann(index, item_emb, queries, k=10, nprobes=(1, 2, 4, 8, 16, 32), item_ids=None):
+    """Recall@k against exact inner-product search and queries/s, for exact search and each `nprobe`.
+
+    `item_ids` maps rows of `item_emb` to the ids the index was built with (default: row numbers).
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+
+    start = time.perf_counter()
+    _, exact_rows = exact_search(queries, item_emb, k)
+    exact_time = time.perf_counter() - start
+    exact_ids = exact_rows if item_ids is None else np.where(exact_rows >= 0, np.asarray(item_ids)[exact_rows], -1)
+
+    rows = [{'method': 'exact', 'nprobe': None, f'recall@{k}': 1.0, 'qps': len(queries) / exact_time}]
+    for nprobe in nprobes:
+        if nprobe > index.nlist:
+            continue
+        start = time.perf_counter()
+        _, ids = index.search(queries, k, nprobe=nprobe)
+        elapsed = time.perf_counter() - start
+
+        found = (ids[:, :, None] == exact_ids[:, None, :]) & (exact_ids[:, None, :] >= 0)
+        recall = found.any(axis=1).sum(axis=1) / np.maximum((exact_ids >= 0).sum(axis=1), 1)
+        rows.append({'method': 'ivf', 'nprobe': nprobe, f'recall@{k}': float(recall.mean()),
+                     'qps': len(queries) / elapsed})
+    return pd.DataFrame(rows)
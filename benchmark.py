@@ -0,0 +1,99 @@
+"""Per-stage pipeline benchmarks: median/p95 time, edges/s and peak RSS, checked against a stored baseline."""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from resources import RssSampler, max_rss_mb, rss_mb
+
+
+def _time_stage(fn, setup, warmup, repeat):
+    # Runs in a fresh worker: setup (the untimed earlier stages) is excluded from both time and memory
+    inputs = setup() if setup is not None else ()
+    start_rss = rss_mb()
+    sampler = RssSampler()
+    sampler.start()
+    for _ in range(warmup):
+        fn(*inputs)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*inputs)
+        times.append(time.perf_counter() - start)
+    peak_rss = sampler.stop()
+    return times, start_rss, peak_rss, max_rss_mb()
+
+
+def benchmark_stage(fn, setup=None, num_edges=None, warmup=1, repeat=5, mp_context=None):
+    """Time `fn(*setup())` `repeat` times after `warmup` calls, in a process of its own.
+
+    `fn` and `setup` must be picklable (module- or notebook-level functions or partials of them).
+    `setup` builds the stage's inputs untimed. `peak_rss_mb` is the largest RSS seen while the
+    stage ran and `stage_rss_mb` how far that is above the RSS once the inputs were built.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp_context) as pool:
+        times, start_rss, peak_rss, max_rss = pool.submit(_time_stage, fn, setup, warmup, repeat).result()
+    times = np.asarray(times)
+    median = float(np.median(times))
+    return {'median_s': median, 'p95_s': float(np.percentile(times, 95)),
+            'edges_per_s': num_edges / median if num_edges and median > 0 else np.nan,
+            'peak_rss_mb': peak_rss, 'stage_rss_mb': max(peak_rss - start_rss, 0.0),
+            'process_max_rss_mb': max_rss, 'repeat': len(times)}
+
+
+def run_benchmarks(pipelines, num_edges=None, warmup=1, repeat=5, mp_context=None):
+    """Benchmark every stage of every dataset pipeline; returns one row per (dataset, stage).
+
+    `pipelines` maps a dataset name to an ordered {stage: (fn, setup)} dict and `num_edges`
+    maps it to its edge count for the edges/s column. A failing stage gets an `error` and
+    does not stop the others.
+    """
+    num_edges = num_edges or {}
+    rows = []
+    for dataset, stages in pipelines.items():
+        for stage, (fn, setup) in stages.items():
+            row = {'dataset': dataset, 'stage': stage, 'num_edges': num_edges.get(dataset)}
+            try:
+                row.update(benchmark_stage(fn, setup, num_edges.get(dataset), warmup, repeat, mp_context))
+            except Exception as exc:
+                row['error'] = repr(exc)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def save_baseline(results, path):
+    """Write the median time and stage memory of each (dataset, stage) as the reference to compare against."""
+    ok = results[results['error'].isna()] if 'error' in results else results
+    baseline = {f'{row.dataset}/{row.stage}': {'median_s': row.median_s, 'stage_rss_mb': row.stage_rss_mb}
+                for row in ok.itertuples()}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def compare_to_baseline(results, path, time_tolerance=0.10, memory_tolerance=0.10, memory_slack_mb=16.0):
+    """Add the baseline columns and a `regression` flag to benchmark results.
+
+    A stage regresses when its median time or `stage_rss_mb` is more than the tolerance (a
+    fraction) above the baseline. Memory is judged on what the stage itself adds, since the
+    absolute peak also holds the forked parent's pages and the untimed setup inputs; growth
+    under `memory_slack_mb` is ignored, as stages that allocate little are mostly noise. Stages
+    missing from the baseline get NaN ratios and are not flagged.
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    results = results.copy()
+    keys = results['dataset'] + '/' + results['stage']
+    results['baseline_median_s'] = [baseline.get(key, {}).get('median_s', np.nan) for key in keys]
+    results['baseline_stage_rss_mb'] = [baseline.get(key, {}).get('stage_rss_mb', np.nan) for key in keys]
+    results['time_ratio'] = results['median_s'] / results['baseline_median_s']
+    results['rss_ratio'] = results['stage_rss_mb'] / results['baseline_stage_rss_mb']
+    results['regression'] = ((results['time_ratio'] > 1 + time_tolerance)
+                             | (results['stage_rss_mb'] > results['baseline_stage_rss_mb'] * (1 + memory_tolerance)
+                                + memory_slack_mb))
+    return results
@@ -0,0 +1,141 @@
+"""Periodic, asynchronous training checkpoints with exact resume."""
+
+import glob
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+
+def _to_cpu(obj):
+    # Copy so that later in-place optimizer steps cannot leak into a checkpoint being written
+    if torch.is_tensor(obj):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+
+def rng_state():
+    state = {
+        'python': random.getstate(),
+        'numpy': np.random.get_state(),
+        'torch': torch.get_rng_state(),
+    }
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+def capture_state(epoch, model, optimizer=None, **extra):
+    """Snapshot model, optimizer, epoch and RNG state (TGN memory travels in the state dict as extra state)."""
+    state = {
+        'epoch': epoch,
+        'model': _to_cpu(model.state_dict()),
+        'rng': rng_state(),
+        'extra': _to_cpu(extra),
+    }
+    if optimizer is not None:
+        state['optimizer'] = _to_cpu(optimizer.state_dict())
+    return state
+
+
+def save_checkpoint(path, epoch, model, optimizer=None, **extra):
+    write_checkpoint(capture_state(epoch, model, optimizer, **extra), path)
+
+
+def write_checkpoint(state, path):
+    # Write then rename, so a preempted write never leaves a truncated "latest" checkpoint
+    tmp_path = path + '.tmp'
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, model, optimizer=None, map_location='cpu', restore_rng=True):
+    """Restore a checkpoint in place and return it; training resumes at `state['epoch'] + 1`."""
+    state = torch.load(path, map_location=map_location, weights_only=False)
+    model.load_state_dict(state['model'])
+    if optimizer is not None and 'optimizer' in state:
+        optimizer.load_state_dict(state['optimizer'])
+    if restore_rng:
+        set_rng_state(state['rng'])
+    return state
+
+
+class AsyncCheckpointer:
+    """Write a checkpoint every `every` epochs on a background thread, keeping the last `keep_last`.
+
+    The state is copied to CPU on the training thread (cheap), and only the serialization and
+    disk write happen in the background. At most one write is in flight at a time.
+    """
+
+    def __init__(self, directory, every=1, keep_last=2, prefix='checkpoint'):
+        if keep_last < 1:
+            raise ValueError(f'keep_last must be at least 1, got {keep_last}')
+        self.directory = directory
+        self.every = every
+        self.keep_last = keep_last
+        self.prefix = prefix
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+
+    def path_for(self, epoch):
+        return os.path.join(self.directory, f'{self.prefix}_{epoch:06d}.pt')
+
+    def checkpoints(self):
+        return sorted(glob.glob(os.path.join(self.directory, f'{self.prefix}_*.pt')))
+
+    def latest(self):
+        paths = self.checkpoints()
+        return paths[-1] if paths else None
+
+    def maybe_save(self, epoch, model, optimizer=None, **extra):
+        if (epoch + 1) % self.every == 0:
+            self.save(epoch, model, optimizer, **extra)
+
+    def save(self, epoch, model, optimizer=None, **extra):
+        state = capture_state(epoch, model, optimizer, **extra)
+        self.wait()
+        self._pending = self._executor.submit(self._write, state, self.path_for(epoch))
+
+    def _write(self, state, path):
+        write_checkpoint(state, path)
+        for old in self.checkpoints()[:-self.keep_last]:
+            os.remove(old)
+
+    def wait(self):
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+    def resume(self, model, optimizer=None, map_location='cpu'):
+        """Load the newest checkpoint if there is one and return the epoch to start from."""
+        self.wait()
+        path = self.latest()
+        if path is None:
+            return 0
+        state = load_checkpoint(path, model, optimizer, map_location=map_location)
+        return state['epoch'] + 1
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,80 @@
+"""User-item link scoring heads on top of node encoders."""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+class DotProductDecoder(nn.Module):
+    def forward(self, user_emb, item_emb):
+        """Score aligned (user, item) pairs."""
+        return (user_emb * item_emb).sum(dim=-1)
+
+    def score_all(self, user_emb, item_emb):
+        """[U, I] scores of every user against every candidate item, as one matmul."""
+        return user_emb @ item_emb.t()
+
+
+class BilinearDecoder(nn.Module):
+    """u^T W i; W starts at the identity, i.e. as a dot product."""
+
+    def __init__(self, dim):
+        super(BilinearDecoder, self).__init__()
+        self.weight = nn.Parameter(torch.eye(dim))
+
+    def forward(self, user_emb, item_emb):
+        return ((user_emb @ self.weight) * item_emb).sum(dim=-1)
+
+    def score_all(self, user_emb, item_emb):
+        # Project the users once, then a single matmul against the whole candidate set
+        return (user_emb @ self.weight) @ item_emb.t()
+
+
+class LinkScorer(nn.Module):
+    """A node encoder (any module mapping (x, edge_index, edge_time) to node embeddings) plus a decoder.
+
+    `score_all` has the `score_fn(user_emb, item_emb)` signature used by
+    `ranking.full_ranking_evaluation`, so a whole catalog is ranked without a forward per candidate.
+    """
+
+    def __init__(self, encoder, decoder=None):
+        super(LinkScorer, self).__init__()
+        self.encoder = encoder
+        self.decoder = decoder if decoder is not None else DotProductDecoder()
+
+    def forward(self, x, edge_index, edge_time, pairs=None):
+        """Logits for `pairs` ([2, P] user/item node ids), by default the graph's own edges."""
+        node_emb = self.encoder(x, edge_index, edge_time)
+        users, items = edge_index if pairs is None else pairs
+        return self.decoder(node_emb[users], node_emb[items])
+
+    def score_all(self, user_emb, item_emb):
+        return self.decoder.score_all(user_emb, item_emb)
+
+    def score_candidates(self, node_emb, users, items):
+        """[len(users), len(items)] scores for node ids `users` against node ids `items`."""
+        return self.decoder.score_all(node_emb[users], node_emb[items])
+
+
+def train_link_prediction(model, loader, optimizer, num_negatives=1):
+    """One epoch of binary cross-entropy on observed edges vs. edges to randomly drawn items."""
+    model.train()
+    total_loss = 0
+    for data in loader:
+        optimizer.zero_grad()
+        node_emb = model.encoder(data.x, data.edge_index, data.edge_time)
+        users, items = data.edge_index
+
+        # Negatives are drawn from the items of the same graph, so users are never candidates
+        catalog = torch.unique(items)
+        negative_items = catalog[torch.randint(catalog.numel(), (items.numel() * num_negatives,), device=items.device)]
+        positive = model.decoder(node_emb[users], node_emb[items])
+        negative = model.decoder(node_emb[users.repeat(num_negatives)], node_emb[negative_items])
+
+        logits = torch.cat([positive, negative])
+        labels = torch.cat([torch.ones_like(positive), torch.zeros_like(negative)])
+        loss = F.binary_cross_entropy_with_logits(logits, labels)
+        loss.backward()
+        optimizer.step()
+        total_loss += loss.item()
+    return total_loss / len(loader)
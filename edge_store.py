@@ -0,0 +1,171 @@
+"""Preprocessed, memory-mapped user-item edge store shared by the experiment scripts."""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# numpy datetime64 units for the pandas-style granularities used in the notebooks
+GRANULARITY_UNITS = {'Y': 'Y', 'M': 'M', 'D': 'D', 'H': 'h', 'h': 'h', 'min': 'm', 'T': 'm', 's': 's'}
+
+
+class EdgeStore:
+    """Read-only view over an edge store directory written by `build_edge_store`."""
+
+    def __init__(self, path, mmap_mode='r'):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.num_users = self.meta['num_users']
+        self.num_items = self.meta['num_items']
+        self.num_nodes = self.num_users + self.num_items
+        self.num_edges = self.meta['num_edges']
+
+        # Every process opening the store shares the same page cache
+        self.src = np.load(os.path.join(path, 'src.npy'), mmap_mode=mmap_mode)
+        self.dst = np.load(os.path.join(path, 'dst.npy'), mmap_mode=mmap_mode)
+        self.ts = np.load(os.path.join(path, 'ts.npy'), mmap_mode=mmap_mode)
+
+    def vocab(self):
+        """Return the (users, items) raw id arrays, indexed by node id."""
+        users = np.load(os.path.join(self.path, 'users.npy'), allow_pickle=True)
+        items = np.load(os.path.join(self.path, 'items.npy'), allow_pickle=True)
+        return users, items
+
+    def __len__(self):
+        return self.num_edges
+
+
+def build_edge_store(df, path, user_col='user_id', item_col='item_id', time_col='timestamp'):
+    """Factorize a loaded interaction DataFrame once and write it as flat .npy arrays.
+
+    Users get node ids [0, num_users) and items [num_users, num_users + num_items).
+    Edges are stored sorted by time, with timestamps as int64 seconds.
+    """
+    os.makedirs(path, exist_ok=True)
+    df = df.sort_values(time_col, kind='stable')
+
+    user_codes, users = pd.factorize(df[user_col])
+    item_codes, items = pd.factorize(df[item_col])
+    src = user_codes.astype(np.int64)
+    dst = item_codes.astype(np.int64) + len(users)
+    ts = df[time_col].values.astype('datetime64[s]').astype(np.int64)
+
+    np.save(os.path.join(path, 'src.npy'), src)
+    np.save(os.path.join(path, 'dst.npy'), dst)
+    np.save(os.path.join(path, 'ts.npy'), ts)
+    np.save(os.path.join(path, 'users.npy'), np.asarray(users, dtype=object), allow_pickle=True)
+    np.save(os.path.join(path, 'items.npy'), np.asarray(items, dtype=object), allow_pickle=True)
+
+    meta = {'num_users': len(users), 'num_items': len(items), 'num_edges': len(src)}
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return EdgeStore(path)
+
+
+def load_edge_store(path, mmap_mode='r'):
+    return EdgeStore(path, mmap_mode=mmap_mode)
+
+
+def bucket_times(ts, granularity):
+    """Floor int64 second timestamps to a granularity ('Y', 'M', 'D', 'H'/'h', 'min', ...)."""
+    unit = GRANULARITY_UNITS[granularity]
+    return np.asarray(ts).astype('datetime64[s]').astype(f'datetime64[{unit}]').astype('datetime64[s]').astype(np.int64)
+
+
+def temporal_split(time_groups, train_frac=0.8):
+    """Boolean train mask splitting edges on the sorted distinct time groups, as in the notebooks."""
+    groups = np.unique(time_groups)
+    split_value = groups[min(int(train_frac * len(groups)), len(groups) - 1)]
+    return time_groups <= split_value
+
+
+def to_pyg_data(store, mask=None, num_features=8, time_granularity=None):
+    """Build a PyG `Data` object over all store nodes from a (masked) slice of the edges."""
+    import torch
+    from torch_geometric.data import Data
+
+    src, dst, ts = store.src, store.dst, store.ts
+    if mask is not None:
+        src, dst, ts = src[mask], dst[mask], ts[mask]
+    if time_granularity is not None:
+        ts = bucket_times(ts, time_granularity)
+
+    edge_index = torch.from_numpy(np.stack([src, dst]).astype(np.int64))
+    edge_time = torch.from_numpy(np.asarray(ts, dtype=np.float32))
+    x = torch.randn(store.num_nodes, num_features)
+    y = torch.randint(0, 2, (store.num_nodes,))
+    return Data(x=x, edge_index=edge_index, edge_time=edge_time, y=y)
+
+
+class TemporalGraph:
+    """Graph structure shared by every time granularity of one edge store.
+
+    As in the notebooks' nx.DiGraph, repeated (user, item) interactions collapse into one edge
+    that keeps its latest timestamp. Degrees and the GCN normalization (self-loops plus
+    symmetric degree scaling, as GCNConv computes on every call) depend only on this structure,
+    so they are computed once; `view(granularity)` just relabels timestamps into buckets.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.num_nodes = store.num_nodes
+        src, dst, ts = np.asarray(store.src), np.asarray(store.dst), np.asarray(store.ts)
+
+        # The store is time-sorted, so the last occurrence of a pair is its latest interaction
+        keys = src * self.num_nodes + dst
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = sorted_keys[1:] != sorted_keys[:-1]
+        keep = np.sort(order[last])
+        self.src, self.dst, self.ts = src[keep], dst[keep], ts[keep]
+
+        self.out_degree = np.bincount(self.src, minlength=self.num_nodes)
+        self.in_degree = np.bincount(self.dst, minlength=self.num_nodes)
+        loops = np.arange(self.num_nodes)
+        self.norm_src = np.concatenate([self.src, loops])
+        self.norm_dst = np.concatenate([self.dst, loops])
+        deg_inv_sqrt = (self.in_degree + 1.0) ** -0.5
+        self.norm_weight = (deg_inv_sqrt[self.norm_src] * deg_inv_sqrt[self.norm_dst]).astype(np.float32)
+        self._tensors = None
+
+    @property
+    def num_edges(self):
+        return len(self.src)
+
+    def view(self, granularity):
+        return GranularityView(self, granularity)
+
+    def tensors(self):
+        """edge_index, edge_time and normalized (edge_index, edge_weight), built once and shared by all views."""
+        if self._tensors is None:
+            import torch
+            self._tensors = {
+                'edge_index': torch.from_numpy(np.stack([self.src, self.dst]).astype(np.int64)),
+                'edge_time': torch.from_numpy(self.ts.astype(np.float32)),
+                'norm_edge_index': torch.from_numpy(np.stack([self.norm_src, self.norm_dst]).astype(np.int64)),
+                'norm_edge_weight': torch.from_numpy(self.norm_weight),
+            }
+        return self._tensors
+
+
+class GranularityView:
+    """A TemporalGraph with its timestamps bucketed at one granularity, in O(E)."""
+
+    def __init__(self, graph, granularity):
+        self.graph = graph
+        self.granularity = granularity
+        self.time_group = bucket_times(graph.ts, granularity)
+
+    def split(self, train_frac=0.8):
+        return temporal_split(self.time_group, train_frac)
+
+    def to_pyg_data(self, num_features=8):
+        """PyG `Data` over the shared structure tensors, plus this view's `time_group`."""
+        import torch
+        from torch_geometric.data import Data
+
+        x = torch.randn(self.graph.num_nodes, num_features)
+        return Data(x=x, time_group=torch.from_numpy(self.time_group), **self.graph.tensors())
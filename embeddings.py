@@ -0,0 +1,128 @@
+"""Versioned on-disk export of trained node embeddings, read back memory-mapped."""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+
+def encode_nodes(model, data):
+    """Final node embeddings of a trained HTGNN/GraphSAGE/TGN (or LinkScorer) for one graph.
+
+    TGN embeddings are its memory rows, i.e. the state after the events it has already
+    processed; the GCN-style models run a single forward pass over the whole graph.
+    """
+    import torch
+
+    model = getattr(model, 'encoder', model)
+    model.eval()
+    with torch.no_grad():
+        if hasattr(model, 'memory'):
+            return model.memory[torch.arange(data.num_nodes)]
+        if getattr(data, 'edge_time', None) is not None:
+            return model(data.x, data.edge_index, data.edge_time)
+        return model(data.x, data.edge_index)
+
+
+def _versions(path):
+    if not os.path.isdir(path):
+        return []
+    return sorted(int(name[1:]) for name in os.listdir(path) if name.startswith('v') and name[1:].isdigit())
+
+
+def export_embeddings(path, embeddings, node_ids, is_user=None, metadata=None):
+    """Write embeddings and their id vocabulary as a new version `path/vNNNN` and mark it latest.
+
+    `node_ids[i]` is the raw id (e.g. Last.fm username or track) of row i; `is_user` optionally
+    flags which rows are users. Existing versions are never modified, so readers holding an
+    older version keep a consistent view. Returns the version directory.
+    """
+    embeddings = np.ascontiguousarray(embeddings.detach().cpu().numpy() if hasattr(embeddings, 'detach')
+                                      else embeddings, dtype=np.float32)
+    node_ids = np.asarray(node_ids, dtype=object)
+    if len(node_ids) != len(embeddings):
+        raise ValueError(f'{len(node_ids)} ids for {len(embeddings)} embedding rows')
+
+    versions = _versions(path)
+    version = versions[-1] + 1 if versions else 1
+    version_path = os.path.join(path, f'v{version:04d}')
+    os.makedirs(version_path)
+
+    np.save(os.path.join(version_path, 'embeddings.npy'), embeddings)
+    np.save(os.path.join(version_path, 'ids.npy'), node_ids, allow_pickle=True)
+    if is_user is not None:
+        np.save(os.path.join(version_path, 'is_user.npy'), np.asarray(is_user, dtype=bool))
+    meta = {'format_version': FORMAT_VERSION, 'version': version, 'num_nodes': len(embeddings),
+            'dim': embeddings.shape[1], 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), **(metadata or {})}
+    with open(os.path.join(version_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    # Point LATEST at the new version only once it is complete
+    tmp = os.path.join(path, 'LATEST.tmp')
+    with open(tmp, 'w') as f:
+        f.write(f'v{version:04d}')
+    os.replace(tmp, os.path.join(path, 'LATEST'))
+    return version_path
+
+
+class EmbeddingCache:
+    """Read-only, memory-mapped view of one exported embedding version (the latest by default)."""
+
+    def __init__(self, path, version=None, mmap_mode='r'):
+        if version is None:
+            with open(os.path.join(path, 'LATEST')) as f:
+                name = f.read().strip()
+        else:
+            name = f'v{int(version):04d}'
+        self.path = os.path.join(path, name)
+        with open(os.path.join(self.path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta['format_version'] > FORMAT_VERSION:
+            raise ValueError(f'embedding format {self.meta["format_version"]} is newer than this reader')
+
+        self.version = self.meta['version']
+        self.embeddings = np.load(os.path.join(self.path, 'embeddings.npy'), mmap_mode=mmap_mode)
+        self.ids = np.load(os.path.join(self.path, 'ids.npy'), allow_pickle=True)
+        is_user_path = os.path.join(self.path, 'is_user.npy')
+        self.is_user = np.load(is_user_path) if os.path.exists(is_user_path) else None
+        self._index = None
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    @property
+    def dim(self):
+        return self.embeddings.shape[1]
+
+    def rows(self, ids):
+        """Row of each raw id, or -1 for ids not in the vocabulary."""
+        if self._index is None:
+            self._index = pd.Index(self.ids)
+        return self._index.get_indexer(np.asarray(ids, dtype=object))
+
+    def lookup(self, ids):
+        rows = self.rows(ids)
+        if (rows < 0).any():
+            raise KeyError(f'{int((rows < 0).sum())} ids are not in embedding version {self.version}')
+        return np.asarray(self.embeddings[rows])
+
+    def _rows_where(self, flags):
+        if flags is None:
+            raise ValueError(f'embedding version {self.version} was exported without is_user flags')
+        rows = np.flatnonzero(flags)
+        return rows, self.embeddings[rows]
+
+    def users(self):
+        """(row numbers, embeddings) of the user rows."""
+        return self._rows_where(self.is_user)
+
+    def items(self):
+        return self._rows_where(None if self.is_user is None else ~self.is_user)
+
+
+def load_embeddings(path, version=None, mmap_mode='r'):
+    return EmbeddingCache(path, version=version, mmap_mode=mmap_mode)
@@ -0,0 +1,121 @@
+"""Declarative dataset x model x granularity experiment matrix with memoized results."""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from results_store import ResultsStore
+from sweep import _init_worker, _run_job, expand_grid
+
+# Measurements _run_job adds to every row; they are stored in their own columns, not with the metrics
+_RESOURCE_FIELDS = ('wall_time_s', 'peak_rss_mb', 'job_rss_mb', 'pid')
+
+
+def store_fingerprint(store_path, chunk_size=1 << 24):
+    """Content hash of an edge store (meta.json and the src/dst/ts arrays), used as the data cache key."""
+    digest = hashlib.sha256()
+    for name in ('meta.json', 'src.npy', 'dst.npy', 'ts.npy'):
+        with open(os.path.join(store_path, name), 'rb') as f:
+            for block in iter(lambda: f.read(chunk_size), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _source(obj):
+    if isinstance(obj, functools.partial):
+        return [_source(obj.func), repr(obj.args), repr(sorted(obj.keywords.items()))]
+    try:
+        source = inspect.getsource(obj)
+    except (OSError, TypeError):
+        # Notebook classes have no source file; their methods do (through the cell cache)
+        if inspect.isclass(obj):
+            return [_source(member) for _, member in sorted(vars(obj).items()) if inspect.isfunction(member)]
+        code = obj.__code__
+        source = code.co_code.hex() + repr(code.co_consts)
+    if inspect.isfunction(obj):
+        return [source, repr(obj.__defaults__), repr(obj.__kwdefaults__)]
+    return source
+
+
+def code_fingerprint(*objects):
+    """Hash of the source of functions, classes or modules, including functions' default arguments.
+
+    Pass it as `code_version` for the code a job depends on (models, training helpers), so
+    editing any of it invalidates the cached cells.
+    """
+    payload = json.dumps([_source(obj) for obj in objects])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def config_key(data_key, config, code_version=None, job_key=None):
+    """Stable hash of (data cache key, full config including model and seed, job code, code version)."""
+    payload = json.dumps({'data': data_key, 'config': config, 'code_version': code_version, 'job': job_key},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def run_matrix(datasets, job_fn, results_path, code_version=None, max_workers=None, threads_per_job=1,
+               mp_context=None, **grid):
+    """Run `job_fn(store, dataset=..., **config)` for every cell of datasets x grid, skipping cached cells.
+
+    `datasets` maps a dataset name to its edge store path; `grid` lists the other axes, e.g.
+    model=['HTGNN', 'TGN'], granularity=['D', 'h'], seed=[0, 1, 2]. `job_fn` may also be a dict
+    keyed by the `model` value. Each cell is hashed from the store contents, its config, the
+    source and default arguments of its job function and `code_version` (e.g. a
+    `code_fingerprint` of the models the job builds); cells already in the SQLite
+    `ResultsStore` at `results_path` are returned as stored, only the rest are run in a process
+    pool. Every finished cell is recorded with its timings and peak RSS; failed cells are not.
+    Metrics returned as NumPy arrays (e.g. per-user accuracy for paired significance tests)
+    are stored with `ResultsStore.record(arrays=...)` and left out of the returned rows.
+    """
+    data_keys = {name: store_fingerprint(path) for name, path in datasets.items()}
+    configs = expand_grid(dataset=list(datasets), **grid)
+    job_fns = job_fn if isinstance(job_fn, dict) else {None: job_fn}
+    job_keys = {model: code_fingerprint(fn) for model, fn in job_fns.items()}
+    store = ResultsStore(results_path)
+
+    rows = [None] * len(configs)
+    pending = []
+    for i, config in enumerate(configs):
+        job_key = job_keys[config['model']] if isinstance(job_fn, dict) else job_keys[None]
+        key = config_key(data_keys[config['dataset']], config, code_version, job_key)
+        if key in store:
+            rows[i] = dict(store.get(key), cached=True)
+        else:
+            pending.append((i, key))
+
+    if pending:
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 1) // threads_per_job)
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pending)), mp_context=mp_context,
+                                 initializer=_init_worker, initargs=(None, threads_per_job)) as pool:
+            futures = {}
+            for i, key in pending:
+                config = configs[i]
+                fn = job_fn[config['model']] if isinstance(job_fn, dict) else job_fn
+                futures[pool.submit(_run_job, fn, config, datasets[config['dataset']])] = (i, key)
+            for future in as_completed(futures):
+                i, key = futures[future]
+                try:
+                    row = future.result()
+                except Exception as exc:
+                    rows[i] = dict(configs[i], key=key, error=repr(exc), cached=False)
+                    continue
+                # Recorded as soon as a cell finishes, so an interrupted run keeps everything done so far
+                arrays = {name: value for name, value in row.items() if isinstance(value, np.ndarray)}
+                row = {name: value for name, value in row.items() if name not in arrays}
+                metrics = {name: value for name, value in row.items()
+                           if name not in configs[i] and name not in _RESOURCE_FIELDS}
+                store.record(configs[i], metrics, key=key, wall_time_s=row['wall_time_s'],
+                             peak_rss_mb=row['peak_rss_mb'], job_rss_mb=row['job_rss_mb'],
+                             code_version=code_version, arrays=arrays)
+                rows[i] = dict(row, key=key, cached=False)
+
+    store.close()
+    return pd.DataFrame(rows)
@@ -1085,75 +1085,31 @@ test_data_pyg = convert_to_pyg_data(test_graph)
 train_loader = DataLoader([train_data_pyg], batch_size=1, shuffle=True)
 test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 
-# Custom TGN Model definition
-class TGNModel(torch.nn.Module):
-    def __init__(self, in_channels, out_channels, memory_dim=8, time_dim=8):
-        super(TGNModel, self).__init__()
-        self.memory_dim = memory_dim
-        self.time_dim = time_dim
-
-        # Memory for each node
-        self.memory = torch.zeros(train_data_pyg.num_nodes, memory_dim)
-
-        # Embedding for time
-        self.time_embedding = torch.nn.Embedding(365, time_dim)
-
-        # Message and memory update functions
-        self.message_fn = torch.nn.Linear(in_channels + memory_dim + time_dim, memory_dim)
-        self.memory_update_fn = torch.nn.GRUCell(memory_dim, memory_dim)
-
-        # Final classification layer
-        self.fc = torch.nn.Linear(memory_dim, out_channels)
-
-    def forward(self, x, edge_index, edge_time):
-        # Get memory embeddings for source and target nodes
-        src, dst = edge_index
-        src_memory = self.memory[src]
-        dst_memory = self.memory[dst]
-
-        # Embed time
-        time_embeds = self.time_embedding((edge_time.long() % 365).view(-1, 1)).view(-1, self.time_dim)
-
-        # Create messages
-        messages = self.message_fn(torch.cat([x[src], src_memory, time_embeds], dim=1))
-
-        # Update memory for destination nodes (avoid in-place updates)
-        updated_memory = self.memory_update_fn(messages, dst_memory)
-        self.memory[dst] = updated_memory.detach()  # Detach to avoid breaking the computation graph
-
-        # Apply final classification layer
-        out = self.fc(updated_memory)  # Only output predictions for destination nodes
-        return out
+# TGN model (shared definition in tgn.py, node memory grows with the graph)
+from tgn import TGNModel, train_epoch
 
 # Initialize the model, loss function, and optimizer
 model = TGNModel(in_channels=train_data_pyg.num_node_features, out_channels=2)
 optimizer = optim.Adam(model.parameters(), lr=0.01)
 loss_fn = torch.nn.CrossEntropyLoss()
 
-# Training function
-def train(model, loader, optimizer, loss_fn):
-    model.train()
-    total_loss = 0
-    for data in loader:
-        optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
-        loss = loss_fn(out, data.y[data.edge_index[1]])  # Only compute loss for destination nodes
-        loss.backward(retain_graph=True)  # Retain the computation graph
-        optimizer.step()
-        total_loss += loss.item()
-    return total_loss / len(loader)
+# Training function (mode='truncated' takes one optimizer step per event batch, bounding activation memory).
+# This dataset fits in one backward graph, so the reported TGN numbers use full backprop
+def train(model, loader, optimizer, loss_fn, mode='full'):
+    return train_epoch(model, loader, optimizer, loss_fn, mode=mode)
 
 # Evaluation function
 def evaluate(model, loader):
     model.eval()
-    correct = 0
-    total = 0
-    for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
-        pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
-        total += len(data.edge_index[1])
-    return correct / total
+    with model.preserved_memory():  # Evaluation must not leak into the next training epoch
+        correct = 0
+        total = 0
+        for data in loader:
+            out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
+            pred = out.argmax(dim=1)
+            correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
+            total += len(data.edge_index[1])
+        return correct / total
 
 # Training loop (now running for only 10 epochs)
 for epoch in range(10):  # Update: Loop only for 10 epochs
@@ -1274,75 +1230,31 @@ test_data_pyg = convert_to_pyg_data(test_graph)
 train_loader = DataLoader([train_data_pyg], batch_size=1, shuffle=True)
 test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 
-# Custom TGN Model definition
-class TGNModel(torch.nn.Module):
-    def __init__(self, in_channels, out_channels, memory_dim=8, time_dim=8):
-        super(TGNModel, self).__init__()
-        self.memory_dim = memory_dim
-        self.time_dim = time_dim
-
-        # Memory for each node
-        self.memory = torch.zeros(train_data_pyg.num_nodes, memory_dim)
-
-        # Embedding for time
-        self.time_embedding = torch.nn.Embedding(365, time_dim)
-
-        # Message and memory update functions
-        self.message_fn = torch.nn.Linear(in_channels + memory_dim + time_dim, memory_dim)
-        self.memory_update_fn = torch.nn.GRUCell(memory_dim, memory_dim)
-
-        # Final classification layer
-        self.fc = torch.nn.Linear(memory_dim, out_channels)
-
-    def forward(self, x, edge_index, edge_time):
-        # Get memory embeddings for source and target nodes
-        src, dst = edge_index
-        src_memory = self.memory[src]
-        dst_memory = self.memory[dst]
-
-        # Embed time
-        time_embeds = self.time_embedding((edge_time.long() % 365).view(-1, 1)).view(-1, self.time_dim)
-
-        # Create messages
-        messages = self.message_fn(torch.cat([x[src], src_memory, time_embeds], dim=1))
-
-        # Update memory for destination nodes (avoid in-place updates)
-        updated_memory = self.memory_update_fn(messages, dst_memory)
-        self.memory[dst] = updated_memory.detach()  # Detach to avoid breaking the computation graph
-
-        # Apply final classification layer
-        out = self.fc(updated_memory)  # Only output predictions for destination nodes
-        return out
+# TGN model (shared definition in tgn.py, node memory grows with the graph)
+from tgn import TGNModel, train_epoch
 
 # Initialize the model, loss function, and optimizer
 model = TGNModel(in_channels=train_data_pyg.num_node_features, out_channels=2)
 optimizer = optim.Adam(model.parameters(), lr=0.01)
 loss_fn = torch.nn.CrossEntropyLoss()
 
-# Training function
-def train(model, loader, optimizer, loss_fn):
-    model.train()
-    total_loss = 0
-    for data in loader:
-        optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
-        loss = loss_fn(out, data.y[data.edge_index[1]])  # Only compute loss for destination nodes
-        loss.backward(retain_graph=True)  # Retain the computation graph
-        optimizer.step()
-        total_loss += loss.item()
-    return total_loss / len(loader)
+# Training function (mode='truncated' takes one optimizer step per event batch, bounding activation memory).
+# This dataset fits in one backward graph, so the reported TGN numbers use full backprop
+def train(model, loader, optimizer, loss_fn, mode='full'):
+    return train_epoch(model, loader, optimizer, loss_fn, mode=mode)
 
 # Evaluation function
 def evaluate(model, loader):
     model.eval()
-    correct = 0
-    total = 0
-    for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
-        pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
-        total += len(data.edge_index[1])
-    return correct / total
+    with model.preserved_memory():  # Evaluation must not leak into the next training epoch
+        correct = 0
+        total = 0
+        for data in loader:
+            out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
+            pred = out.argmax(dim=1)
+            correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
+            total += len(data.edge_index[1])
+        return correct / total
 
 # Training loop (now running for only 10 epochs)
 for epoch in range(10):  # Update: Loop only for 10 epochs
@@ -1467,75 +1379,31 @@ test_data_pyg = convert_to_pyg_data(test_graph)
 train_loader = DataLoader([train_data_pyg], batch_size=1, shuffle=True)
 test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 
-# Custom TGN Model definition
-class TGNModel(torch.nn.Module):
-    def __init__(self, in_channels, out_channels, memory_dim=8, time_dim=8):
-        super(TGNModel, self).__init__()
-        self.memory_dim = memory_dim
-        self.time_dim = time_dim
-
-        # Memory for each node
-        self.memory = torch.zeros(train_data_pyg.num_nodes, memory_dim)
-
-        # Embedding for time
-        self.time_embedding = torch.nn.Embedding(365, time_dim)
-
-        # Message and memory update functions
-        self.message_fn = torch.nn.Linear(in_channels + memory_dim + time_dim, memory_dim)
-        self.memory_update_fn = torch.nn.GRUCell(memory_dim, memory_dim)
-
-        # Final classification layer
-        self.fc = torch.nn.Linear(memory_dim, out_channels)
-
-    def forward(self, x, edge_index, edge_time):
-        # Get memory embeddings for source and target nodes
-        src, dst = edge_index
-        src_memory = self.memory[src]
-        dst_memory = self.memory[dst]
-
-        # Embed time
-        time_embeds = self.time_embedding((edge_time.long() % 365).view(-1, 1)).view(-1, self.time_dim)
-
-        # Create messages
-        messages = self.message_fn(torch.cat([x[src], src_memory, time_embeds], dim=1))
-
-        # Update memory for destination nodes (avoid in-place updates)
-        updated_memory = self.memory_update_fn(messages, dst_memory)
-        self.memory[dst] = updated_memory.detach()  # Detach to avoid breaking the computation graph
-
-        # Apply final classification layer
-        out = self.fc(updated_memory)  # Only output predictions for destination nodes
-        return out
+# TGN model (shared definition in tgn.py, node memory grows with the graph)
+from tgn import TGNModel, train_epoch
 
 # Initialize the model, loss function, and optimizer
 model = TGNModel(in_channels=train_data_pyg.num_node_features, out_channels=2)
 optimizer = optim.Adam(model.parameters(), lr=0.01)
 loss_fn = torch.nn.CrossEntropyLoss()
 
-# Training function
-def train(model, loader, optimizer, loss_fn):
-    model.train()
-    total_loss = 0
-    for data in loader:
-        optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
-        loss = loss_fn(out, data.y[data.edge_index[1]])  # Only compute loss for destination nodes
-        loss.backward(retain_graph=True)  # Retain the computation graph
-        optimizer.step()
-        total_loss += loss.item()
-    return total_loss / len(loader)
+# Training function (mode='truncated' takes one optimizer step per event batch, bounding activation memory).
+# This dataset fits in one backward graph, so the reported TGN numbers use full backprop
+def train(model, loader, optimizer, loss_fn, mode='full'):
+    return train_epoch(model, loader, optimizer, loss_fn, mode=mode)
 
 # Evaluation function
 def evaluate(model, loader):
     model.eval()
-    correct = 0
-    total = 0
-    for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
-        pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
-        total += len(data.edge_index[1])
-    return correct / total
+    with model.preserved_memory():  # Evaluation must not leak into the next training epoch
+        correct = 0
+        total = 0
+        for data in loader:
+            out = model(data.x, data.edge_index, data.edge_time)  # TGN uses edge_time
+            pred = out.argmax(dim=1)
+            correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
+            total += len(data.edge_index[1])
+        return correct / total
 
 # Training loop (now running for only 10 epochs)
 for epoch in range(10):  # Update: Loop only for 10 epochs
@@ -1658,39 +1526,7 @@ train_loader = DataLoader([train_data_pyg], batch_size=1, shuffle=True)
 test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 
 # RNN Model definition
-class RNNModel(torch.nn.Module):
-    def __init__(self, input_size, hidden_size, output_size):
-        super(RNNModel, self).__init__()
-        self.hidden_size = hidden_size
-        self.rnn = RNN(input_size, hidden_size, batch_first=True)
-        self.fc = Linear(hidden_size, output_size)
-
-    def forward(self, x, edge_index, edge_time):
-        # Prepare input for RNN
-        # x: Node features (num_nodes, num_features)
-        # edge_index: Edge connections (2, num_edges)
-        # edge_time: Timestamps for edges (num_edges,)
-
-        # Sort edges by timestamp
-        sorted_indices = torch.argsort(edge_time)
-        sorted_edge_index = edge_index[:, sorted_indices]
-        sorted_edge_time = edge_time[sorted_indices]
-
-        # Prepare sequences for RNN
-        src, dst = sorted_edge_index
-        sequences = x[src]  # Use source node features as input sequences
-
-        # Initialize hidden state with correct batch size
-        batch_size = sequences.size(0)  # Number of edges
-        h0 = torch.zeros(1, batch_size, self.hidden_size)  # (num_layers, batch_size, hidden_size)
-
-        # Pass sequences through RNN
-        out, _ = self.rnn(sequences.unsqueeze(1), h0)  # Add sequence length dimension
-        out = out.squeeze(1)  # Remove sequence length dimension
-
-        # Apply final classification layer
-        out = self.fc(out)
-        return out  # Output predictions for all edges
+from rnn import RNNModel
 
 # Initialize the model, loss function, and optimizer
 input_size = train_data_pyg.num_node_features
@@ -1706,8 +1542,8 @@ def train(model, loader, optimizer, loss_fn):
     total_loss = 0
     for data in loader:
         optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
-        loss = loss_fn(out, data.y[data.edge_index[1]])  # Only compute loss for destination nodes
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        loss = loss_fn(out, data.y[data.edge_index[1, edge_ids]])  # Only compute loss for destination nodes
         loss.backward()
         optimizer.step()
         total_loss += loss.item()
@@ -1719,10 +1555,10 @@ def evaluate(model, loader):
     correct = 0
     total = 0
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
         pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
-        total += len(data.edge_index[1])
+        correct += (pred == data.y[data.edge_index[1, edge_ids]]).sum().item()  # Only evaluate destination nodes
+        total += len(edge_ids)
     return correct / total
 
 # Training loop (now running for only 10 epochs)
@@ -1760,10 +1596,10 @@ def evaluate_with_metrics(model, loader):
     all_preds = []
     all_labels = []
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
         pred = out.argmax(dim=1)
         all_preds.append(pred.detach().cpu().numpy())
-        all_labels.append(data.y[data.edge_index[1]].detach().cpu().numpy())  # Only evaluate destination nodes
+        all_labels.append(data.y[data.edge_index[1, edge_ids]].detach().cpu().numpy())  # Only evaluate destination nodes
 
     all_preds = np.concatenate(all_preds)
     all_labels = np.concatenate(all_labels)
@@ -1845,34 +1681,7 @@ train_loader = DataLoader([train_data_pyg], batch_size=1, shuffle=True)
 test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 
 # RNN Model definition
-class RNNModel(torch.nn.Module):
-    def __init__(self, input_size, hidden_size, output_size):
-        super(RNNModel, self).__init__()
-        self.hidden_size = hidden_size
-        self.rnn = RNN(input_size, hidden_size, batch_first=True)
-        self.fc = Linear(hidden_size, output_size)
-
-    def forward(self, x, edge_index, edge_time):
-        # Sort edges by timestamp
-        sorted_indices = torch.argsort(edge_time)
-        sorted_edge_index = edge_index[:, sorted_indices]
-        sorted_edge_time = edge_time[sorted_indices]
-
-        # Prepare sequences for RNN
-        src, dst = sorted_edge_index
-        sequences = x[src]  # Use source node features as input sequences
-
-        # Initialize hidden state with correct batch size
-        batch_size = sequences.size(0)  # Number of edges
-        h0 = torch.zeros(1, batch_size, self.hidden_size)  # (num_layers, batch_size, hidden_size)
-
-        # Pass sequences through RNN
-        out, _ = self.rnn(sequences.unsqueeze(1), h0)  # Add sequence length dimension
-        out = out.squeeze(1)  # Remove sequence length dimension
-
-        # Apply final classification layer
-        out = self.fc(out)
-        return out  # Output predictions for all edges
+from rnn import RNNModel
 
 # Initialize the model, loss function, and optimizer
 input_size = train_data_pyg.num_node_features
@@ -1888,8 +1697,8 @@ def train(model, loader, optimizer, loss_fn):
     total_loss = 0
     for data in loader:
         optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
-        loss = loss_fn(out, data.y[data.edge_index[1]])  # Only compute loss for destination nodes
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        loss = loss_fn(out, data.y[data.edge_index[1, edge_ids]])  # Only compute loss for destination nodes
         loss.backward()
         optimizer.step()
         total_loss += loss.item()
@@ -1901,10 +1710,10 @@ def evaluate(model, loader):
     correct = 0
     total = 0
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
         pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
-        total += len(data.edge_index[1])
+        correct += (pred == data.y[data.edge_index[1, edge_ids]]).sum().item()  # Only evaluate destination nodes
+        total += len(edge_ids)
     return correct / total
 
 # Training loop (now running for only 10 epochs)
@@ -1942,10 +1751,10 @@ def evaluate_with_metrics(model, loader):
     all_preds = []
     all_labels = []
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
         pred = out.argmax(dim=1)
         all_preds.append(pred.detach().cpu().numpy())
-        all_labels.append(data.y[data.edge_index[1]].detach().cpu().numpy())  # Only evaluate destination nodes
+        all_labels.append(data.y[data.edge_index[1, edge_ids]].detach().cpu().numpy())  # Only evaluate destination nodes
 
     all_preds = np.concatenate(all_preds)
     all_labels = np.concatenate(all_labels)
@@ -2036,34 +1845,7 @@ train_loader = DataLoader([train_data_pyg], batch_size=1, shuffle=True)
 test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 
 # RNN Model definition
-class RNNModel(nn.Module):
-    def __init__(self, input_size, hidden_size, output_size):
-        super(RNNModel, self).__init__()
-        self.hidden_size = hidden_size
-        self.rnn = nn.RNN(input_size, hidden_size, batch_first=True)
-        self.fc = nn.Linear(hidden_size, output_size)
-
-    def forward(self, x, edge_index, edge_time):
-        # Sort edges by timestamp
-        sorted_indices = torch.argsort(edge_time)
-        sorted_edge_index = edge_index[:, sorted_indices]
-        sorted_edge_time = edge_time[sorted_indices]
-
-        # Prepare sequences for RNN
-        src, dst = sorted_edge_index
-        sequences = x[src]  # Use source node features as input sequences
-
-        # Initialize hidden state with correct batch size
-        batch_size = sequences.size(0)  # Number of edges
-        h0 = torch.zeros(1, batch_size, self.hidden_size)  # (num_layers, batch_size, hidden_size)
-
-        # Pass sequences through RNN
-        out, _ = self.rnn(sequences.unsqueeze(1), h0)  # Add sequence length dimension
-        out = out.squeeze(1)  # Remove sequence length dimension
-
-        # Apply final classification layer
-        out = self.fc(out)
-        return out  # Output predictions for all edges
+from rnn import RNNModel
 
 # Initialize the model, loss function, and optimizer
 input_size = train_data_pyg.num_node_features
@@ -2079,8 +1861,8 @@ def train(model, loader, optimizer, loss_fn):
     total_loss = 0
     for data in loader:
         optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
-        loss = loss_fn(out, data.y[data.edge_index[1]])  # Only compute loss for destination nodes
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        loss = loss_fn(out, data.y[data.edge_index[1, edge_ids]])  # Only compute loss for destination nodes
         loss.backward()
         optimizer.step()
         total_loss += loss.item()
@@ -2092,10 +1874,10 @@ def evaluate(model, loader):
     correct = 0
     total = 0
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
         pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()  # Only evaluate destination nodes
-        total += len(data.edge_index[1])
+        correct += (pred == data.y[data.edge_index[1, edge_ids]]).sum().item()  # Only evaluate destination nodes
+        total += len(edge_ids)
     return correct / total
 
 # Training loop (now running for only 10 epochs)
@@ -2131,10 +1913,10 @@ def evaluate_with_metrics(model, loader):
     all_preds = []
     all_labels = []
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)  # RNN uses edge_time
         pred = out.argmax(dim=1)
         all_preds.append(pred.detach().cpu().numpy())
-        all_labels.append(data.y[data.edge_index[1]].detach().cpu().numpy())  # Only evaluate destination nodes
+        all_labels.append(data.y[data.edge_index[1, edge_ids]].detach().cpu().numpy())  # Only evaluate destination nodes
 
     all_preds = np.concatenate(all_preds)
     all_labels = np.concatenate(all_labels)
@@ -2152,39 +1934,6 @@ def evaluate_with_metrics(model, loader):
 accuracy, precision, recall, f1, mrr, ndcg = evaluate_with_metrics(model, test_loader)
 print(f'NDCG: {ndcg:.4f}, Precision: {precision:.4f}, Recall: {recall:.4f}, F1-Score: {f1:.4f}')
 
-"""# P-**Value**"""
-
-from scipy import stats
-
-# Performance scores for HTGNN and baseline models
-htgnn = [97, 88, 71]  # HTGNN scores for MovieLens, Amazon, Houses
-tgn = [60, 44, 52]     # TGN scores for MovieLens, Amazon, Houses
-graphsage = [52, 59, 56]  # GraphSAGE scores for MovieLens, Amazon, Houses
-rnn = [56, 46, 47]     # RNN scores for MovieLens, Amazon, Houses
-
-# Perform paired t-tests
-# HTGNN vs. TGN
-t_stat_htgnn_tgn, p_value_htgnn_tgn = stats.ttest_rel(htgnn, tgn)
-
-# HTGNN vs. GraphSAGE
-t_stat_htgnn_graphsage, p_value_htgnn_graphsage = stats.ttest_rel(htgnn, graphsage)
-
-# HTGNN vs. RNN
-t_stat_htgnn_rnn, p_value_htgnn_rnn = stats.ttest_rel(htgnn, rnn)
-
-# Print results
-print("HTGNN vs. TGN:")
-print(f"  t-statistic: {t_stat_htgnn_tgn:.3f}")
-print(f"  p-value: {p_value_htgnn_tgn:.3f}")
-
-print("\nHTGNN vs. GraphSAGE:")
-print(f"  t-statistic: {t_stat_htgnn_graphsage:.3f}")
-print(f"  p-value: {p_value_htgnn_graphsage:.3f}")
-
-print("\nHTGNN vs. RNN:")
-print(f"  t-statistic: {t_stat_htgnn_rnn:.3f}")
-print(f"  p-value: {p_value_htgnn_rnn:.3f}")
-
 """# HTGNN/TGNN **eval**"""
 
 from google.colab import drive
@@ -2255,21 +2004,7 @@ for scale in temporal_scales:
     test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 
     # Define a simple GNN model
-    class GNNModel(nn.Module):
-        def __init__(self, input_size, hidden_size, output_size):
-            super(GNNModel, self).__init__()
-            self.hidden_size = hidden_size
-            self.rnn = nn.RNN(input_size, hidden_size, batch_first=True)
-            self.fc = nn.Linear(hidden_size, output_size)
-
-        def forward(self, x, edge_index, edge_time):
-            sorted_indices = torch.argsort(edge_time)
-            sorted_edge_index = edge_index[:, sorted_indices]
-            sequences = x[sorted_edge_index[0]]
-            h0 = torch.zeros(1, sequences.size(0), self.hidden_size)
-            out, _ = self.rnn(sequences.unsqueeze(1), h0)
-            out = self.fc(out.squeeze(1))
-            return out
+    from rnn import RNNModel as GNNModel
 
     # Initialize model
     model = GNNModel(input_size=train_data_pyg.num_node_features, hidden_size=16, output_size=2)
@@ -2282,8 +2017,8 @@ for scale in temporal_scales:
         total_loss = 0
         for data in loader:
             optimizer.zero_grad()
-            out = model(data.x, data.edge_index, data.edge_time)
-            loss = loss_fn(out, data.y[data.edge_index[1]])
+            out, edge_ids = model(data.x, data.edge_index, data.edge_time)
+            loss = loss_fn(out, data.y[data.edge_index[1, edge_ids]])
             loss.backward()
             optimizer.step()
             total_loss += loss.item()
@@ -2295,10 +2030,10 @@ for scale in temporal_scales:
         correct = 0
         total = 0
         for data in loader:
-            out = model(data.x, data.edge_index, data.edge_time)
+            out, edge_ids = model(data.x, data.edge_index, data.edge_time)
             pred = out.argmax(dim=1)
-            correct += (pred == data.y[data.edge_index[1]]).sum().item()
-            total += len(data.edge_index[1])
+            correct += (pred == data.y[data.edge_index[1, edge_ids]]).sum().item()
+            total += len(edge_ids)
         return correct / total
 
     # Train and evaluate model
@@ -2309,6 +2044,199 @@ for scale in temporal_scales:
 
     print(f"Finished evaluation for scale: {scale}\n")
 
+# Same scale loop as a parallel sweep over one memory-mapped edge store
+from edge_store import build_edge_store, to_pyg_data
+from sweep import run_sweep, expand_grid
+
+store_path = '/content/user_activity_store'
+build_edge_store(ratings, store_path)
+
+def scale_job(store, scale, hidden_size=16, lr=0.01, epochs=10, seed=0):
+    torch.manual_seed(seed)
+    train_mask = np.arange(store.num_edges) < int(0.8 * store.num_edges)
+    train_loader = DataLoader([to_pyg_data(store, mask=train_mask, time_granularity=scale)], batch_size=1, shuffle=True)
+    test_loader = DataLoader([to_pyg_data(store, mask=~train_mask, time_granularity=scale)], batch_size=1, shuffle=False)
+
+    model = GNNModel(input_size=8, hidden_size=hidden_size, output_size=2)
+    optimizer = optim.Adam(model.parameters(), lr=lr)
+    loss_fn = nn.CrossEntropyLoss()
+    for epoch in range(epochs):
+        train_loss = train(model, train_loader, optimizer, loss_fn)
+    return {'train_loss': train_loss, 'test_acc': evaluate(model, test_loader)}
+
+scale_results = run_sweep(store_path, expand_grid(scale=temporal_scales), scale_job, threads_per_job=2)
+print(scale_results)
+
+# Paper table as one declarative dataset x model x granularity matrix; finished cells are reused from disk
+from experiments import code_fingerprint, run_matrix
+from rank_metrics import RankedScores
+from tgn import TGNModel
+from rnn import RNNModel
+
+datasets = {
+    'Houses': ('/content/drive/MyDrive/user_activity.csv', 'user_id', 'item_id',
+               lambda df: pd.to_datetime(df['create_timestamp'])),
+    'MovieLens': ('/content/drive/MyDrive/movielens/ratings_small.csv', 'userId', 'movieId',
+                  lambda df: pd.to_datetime(df['timestamp'], unit='s')),
+    'Amazon': ('/content/drive/MyDrive/ratings_Beauty.csv', 'UserId', 'ProductId',
+               lambda df: pd.to_datetime(df['Timestamp'], unit='s')),
+}
+store_paths = {}
+for name, (csv_path, user_col, item_col, parse_time) in datasets.items():
+    frame = pd.read_csv(csv_path)
+    frame['timestamp'] = parse_time(frame)
+    store_paths[name] = f'/content/stores/{name.lower()}'
+    build_edge_store(frame, store_paths[name], user_col=user_col, item_col=item_col)
+
+def model_outputs(model_name, model, data):
+    """(logits, labels, edge ids) for any of the four models, per node or per edge as each one predicts.
+
+    Edge ids give the edge of each output row; they are None for the per-node models.
+    """
+    if model_name == 'GraphSAGE':
+        return model(data.x, data.edge_index), data.y, None
+    if model_name == 'HTGNN':
+        return model(data.x, data.edge_index, data.edge_time), data.y, None
+    if model_name == 'TGN':
+        return (model(data.x, data.edge_index, data.edge_time), data.y[data.edge_index[1]],
+                torch.arange(data.edge_index.size(1)))
+    out, edge_ids = model(data.x, data.edge_index, data.edge_time)
+    return out, data.y[data.edge_index[1, edge_ids]], edge_ids
+
+def user_accuracy(data, correct, edge_ids):
+    """Accuracy over each test user's edges, users in sorted id order; the same for every model on a split."""
+    if edge_ids is None:
+        edge_correct = correct[data.edge_index[1]]
+    else:
+        edge_correct = torch.zeros(data.edge_index.size(1))
+        edge_correct[edge_ids] = correct
+    _, inverse = np.unique(data.edge_index[0].numpy(), return_inverse=True)
+    return np.bincount(inverse, weights=edge_correct.numpy()) / np.bincount(inverse)
+
+def matrix_job(store, dataset, model, granularity, seed=0, hidden_size=16, lr=0.01, epochs=10):
+    torch.manual_seed(seed)
+    train_mask = np.arange(store.num_edges) < int(0.8 * store.num_edges)
+    train_pyg = to_pyg_data(store, mask=train_mask, time_granularity=granularity)
+    test_pyg = to_pyg_data(store, mask=~train_mask, time_granularity=granularity)
+
+    builders = {
+        'HTGNN': lambda: HTGNN(in_channels=8, out_channels=2),
+        'GraphSAGE': lambda: GraphSAGE(in_channels=8, out_channels=2),
+        'TGN': lambda: TGNModel(in_channels=8, out_channels=2),
+        'RNN': lambda: RNNModel(input_size=8, hidden_size=hidden_size, output_size=2),
+    }
+    net = builders[model]()
+    optimizer = optim.Adam(net.parameters(), lr=lr)
+    loss_fn = nn.CrossEntropyLoss()
+    for epoch in range(epochs):
+        net.train()
+        optimizer.zero_grad()
+        out, labels, _ = model_outputs(model, net, train_pyg)
+        loss = loss_fn(out, labels)
+        loss.backward()
+        optimizer.step()
+
+    net.eval()
+    with torch.no_grad():
+        out, labels, edge_ids = model_outputs(model, net, test_pyg)
+    correct = (out.argmax(dim=1) == labels).float()
+    ndcg = RankedScores(labels.numpy(), out.softmax(dim=1)[:, 1].numpy()).ndcg(k=10)
+    # Per-user accuracy is stored with the run, so models can be compared user by user
+    return {'train_loss': loss.item(), 'test_acc': correct.mean().item(), 'ndcg': ndcg,
+            'user_acc': user_accuracy(test_pyg, correct, edge_ids)}
+
+# Every run lands in one SQLite store that the P-value table and the resolution plots read from.
+# matrix_job's own source is part of each cell's key; this covers the code it calls.
+model_code = code_fingerprint(model_outputs, user_accuracy, HTGNN, GraphSAGE, TGNModel, RNNModel, to_pyg_data)
+matrix_results = run_matrix(store_paths, matrix_job, '/content/drive/MyDrive/results/experiments.sqlite',
+                            code_version=model_code, model=['HTGNN', 'GraphSAGE', 'TGN', 'RNN'],
+                            granularity=['Y', 'M', 'D', 'H', 'min'], seed=[0, 1, 2], threads_per_job=2)
+print(matrix_results.pivot_table(index='dataset', columns='model', values='test_acc'))
+
+"""# P-**Value**"""
+
+from results_store import ResultsStore
+from significance import compare_models
+
+# Per-user test accuracy recorded by the experiment matrix, averaged over seeds and granularities.
+# Users are the paired units: HTGNN and each baseline are compared on the same test users of a dataset
+results_store = ResultsStore('/content/drive/MyDrive/results/experiments.sqlite')
+runs = results_store.runs(latest=True, code_version=model_code)
+user_acc = {}
+for (dataset, model_name), group in runs.groupby(['dataset', 'model']):
+    user_acc[dataset, model_name] = np.mean([results_store.arrays(run_id)['user_acc'] for run_id in group['id']],
+                                            axis=0)
+
+for baseline in ['TGN', 'GraphSAGE', 'RNN']:
+    print(f"HTGNN vs. {baseline}:")
+    for dataset in ['MovieLens', 'Amazon', 'Houses']:
+        stats = compare_models(user_acc[dataset, 'HTGNN'], user_acc[dataset, baseline], num_resamples=10000, rng=0)
+        print(f"  {dataset}: accuracy diff {stats['diff'] * 100:.2f} pts "
+              f"(95% CI {stats['ci_low'] * 100:.2f} to {stats['ci_high'] * 100:.2f}), "
+              f"p-value: {stats['p_value']:.4f} over {stats['num_users']} users")
+
+# Per-stage timings of the notebook pipeline for each dataset, compared against the saved baseline
+from functools import partial
+from benchmark import run_benchmarks, save_baseline, compare_to_baseline
+from edge_store import load_edge_store
+
+def parse_timestamps(dataset, frame):
+    return datasets[dataset][3](frame)
+
+def pipeline_inputs(dataset, stage):
+    """Inputs of `stage`, built by running the stages before it (untimed)."""
+    csv_path, user_col, item_col, parse_time = datasets[dataset]
+    if stage == 'csv_load':
+        return (csv_path,)
+    frame = pd.read_csv(csv_path)
+    if stage == 'timestamp_parse':
+        return (dataset, frame)
+    frame['timestamp'] = parse_time(frame)
+    frame = frame.rename(columns={user_col: 'user_id', item_col: 'item_id'}).sort_values(by='timestamp')
+    if stage == 'create_graph':
+        return (frame,)
+    graph = create_graph(frame)
+    if stage == 'convert_to_pyg_data':
+        return (graph,)
+    loader = DataLoader([convert_to_pyg_data(graph)], batch_size=1, shuffle=True)
+    model = GNNModel(input_size=8, hidden_size=16, output_size=2)
+    if stage == 'epoch':
+        return (model, loader, optim.Adam(model.parameters(), lr=0.01), nn.CrossEntropyLoss())
+    return (model, loader)
+
+stage_fns = {'csv_load': pd.read_csv, 'timestamp_parse': parse_timestamps, 'create_graph': create_graph,
+             'convert_to_pyg_data': convert_to_pyg_data, 'epoch': train, 'eval': evaluate}
+pipelines = {name: {stage: (fn, partial(pipeline_inputs, name, stage)) for stage, fn in stage_fns.items()}
+             for name in datasets}
+num_edges = {name: load_edge_store(path).num_edges for name, path in store_paths.items()}
+bench_results = run_benchmarks(pipelines, num_edges, warmup=1, repeat=5)
+
+baseline_path = '/content/drive/MyDrive/results/pipeline_baseline.json'
+if os.path.exists(baseline_path):
+    bench_results = compare_to_baseline(bench_results, baseline_path)
+    print(bench_results[bench_results['regression']][['dataset', 'stage', 'median_s', 'baseline_median_s',
+                                                      'stage_rss_mb', 'baseline_stage_rss_mb']])
+else:
+    save_baseline(bench_results, baseline_path)
+print(bench_results[['dataset', 'stage', 'median_s', 'p95_s', 'edges_per_s', 'peak_rss_mb']])
+
+# The same stages at production scale, on synthetic logs in the Houses schema generated offline
+from synthetic import write_interactions
+
+synthetic_sizes = {'Synthetic-1M': 1_000_000, 'Synthetic-10M': 10_000_000, 'Synthetic-100M': 100_000_000}
+for name, size in synthetic_sizes.items():
+    csv_path = f'/content/synthetic/{name.lower()}.csv'
+    if not os.path.exists(csv_path):
+        write_interactions(csv_path, size, schema='houses', num_users=size // 20, num_items=size // 50)
+    datasets[name] = (csv_path, 'user_id', 'item_id', lambda df: pd.to_datetime(df['create_timestamp']))
+
+# create_graph and convert_to_pyg_data walk the rows in Python, so past 1M edges only the pandas stages are timed
+synthetic_pipelines = {name: {stage: (fn, partial(pipeline_inputs, name, stage)) for stage, fn in stage_fns.items()
+                              if size <= 1_000_000 or stage in ('csv_load', 'timestamp_parse')}
+                       for name, size in synthetic_sizes.items()}
+synthetic_results = run_benchmarks(synthetic_pipelines, synthetic_sizes, warmup=1, repeat=3)
+print(synthetic_results[['dataset', 'stage', 'median_s', 'p95_s', 'edges_per_s', 'peak_rss_mb']])
+
 from google.colab import drive
 import os
 import pandas as pd
@@ -2319,53 +2247,22 @@ from sklearn.model_selection import train_test_split
 from torch_geometric.data import Data, DataLoader
 import torch.nn as nn
 import numpy as np
-from sklearn.metrics import ndcg_score
+from results_store import ResultsStore
 
 # Mount Google Drive
 drive.mount('/content/drive')
 
-# Load user activity dataset
-ratings = pd.read_csv('/content/drive/MyDrive/user_activity.csv')
-
-# Convert timestamp to datetime and sort by timestamp
-ratings['timestamp'] = pd.to_datetime(ratings['create_timestamp'])
-ratings = ratings.sort_values(by='timestamp')
-
 # Define temporal granularities
 temporal_scales = ['Y', 'M', 'D', 'H', 'min']
 
-# Store results
-results = []
-
-def aggregate_data(data, scale):
-    """Aggregate timestamps at the given temporal scale."""
-    data['timestamp'] = data['timestamp'].dt.to_period(scale).dt.start_time
-    return data
-
-# Placeholder models (HTGNN & TGN), simplified versions
-def train_and_evaluate_model(train_loader, test_loader):
-    """Placeholder function for training & evaluating models."""
-    return np.random.uniform(0.7, 0.95)
-
-# Iterate through different temporal resolutions
-for scale in temporal_scales:
-    print(f"Evaluating models at temporal resolution: {scale}")
-
-    # Aggregate data at current resolution
-    data_scaled = aggregate_data(ratings.copy(), scale)
-
-    # Split into train and test sets
-    train_data, test_data = train_test_split(data_scaled, test_size=0.2, shuffle=False)
-
-    # Train and evaluate HTGNN & TGN
-    ndcg_htgnn = train_and_evaluate_model(None, None)
-    ndcg_tgn = train_and_evaluate_model(None, None)
-
-    # Store results
-    results.append([scale, ndcg_htgnn, ndcg_tgn])
+# NDCG of HTGNN & TGN on the user activity (Houses) data per temporal resolution, averaged over the
+# seeds trained by the experiment matrix
+results_store = ResultsStore('/content/drive/MyDrive/results/experiments.sqlite')
+ndcg = results_store.table('granularity', 'model', 'ndcg', dataset='Houses', model=['HTGNN', 'TGN'])
 
 # Convert results to DataFrame
-results_df = pd.DataFrame(results, columns=['Timestamp', 'HTGNN', 'TGN'])
+results_df = ndcg.reindex(temporal_scales)[['HTGNN', 'TGN']].rename_axis('Timestamp').reset_index()
+results_df.columns.name = None
 
 # Print results table
 print(results_df)
\ No newline at end of file
@@ -56,8 +56,9 @@ from torch_geometric.data import Data, DataLoader
 import torch.nn.functional as F
 from torch_geometric.nn import GCNConv
 
-def convert_to_pyg_data(graph, num_features=8):
-    nodes = list(graph.nodes())
+def convert_to_pyg_data(graph, num_features=8, nodes=None):
+    # Row i of x (and node i in edge_index) is nodes[i]
+    nodes = list(graph.nodes()) if nodes is None else nodes
     node_mapping = {node: i for i, node in enumerate(nodes)}
     edge_index = torch.tensor([[node_mapping[u], node_mapping[v]] for u, v in graph.edges]).t().contiguous()
     edge_time = torch.tensor([graph[u][v]['timestamp'] for u, v in graph.edges], dtype=torch.float)
@@ -65,7 +66,9 @@ def convert_to_pyg_data(graph, num_features=8):
     y = torch.randint(0, 2, (len(nodes),))  # Placeholder labels
     return Data(x=x, edge_index=edge_index, edge_time=edge_time, y=y)
 
-train_data_pyg = convert_to_pyg_data(train_graph)
+# Raw ids of the training graph's rows; exported embeddings are keyed by this same list
+train_nodes = list(train_graph.nodes())
+train_data_pyg = convert_to_pyg_data(train_graph, nodes=train_nodes)
 test_data_pyg = convert_to_pyg_data(test_graph)
 
 train_loader = DataLoader([train_data_pyg], batch_size=1, shuffle=True)
@@ -133,11 +136,17 @@ def evaluate(model, loader):
         correct += (pred == data.y).sum().item()
     return correct / len(loader.dataset)
 
-# Training loop
-for epoch in range(100):
+# Training loop (checkpointed every 10 epochs, resumes from the latest checkpoint)
+from checkpoint import AsyncCheckpointer
+
+checkpointer = AsyncCheckpointer('/content/drive/MyDrive/checkpoints/htgnn_last_fm', every=10)
+start_epoch = checkpointer.resume(model, optimizer)
+for epoch in range(start_epoch, 100):
     train_loss = train(model, train_loader, optimizer, loss_fn)
     test_acc = evaluate(model, test_loader)
     print(f'Epoch {epoch}, Loss: {train_loss}, Test Accuracy: {test_acc}')
+    checkpointer.maybe_save(epoch, model, optimizer)
+checkpointer.close()
 
 import numpy as np
 from sklearn.metrics import precision_score, recall_score, f1_score, accuracy_score
@@ -205,6 +214,59 @@ print(f' NDCG: {ndcg}, Precision: {precision}, Recall: {recall}, F1-Score: {f1}'
 accuracy = calculate_accuracy(model, test_loader)
 print(f'Final Accuracy: {accuracy}')
 
+# Link-scoring mode: HTGNN as an encoder of user/item embeddings, scored with a dot-product decoder
+from decoders import DotProductDecoder, LinkScorer, train_link_prediction
+
+link_model = LinkScorer(HTGNN(in_channels=train_data_pyg.num_node_features, out_channels=16), DotProductDecoder())
+link_optimizer = torch.optim.Adam(link_model.parameters(), lr=0.01)
+for epoch in range(20):
+    link_loss = train_link_prediction(link_model, train_loader, link_optimizer)
+    print(f'Epoch {epoch}, Link Loss: {link_loss}')
+
+# Export the trained node embeddings once; downstream scoring reads the memory-mapped cache, not the GNN.
+# They are encoded on the training graph, whose node index and features the model learned; test_data_pyg has
+# its own node order and freshly drawn x. Test edges are scored against these rows by raw id.
+from embeddings import encode_nodes, export_embeddings, load_embeddings
+
+node_emb = encode_nodes(link_model, train_data_pyg)
+is_user = torch.zeros(train_data_pyg.num_nodes, dtype=torch.bool)
+is_user[train_data_pyg.edge_index[0]] = True
+export_embeddings('/content/drive/MyDrive/embeddings/htgnn_last_fm', node_emb, train_nodes,
+                  is_user=is_user.numpy(), metadata={'model': 'HTGNN', 'dataset': 'Last.fm'})
+cache = load_embeddings('/content/drive/MyDrive/embeddings/htgnn_last_fm')
+
+# Full-catalog ranking: every test user against every test item, user chunk by user chunk,
+# with the items a user already played in training masked out
+from interactions import InteractionIndex
+from ranking import full_ranking_evaluation
+
+user_rows, user_emb = cache.users()
+item_rows, item_emb = cache.items()
+
+def embedding_positions(graph, name):
+    """(row in user_emb, row in item_emb) for each edge of `graph`; edges outside the cache are dropped."""
+    users, items = (np.array(side, dtype=object) for side in zip(*graph.edges))
+    user_pos = pd.Index(cache.ids[user_rows]).get_indexer(users)
+    item_pos = pd.Index(cache.ids[item_rows]).get_indexer(items)
+    keep = (user_pos >= 0) & (item_pos >= 0)
+    # Test users/items first seen after the split have no trained embedding (cold start)
+    print(f'{name}: {len(keep) - keep.sum()} of {len(keep)} edges dropped, node not in the embedding cache')
+    return user_pos[keep], item_pos[keep]
+
+test_index = InteractionIndex(*embedding_positions(test_graph, 'test'))
+train_index = InteractionIndex(*embedding_positions(train_graph, 'train'))
+ranking_metrics = full_ranking_evaluation(torch.from_numpy(user_emb), torch.from_numpy(item_emb), test_index, k=10,
+                                          train_index=train_index, score_fn=link_model.score_all)
+print(', '.join(f'{name}: {value:.4f}' for name, value in ranking_metrics.items()))
+
+# Approximate top-10 retrieval: IVF index over the item embeddings, benchmarked against exact scoring
+from ann import benchmark_ann, build_ivf_index, load_ivf_index
+
+ivf_index = build_ivf_index(item_emb, item_ids=item_rows, nprobe=8)
+ivf_index.save('/content/drive/MyDrive/ann/htgnn_last_fm')
+ivf_index = load_ivf_index('/content/drive/MyDrive/ann/htgnn_last_fm')
+print(benchmark_ann(ivf_index, item_emb, user_emb, k=10, item_ids=item_rows))
+
 """# GraphSAGE + Last.**fm**"""
 
 # Step 1: Mount Google Drive
@@ -309,76 +371,41 @@ def evaluate(model, loader):
         correct += (pred == data.y).sum().item()
     return correct / len(loader.dataset)
 
-# Run training
-for epoch in range(10):
+# Run training (checkpointed every epoch, resumes from the latest checkpoint)
+from checkpoint import AsyncCheckpointer
+
+checkpointer = AsyncCheckpointer('/content/drive/MyDrive/checkpoints/graphsage_last_fm')
+start_epoch = checkpointer.resume(model, optimizer)
+for epoch in range(start_epoch, 10):
     loss = train(model, train_loader, optimizer, loss_fn)
     acc = evaluate(model, test_loader)
     print(f"Epoch {epoch+1}, Loss: {loss:.4f}, Accuracy: {acc:.4f}")
+    checkpointer.maybe_save(epoch, model, optimizer)
+checkpointer.close()
 
 # Step 9: Final Evaluation with Metrics
 import numpy as np
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
-def mrr_score(y_true, y_pred_probs):
-    # For MRR, we need the probability scores for positive class
-    y_true = np.array(y_true)
-    y_pred_probs = np.array(y_pred_probs)
-
-    # Get the rank of each positive example
-    ranks = []
-    for i in np.where(y_true == 1)[0]:
-        # Get the score of the positive example
-        score = y_pred_probs[i]
-        # Count how many examples have higher score than this positive example
-        rank = (y_pred_probs > score).sum() + 1
-        ranks.append(rank)
-
-    if len(ranks) == 0:
-        return 0.0
-    return np.mean(1.0 / np.array(ranks))
-
-def ndcg_score(y_true, y_pred_probs, k=10):
-    # Sort by predicted probabilities in descending order
-    order = np.argsort(y_pred_probs)[::-1]
-    y_true_sorted = np.array(y_true)[order[:k]]
-
-    # Calculate DCG
-    gains = 2 ** y_true_sorted - 1
-    discounts = np.log2(np.arange(2, k + 2))
-    dcg = np.sum(gains / discounts)
-
-    # Calculate IDCG
-    ideal_gains = 2 ** np.sort(y_true)[::-1][:k] - 1
-    idcg = np.sum(ideal_gains / discounts)
+from streaming_metrics import ConfusionMatrix, GlobalRankAccumulator
 
-    return dcg / idcg if idcg > 0 else 0.0
-
-# Updated evaluation function with metrics
+# Updated evaluation function with metrics (accumulated per batch, nothing is concatenated)
 def evaluate_with_metrics(model, loader):
     model.eval()
-    all_preds = []
-    all_probs = []
-    all_labels = []
+    confusion = ConfusionMatrix(num_classes=2)
+    ranking = GlobalRankAccumulator(k=10)
 
     for data in loader:
         out = model(data.x, data.edge_index)
         probs = F.softmax(out, dim=1)
         pred = out.argmax(dim=1)
 
-        all_preds.append(pred.detach().cpu().numpy())
-        all_probs.append(probs[:, 1].detach().cpu().numpy())  # Probability of positive class
-        all_labels.append(data.y.detach().cpu().numpy())
+        confusion.update(data.y, pred)
+        ranking.update(data.y, probs[:, 1])  # Probability of positive class
 
-    all_preds = np.concatenate(all_preds)
-    all_probs = np.concatenate(all_probs)
-    all_labels = np.concatenate(all_labels)
-
-    accuracy = accuracy_score(all_labels, all_preds)
-    precision = precision_score(all_labels, all_preds, average='macro', zero_division=0)
-    recall = recall_score(all_labels, all_preds, average='macro', zero_division=0)
-    f1 = f1_score(all_labels, all_preds, average='macro', zero_division=0)
-    mrr = mrr_score(all_labels, all_probs)
-    ndcg = ndcg_score(all_labels, all_probs)
+    accuracy = confusion.accuracy()
+    precision, recall, f1 = confusion.precision_recall_f1(average='macro')
+    mrr, ndcg = ranking.mrr(), ranking.ndcg()
 
     return accuracy, precision, recall, f1, mrr, ndcg
 
@@ -449,145 +476,53 @@ test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 import torch.nn as nn
 import torch.nn.functional as F
 
-class TGNModel(nn.Module):
-    def __init__(self, in_channels, out_channels, memory_dim=8, time_dim=8):
-        super(TGNModel, self).__init__()
-        self.memory_dim = memory_dim
-        self.time_dim = time_dim
-
-        self.memory = torch.zeros(10000, memory_dim)  # dynamic size handled below
-
-        self.time_embedding = nn.Embedding(365, time_dim)
-        self.message_fn = nn.Linear(in_channels + memory_dim + time_dim, memory_dim)
-        self.memory_update_fn = nn.GRUCell(memory_dim, memory_dim)
-        self.fc = nn.Linear(memory_dim, out_channels)
-
-    def forward(self, x, edge_index, edge_time):
-        num_nodes = x.size(0)
-        if self.memory.size(0) < num_nodes:
-            # Expand memory if needed
-            new_memory = torch.zeros(num_nodes, self.memory_dim)
-            new_memory[:self.memory.size(0)] = self.memory
-            self.memory = new_memory
-
-        src, dst = edge_index
-        src_memory = self.memory[src]
-        dst_memory = self.memory[dst]
-        time_embeds = self.time_embedding((edge_time.long() % 365).view(-1, 1)).view(-1, self.time_dim)
-
-        messages = self.message_fn(torch.cat([x[src], src_memory, time_embeds], dim=1))
-        updated_memory = self.memory_update_fn(messages, dst_memory)
-        self.memory[dst] = updated_memory.detach()
-
-        out = self.fc(updated_memory)
-        return out
+from tgn import TGNModel, train_epoch
 
 # Step 7: Train and evaluate
 model = TGNModel(in_channels=train_data_pyg.num_node_features, out_channels=2)
 optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
 loss_fn = nn.CrossEntropyLoss()
 
-def train(model, loader, optimizer, loss_fn):
-    model.train()
-    total_loss = 0
-    for data in loader:
-        optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)
-        loss = loss_fn(out, data.y[data.edge_index[1]])
-        loss.backward(retain_graph=True)
-        optimizer.step()
-        total_loss += loss.item()
-    return total_loss / len(loader)
+# mode='truncated' takes one optimizer step per event batch, so activation memory stays bounded; Last.fm's
+# event stream is too long to backprop through in one graph, so the reported TGN numbers use it
+TRAINING_MODE = 'truncated'
+
+def train(model, loader, optimizer, loss_fn, mode=TRAINING_MODE):
+    return train_epoch(model, loader, optimizer, loss_fn, mode=mode)
 
 def evaluate(model, loader):
     model.eval()
-    correct, total = 0, 0
-    for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)
-        pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()
-        total += len(data.edge_index[1])
-    return correct / total
-
-for epoch in range(10):
-    loss = train(model, train_loader, optimizer, loss_fn)
+    with model.preserved_memory():  # Evaluation must not leak into the next training epoch
+        correct, total = 0, 0
+        for data in loader:
+            out = model(data.x, data.edge_index, data.edge_time)
+            pred = out.argmax(dim=1)
+            correct += (pred == data.y[data.edge_index[1]]).sum().item()
+            total += len(data.edge_index[1])
+        return correct / total
+
+# Checkpoints include the TGN memory buffer, so a resumed run continues from the same state
+from checkpoint import AsyncCheckpointer
+
+checkpointer = AsyncCheckpointer('/content/drive/MyDrive/checkpoints/tgn_last_fm')
+start_epoch = checkpointer.resume(model, optimizer)
+for epoch in range(start_epoch, 10):
+    loss = train(model, train_loader, optimizer, loss_fn, mode=TRAINING_MODE)
     acc = evaluate(model, test_loader)
-    print(f"Epoch {epoch+1}, Loss: {loss:.4f}, Accuracy: {acc:.4f}")
+    print(f"Epoch {epoch+1} ({TRAINING_MODE} backprop), Loss: {loss:.4f}, Accuracy: {acc:.4f}")
+    checkpointer.maybe_save(epoch, model, optimizer)
+checkpointer.close()
 
 # Step 9: Final Evaluation with Metrics
 import numpy as np
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
-def mrr_score(y_true, y_pred_probs):
-    # For MRR, we need the probability scores for positive class
-    y_true = np.array(y_true)
-    y_pred_probs = np.array(y_pred_probs)
-
-    # Get the rank of each positive example
-    ranks = []
-    for i in np.where(y_true == 1)[0]:
-        # Get the score of the positive example
-        score = y_pred_probs[i]
-        # Count how many examples have higher score than this positive example
-        rank = (y_pred_probs > score).sum() + 1
-        ranks.append(rank)
-
-    if len(ranks) == 0:
-        return 0.0
-    return np.mean(1.0 / np.array(ranks))
-
-def ndcg_score(y_true, y_pred_probs, k=10):
-    # Sort by predicted probabilities in descending order
-    order = np.argsort(y_pred_probs)[::-1]
-    y_true_sorted = np.array(y_true)[order[:k]]
-
-    # Calculate DCG
-    gains = 2 ** y_true_sorted - 1
-    discounts = np.log2(np.arange(2, k + 2))
-    dcg = np.sum(gains / discounts)
-
-    # Calculate IDCG
-    ideal_gains = 2 ** np.sort(y_true)[::-1][:k] - 1
-    idcg = np.sum(ideal_gains / discounts)
-
-    return dcg / idcg if idcg > 0 else 0.0
-
-# Step 9: Final Evaluation with Metrics
-import numpy as np
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-
-def mrr_score(y_true, y_pred_probs):
-    y_true = np.array(y_true)
-    y_pred_probs = np.array(y_pred_probs)
-
-    ranks = []
-    for i in np.where(y_true == 1)[0]:
-        score = y_pred_probs[i]
-        rank = (y_pred_probs > score).sum() + 1
-        ranks.append(rank)
-
-    if len(ranks) == 0:
-        return 0.0
-    return np.mean(1.0 / np.array(ranks))
-
-def ndcg_score(y_true, y_pred_probs, k=10):
-    order = np.argsort(y_pred_probs)[::-1]
-    y_true_sorted = np.array(y_true)[order[:k]]
-
-    gains = 2 ** y_true_sorted - 1
-    discounts = np.log2(np.arange(2, k + 2))
-    dcg = np.sum(gains / discounts)
-
-    ideal_gains = 2 ** np.sort(y_true)[::-1][:k] - 1
-    idcg = np.sum(ideal_gains / discounts)
-
-    return dcg / idcg if idcg > 0 else 0.0
+from streaming_metrics import ConfusionMatrix, GlobalRankAccumulator
 
 def evaluate_with_metrics(model, loader):
     model.eval()
-    all_preds = []
-    all_probs = []
-    all_labels = []
+    confusion = ConfusionMatrix(num_classes=2)
+    ranking = GlobalRankAccumulator(k=10)
 
     for data in loader:
         # Include edge_time in the forward pass
@@ -599,36 +534,40 @@ def evaluate_with_metrics(model, loader):
         dst_nodes = data.edge_index[1]
         dst_labels = data.y[dst_nodes]
 
-        all_preds.append(pred.detach().cpu().numpy())
-        all_probs.append(probs[:, 1].detach().cpu().numpy())  # Probability of positive class
-        all_labels.append(dst_labels.detach().cpu().numpy())
+        confusion.update(dst_labels, pred)
+        ranking.update(dst_labels, probs[:, 1])  # Probability of positive class
 
-    if len(all_preds) == 0:
+    if confusion.counts.sum() == 0:
         return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
 
-    all_preds = np.concatenate(all_preds)
-    all_probs = np.concatenate(all_probs)
-    all_labels = np.concatenate(all_labels)
-
     # Handle case where there are no positive examples
-    if len(np.unique(all_labels)) == 1:
-        precision = 0.0 if 1 not in all_labels else 1.0
-        recall = 0.0 if 1 not in all_labels else 1.0
-        f1 = 0.0 if 1 not in all_labels else 1.0
+    support = confusion.counts.sum(axis=1)
+    if (support > 0).sum() == 1:
+        precision = recall = f1 = 1.0 if support[1] > 0 else 0.0
     else:
-        precision = precision_score(all_labels, all_preds, average='macro', zero_division=0)
-        recall = recall_score(all_labels, all_preds, average='macro', zero_division=0)
-        f1 = f1_score(all_labels, all_preds, average='macro', zero_division=0)
+        precision, recall, f1 = confusion.precision_recall_f1(average='macro')
 
-    accuracy = accuracy_score(all_labels, all_preds)
-    mrr = mrr_score(all_labels, all_probs)
-    ndcg = ndcg_score(all_labels, all_probs)
+    accuracy = confusion.accuracy()
+    mrr, ndcg = ranking.mrr(), ranking.ndcg()
 
     return accuracy, precision, recall, f1, mrr, ndcg
 
 accuracy, precision, recall, f1, mrr, ndcg = evaluate_with_metrics(model, test_loader)
 print(f'NDCG: {ndcg:.4f}, Precision: {precision:.4f}, Recall: {recall:.4f}, F1: {f1:.4f}, MRR: {mrr:.4f}, Accuracy: {accuracy:.4f}')
 
+# Step 10: Replay the test events as an online stream
+from tgn_streaming import StreamingTGN
+
+# Events arrive in chunks of 32 and are applied as one micro-batch, tagged with their edge ids
+stream = StreamingTGN(model, test_data_pyg.x.clone(), max_batch_size=64)
+with model.preserved_memory():
+    src, dst = test_data_pyg.edge_index
+    for chunk in torch.argsort(test_data_pyg.edge_time).split(32):
+        for i in chunk.tolist():
+            stream.submit(int(src[i]), int(dst[i]), float(test_data_pyg.edge_time[i]), event_id=i)
+        stream.flush()
+    print('Per-event latency (ms):', stream.latency_percentiles())
+
 """# RNN + Last.**fm**"""
 
 # Step 1: Mount Google Drive
@@ -678,7 +617,8 @@ def convert_to_pyg_data(graph, num_features=8):
     nodes = list(graph.nodes())
     node_mapping = {node: i for i, node in enumerate(nodes)}
     edge_index = torch.tensor([[node_mapping[u], node_mapping[v]] for u, v in graph.edges], dtype=torch.long).t().contiguous()
-    edge_time = torch.tensor([graph[u][v]['timestamp'] for u, v in graph.edges], dtype=torch.float)
+    # float64: float32 epoch seconds only resolve to ~2 minutes, too coarse for the session gap
+    edge_time = torch.tensor([graph[u][v]['timestamp'] for u, v in graph.edges], dtype=torch.float64)
     x = torch.randn(len(nodes), num_features)
     y = torch.randint(0, 2, (len(nodes),))  # Placeholder binary labels
     return Data(x=x, edge_index=edge_index, edge_time=edge_time, y=y)
@@ -693,26 +633,13 @@ test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 import torch.nn as nn
 import torch.nn.functional as F
 
-class RNNModel(nn.Module):
-    def __init__(self, input_size, hidden_size, output_size):
-        super(RNNModel, self).__init__()
-        self.hidden_size = hidden_size
-        self.rnn = nn.RNN(input_size, hidden_size, batch_first=True)
-        self.fc = nn.Linear(hidden_size, output_size)
-
-    def forward(self, x, edge_index, edge_time):
-        sorted_indices = torch.argsort(edge_time)
-        sorted_edge_index = edge_index[:, sorted_indices]
-        src = sorted_edge_index[0]
-        sequences = x[src]
-        batch_size = sequences.size(0)
-        h0 = torch.zeros(1, batch_size, self.hidden_size)
-        out, _ = self.rnn(sequences.unsqueeze(1), h0)
-        out = self.fc(out.squeeze(1))
-        return out
+from rnn import RNNModel
 
 # Step 7: Train and Evaluate
-model = RNNModel(input_size=train_data_pyg.num_node_features, hidden_size=16, output_size=2)
+# Scrobbles more than 30 minutes apart start a new listening session; training cuts sessions into 8-track
+# windows, while evaluation (model.eval()) scores every test edge over whole sessions
+model = RNNModel(input_size=train_data_pyg.num_node_features, hidden_size=16, output_size=2, session_gap=30 * 60,
+                 window=8)
 optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
 loss_fn = nn.CrossEntropyLoss()
 
@@ -721,8 +648,8 @@ def train(model, loader, optimizer, loss_fn):
     total_loss = 0
     for data in loader:
         optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)
-        loss = loss_fn(out, data.y[data.edge_index[1]])
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)
+        loss = loss_fn(out, data.y[data.edge_index[1, edge_ids]])
         loss.backward()
         optimizer.step()
         total_loss += loss.item()
@@ -733,10 +660,10 @@ def evaluate(model, loader):
     correct = 0
     total = 0
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)
         pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()
-        total += len(data.edge_index[1])
+        correct += (pred == data.y[data.edge_index[1, edge_ids]]).sum().item()
+        total += len(edge_ids)
     return correct / total
 
 for epoch in range(10):
@@ -748,49 +675,23 @@ for epoch in range(10):
 import numpy as np
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
-def mrr_score(y_true, y_pred_probs):
-    y_true = np.array(y_true)
-    y_pred_probs = np.array(y_pred_probs)
-    ranks = []
-    for i in np.where(y_true == 1)[0]:
-        score = y_pred_probs[i]
-        rank = (y_pred_probs > score).sum() + 1
-        ranks.append(rank)
-    return np.mean(1.0 / np.array(ranks)) if ranks else 0.0
-
-def ndcg_score(y_true, y_pred_probs, k=10):
-    order = np.argsort(y_pred_probs)[::-1]
-    y_true_sorted = np.array(y_true)[order[:k]]
-    gains = 2 ** y_true_sorted - 1
-    discounts = np.log2(np.arange(2, k + 2))
-    dcg = np.sum(gains / discounts)
-    ideal_gains = 2 ** np.sort(y_true)[::-1][:k] - 1
-    idcg = np.sum(ideal_gains / discounts)
-    return dcg / idcg if idcg > 0 else 0.0
+from streaming_metrics import ConfusionMatrix, GlobalRankAccumulator
 
 def evaluate_with_metrics(model, loader):
     model.eval()
-    all_preds, all_probs, all_labels = [], [], []
+    confusion, ranking = ConfusionMatrix(num_classes=2), GlobalRankAccumulator(k=10)
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)
         probs = F.softmax(out, dim=1)
         pred = out.argmax(dim=1)
-        dst = data.edge_index[1]
+        dst = data.edge_index[1, edge_ids]
         labels = data.y[dst]
-        all_preds.append(pred.detach().cpu().numpy())
-        all_probs.append(probs[:, 1].detach().cpu().numpy())
-        all_labels.append(labels.detach().cpu().numpy())
+        confusion.update(labels, pred)
+        ranking.update(labels, probs[:, 1])
 
-    all_preds = np.concatenate(all_preds)
-    all_probs = np.concatenate(all_probs)
-    all_labels = np.concatenate(all_labels)
-
-    accuracy = accuracy_score(all_labels, all_preds)
-    precision = precision_score(all_labels, all_preds, average='macro', zero_division=0)
-    recall = recall_score(all_labels, all_preds, average='macro', zero_division=0)
-    f1 = f1_score(all_labels, all_preds, average='macro', zero_division=0)
-    mrr = mrr_score(all_labels, all_probs)
-    ndcg = ndcg_score(all_labels, all_probs)
+    accuracy = confusion.accuracy()
+    precision, recall, f1 = confusion.precision_recall_f1(average='macro')
+    mrr, ndcg = ranking.mrr(), ranking.ndcg()
 
     return accuracy, precision, recall, f1, mrr, ndcg
 
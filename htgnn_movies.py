@@ -839,11 +839,15 @@ for epoch in range(100):
     print(f'Epoch {epoch}, Accuracy: {accuracy}, Precision: {precision}, Recall: {recall}, F1-Score: {f1}, MRR: {mrr}, NDCG: {ndcg}')
 
 import matplotlib.pyplot as plt
+from results_store import ResultsStore
 
-# Data for the graph
+# Data for the graph: MovieLens NDCG (%) per resolution, averaged over the experiment matrix seeds
 temporal_resolutions = ['Years', 'Months', 'Hours', 'Minutes']
-htgnn_ndcg = [85.8, 90, 96, 76]
-tgn_ndcg = [76, 90, 79, 65]
+results_store = ResultsStore('/content/drive/MyDrive/results/experiments.sqlite')
+ndcg = results_store.table('granularity', 'model', 'ndcg', dataset='MovieLens', model=['HTGNN', 'TGN'])
+ndcg = ndcg.reindex(['Y', 'M', 'H', 'min']) * 100
+htgnn_ndcg = ndcg['HTGNN'].tolist()
+tgn_ndcg = ndcg['TGN'].tolist()
 
 # Create a bar chart
 x = range(len(temporal_resolutions))
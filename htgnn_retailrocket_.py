@@ -137,48 +137,23 @@ for epoch in range(10):
 import numpy as np
 from sklearn.metrics import precision_score, recall_score, f1_score, accuracy_score
 
-def mrr_score(y_true, y_pred):
-    y_true = np.asarray(y_true)
-    y_pred = np.asarray(y_pred)
-    order = np.argsort(y_pred)[::-1]
-    y_true_sorted = y_true[order]
-    ranks = np.where(y_true_sorted == 1)[0] + 1
-    return np.mean(1.0 / ranks) if ranks.size > 0 else 0.0
-
-def ndcg_score(y_true, y_pred, k=10):
-    y_true = np.asarray(y_true)
-    y_pred = np.asarray(y_pred)
-    order = np.argsort(y_pred)[::-1]
-    y_true_sorted = y_true[order[:k]]
-    gains = 2 ** y_true_sorted - 1
-    discounts = np.log2(np.arange(2, k + 2))
-    dcg = np.sum(gains / discounts)
-    ideal_sorted = np.sort(y_true)[::-1][:k]
-    idcg = np.sum((2 ** ideal_sorted - 1) / discounts)
-    return dcg / idcg if idcg > 0 else 0.0
+from streaming_metrics import ConfusionMatrix, GlobalRankAccumulator
 
+# Metrics are accumulated per batch, nothing is concatenated
 def evaluate_with_metrics(model, loader):
     model.eval()
-    all_preds, all_labels, all_probs = [], [], []
+    confusion, ranking = ConfusionMatrix(num_classes=2), GlobalRankAccumulator(k=10)
     for data in loader:
         data = data.to(device)
         out = model(data.x, data.edge_index, data.edge_time)
         pred = out.argmax(dim=1)
         prob = F.softmax(out, dim=1)[:, 1]  # Get probability for class 1
-        all_preds.append(pred.cpu().numpy())
-        all_labels.append(data.y.cpu().numpy())
-        all_probs.append(prob.detach().cpu().numpy())
+        confusion.update(data.y, pred)
+        ranking.update(data.y, prob)
 
-    all_preds = np.concatenate(all_preds)
-    all_labels = np.concatenate(all_labels)
-    all_probs = np.concatenate(all_probs)
-
-    accuracy = accuracy_score(all_labels, all_preds)
-    precision = precision_score(all_labels, all_preds, average='macro')
-    recall = recall_score(all_labels, all_preds, average='macro')
-    f1 = f1_score(all_labels, all_preds, average='macro')
-    mrr = mrr_score(all_labels, all_probs)
-    ndcg = ndcg_score(all_labels, all_probs)
+    accuracy = confusion.accuracy()
+    precision, recall, f1 = confusion.precision_recall_f1(average='macro')
+    mrr, ndcg = ranking.mrr(), ranking.ndcg()
 
     return accuracy, precision, recall, f1, mrr, ndcg
 
@@ -290,42 +265,22 @@ for epoch in range(10):
 import numpy as np
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
-def mrr_score(y_true, y_pred):
-    order = np.argsort(y_pred)[::-1]
-    ranks = np.where(y_true[order] == 1)[0] + 1
-    return np.mean(1.0 / ranks) if ranks.size > 0 else 0.0
-
-def ndcg_score(y_true, y_pred, k=10):
-    order = np.argsort(y_pred)[::-1]
-    y_true = np.take(y_true, order[:k])
-    gains = 2 ** y_true - 1
-    discounts = np.log2(np.arange(2, k + 2))
-    dcg = np.sum(gains / discounts)
-    ideal_gains = 2 ** np.sort(y_true)[::-1] - 1
-    idcg = np.sum(ideal_gains / discounts)
-    return dcg / idcg if idcg > 0 else 0.0
+from streaming_metrics import ConfusionMatrix, GlobalRankAccumulator
 
+# Metrics are accumulated per batch, nothing is concatenated
 def evaluate_with_metrics(model, loader):
     model.eval()
-    all_preds, all_probs, all_labels = [], [], []
+    confusion, ranking = ConfusionMatrix(num_classes=2), GlobalRankAccumulator(k=10)
     for data in loader:
         out = model(data.x, data.edge_index)
         probs = F.softmax(out, dim=1)
         pred = out.argmax(dim=1)
-        all_preds.append(pred.detach().cpu().numpy())
-        all_probs.append(probs[:, 1].detach().cpu().numpy())
-        all_labels.append(data.y.detach().cpu().numpy())
-
-    all_preds = np.concatenate(all_preds)
-    all_probs = np.concatenate(all_probs)
-    all_labels = np.concatenate(all_labels)
+        confusion.update(data.y, pred)
+        ranking.update(data.y, probs[:, 1])
 
-    accuracy = accuracy_score(all_labels, all_preds)
-    precision = precision_score(all_labels, all_preds, average='macro')
-    recall = recall_score(all_labels, all_preds, average='macro')
-    f1 = f1_score(all_labels, all_preds, average='macro')
-    mrr = mrr_score(all_labels, all_probs)
-    ndcg = ndcg_score(all_labels, all_probs)
+    accuracy = confusion.accuracy()
+    precision, recall, f1 = confusion.precision_recall_f1(average='macro')
+    mrr, ndcg = ranking.mrr(), ranking.ndcg()
 
     return accuracy, precision, recall, f1, mrr, ndcg
 
@@ -396,90 +351,53 @@ test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 # Define TGN model
 import torch.nn as nn
 
-class TGNModel(nn.Module):
-    def __init__(self, in_channels, out_channels, memory_dim=8, time_dim=8):
-        super(TGNModel, self).__init__()
-        self.memory_dim = memory_dim
-        self.time_dim = time_dim
-        self.memory = torch.zeros(10000, memory_dim)
-        self.time_embedding = nn.Embedding(365, time_dim)
-        self.message_fn = nn.Linear(in_channels + memory_dim + time_dim, memory_dim)
-        self.memory_update_fn = nn.GRUCell(memory_dim, memory_dim)
-        self.fc = nn.Linear(memory_dim, out_channels)
-
-    def forward(self, x, edge_index, edge_time):
-        num_nodes = x.size(0)
-        if self.memory.size(0) < num_nodes:
-            new_memory = torch.zeros(num_nodes, self.memory_dim)
-            new_memory[:self.memory.size(0)] = self.memory
-            self.memory = new_memory
-
-        src, dst = edge_index
-        src_memory = self.memory[src]
-        dst_memory = self.memory[dst]
-        time_embeds = self.time_embedding((edge_time.long() % 365).view(-1, 1)).view(-1, self.time_dim)
-        messages = self.message_fn(torch.cat([x[src], src_memory, time_embeds], dim=1))
-        updated_memory = self.memory_update_fn(messages, dst_memory)
-        self.memory[dst] = updated_memory.detach()
-        out = self.fc(updated_memory)
-        return out
+from tgn import TGNModel, train_epoch
 
 # Training setup
 model = TGNModel(in_channels=train_data_pyg.num_node_features, out_channels=2)
 optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
 loss_fn = nn.CrossEntropyLoss()
 
-# Training function
-def train(model, loader):
-    model.train()
-    total_loss = 0
-    for data in loader:
-        optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)
-        loss = loss_fn(out, data.y[data.edge_index[1]])
-        loss.backward(retain_graph=True)
-        optimizer.step()
-        total_loss += loss.item()
-    return total_loss / len(loader)
+# Training function (mode='truncated' takes one optimizer step per event batch, bounding activation memory).
+# The Retailrocket event log is too long to backprop through in one graph, so the reported TGN numbers use it
+TRAINING_MODE = 'truncated'
+
+def train(model, loader, mode=TRAINING_MODE):
+    return train_epoch(model, loader, optimizer, loss_fn, mode=mode)
 
 # Evaluation function
 def evaluate(model, loader):
     model.eval()
-    correct, total = 0, 0
-    for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)
-        pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()
-        total += len(data.edge_index[1])
-    return correct / total
-
-# Training loop
-for epoch in range(10):
-    loss = train(model, train_loader)
+    with model.preserved_memory():  # Evaluation must not leak into the next training epoch
+        correct, total = 0, 0
+        for data in loader:
+            out = model(data.x, data.edge_index, data.edge_time)
+            pred = out.argmax(dim=1)
+            correct += (pred == data.y[data.edge_index[1]]).sum().item()
+            total += len(data.edge_index[1])
+        return correct / total
+
+# Training loop (checkpoints include the TGN memory buffer)
+from checkpoint import AsyncCheckpointer
+
+checkpointer = AsyncCheckpointer('/content/drive/MyDrive/checkpoints/tgn_retailrocket')
+start_epoch = checkpointer.resume(model, optimizer)
+for epoch in range(start_epoch, 10):
+    loss = train(model, train_loader, mode=TRAINING_MODE)
     acc = evaluate(model, test_loader)
-    print(f"Epoch {epoch+1}, Loss: {loss:.4f}, Accuracy: {acc:.4f}")
+    print(f"Epoch {epoch+1} ({TRAINING_MODE} backprop), Loss: {loss:.4f}, Accuracy: {acc:.4f}")
+    checkpointer.maybe_save(epoch, model, optimizer)
+checkpointer.close()
 
 import numpy as np
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
-def mrr_score(y_true, y_pred):
-    order = np.argsort(y_pred)[::-1]
-    ranks = np.where(y_true[order] == 1)[0] + 1
-    return np.mean(1.0 / ranks) if ranks.size > 0 else 0.0
-
-def ndcg_score(y_true, y_pred, k=10):
-    order = np.argsort(y_pred)[::-1]
-    y_true = np.take(y_true, order[:k])
-    gains = 2 ** y_true - 1
-    discounts = np.log2(np.arange(2, k + 2))
-    dcg = np.sum(gains / discounts)
-    ideal_gains = 2 ** np.sort(y_true)[::-1] - 1
-    idcg = np.sum(ideal_gains / discounts)
-    return dcg / idcg if idcg > 0 else 0.0
+from streaming_metrics import ConfusionMatrix, GlobalRankAccumulator
 
 def evaluate_with_metrics(model, loader):
     model.eval()
-    all_preds, all_probs, all_labels = [], [], []
+    confusion = ConfusionMatrix(num_classes=2)
+    ranking = GlobalRankAccumulator(k=10)
 
     for data in loader:
         # Include edge_time in the forward pass
@@ -491,30 +409,21 @@ def evaluate_with_metrics(model, loader):
         dst_nodes = data.edge_index[1]
         dst_labels = data.y[dst_nodes]
 
-        all_preds.append(pred.detach().cpu().numpy())
-        all_probs.append(probs[:, 1].detach().cpu().numpy())  # Probability of positive class
-        all_labels.append(dst_labels.detach().cpu().numpy())
+        confusion.update(dst_labels, pred)
+        ranking.update(dst_labels, probs[:, 1])  # Probability of positive class
 
-    if len(all_preds) == 0:
+    if confusion.counts.sum() == 0:
         return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
 
-    all_preds = np.concatenate(all_preds)
-    all_probs = np.concatenate(all_probs)
-    all_labels = np.concatenate(all_labels)
-
     # Handle case where there are no positive examples
-    if len(np.unique(all_labels)) == 1:
-        precision = 0.0 if 1 not in all_labels else 1.0
-        recall = 0.0 if 1 not in all_labels else 1.0
-        f1 = 0.0 if 1 not in all_labels else 1.0
+    support = confusion.counts.sum(axis=1)
+    if (support > 0).sum() == 1:
+        precision = recall = f1 = 1.0 if support[1] > 0 else 0.0
     else:
-        precision = precision_score(all_labels, all_preds, average='macro', zero_division=0)
-        recall = recall_score(all_labels, all_preds, average='macro', zero_division=0)
-        f1 = f1_score(all_labels, all_preds, average='macro', zero_division=0)
+        precision, recall, f1 = confusion.precision_recall_f1(average='macro')
 
-    accuracy = accuracy_score(all_labels, all_preds)
-    mrr = mrr_score(all_labels, all_probs)
-    ndcg = ndcg_score(all_labels, all_probs)
+    accuracy = confusion.accuracy()
+    mrr, ndcg = ranking.mrr(), ranking.ndcg()
 
     return accuracy, precision, recall, f1, mrr, ndcg
 
@@ -582,23 +491,7 @@ train_loader = DataLoader([train_data_pyg], batch_size=1, shuffle=True)
 test_loader = DataLoader([test_data_pyg], batch_size=1, shuffle=False)
 
 # Step 5: Define RNN Model
-class RNNModel(nn.Module):
-    def __init__(self, input_size, hidden_size, output_size):
-        super(RNNModel, self).__init__()
-        self.hidden_size = hidden_size
-        self.rnn = nn.RNN(input_size, hidden_size, batch_first=True)
-        self.fc = nn.Linear(hidden_size, output_size)
-
-    def forward(self, x, edge_index, edge_time):
-        sorted_indices = torch.argsort(edge_time)
-        sorted_edge_index = edge_index[:, sorted_indices]
-        src = sorted_edge_index[0]
-        sequences = x[src]
-        batch_size = sequences.size(0)
-        h0 = torch.zeros(1, batch_size, self.hidden_size)
-        out, _ = self.rnn(sequences.unsqueeze(1), h0)
-        out = self.fc(out.squeeze(1))
-        return out
+from rnn import RNNModel
 
 # Step 6: Training & Evaluation Functions
 model = RNNModel(input_size=train_data_pyg.num_node_features, hidden_size=16, output_size=2)
@@ -610,8 +503,8 @@ def train(model, loader):
     total_loss = 0
     for data in loader:
         optimizer.zero_grad()
-        out = model(data.x, data.edge_index, data.edge_time)
-        loss = loss_fn(out, data.y[data.edge_index[1]])
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)
+        loss = loss_fn(out, data.y[data.edge_index[1, edge_ids]])
         loss.backward()
         optimizer.step()
         total_loss += loss.item()
@@ -622,10 +515,10 @@ def evaluate(model, loader):
     correct = 0
     total = 0
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)
         pred = out.argmax(dim=1)
-        correct += (pred == data.y[data.edge_index[1]]).sum().item()
-        total += len(data.edge_index[1])
+        correct += (pred == data.y[data.edge_index[1, edge_ids]]).sum().item()
+        total += len(edge_ids)
     return correct / total
 
 # Train Loop
@@ -635,43 +528,22 @@ for epoch in range(10):
     print(f"Epoch {epoch+1}, Loss: {loss:.4f}, Accuracy: {acc:.4f}")
 
 # Step 7: Metrics
-def mrr_score(y_true, y_pred_probs):
-    y_true = np.array(y_true)
-    y_pred_probs = np.array(y_pred_probs)
-    ranks = [(y_pred_probs > y_pred_probs[i]).sum() + 1 for i in np.where(y_true == 1)[0]]
-    return np.mean(1.0 / np.array(ranks)) if ranks else 0.0
-
-def ndcg_score(y_true, y_pred_probs, k=10):
-    order = np.argsort(y_pred_probs)[::-1]
-    y_true_sorted = np.array(y_true)[order[:k]]
-    gains = 2 ** y_true_sorted - 1
-    discounts = np.log2(np.arange(2, k + 2))
-    dcg = np.sum(gains / discounts)
-    ideal = 2 ** np.sort(y_true)[::-1][:k] - 1
-    idcg = np.sum(ideal / discounts)
-    return dcg / idcg if idcg > 0 else 0.0
+from streaming_metrics import ConfusionMatrix, GlobalRankAccumulator
 
 def evaluate_with_metrics(model, loader):
     model.eval()
-    all_preds, all_probs, all_labels = [], [], []
+    confusion, ranking = ConfusionMatrix(num_classes=2), GlobalRankAccumulator(k=10)
     for data in loader:
-        out = model(data.x, data.edge_index, data.edge_time)
+        out, edge_ids = model(data.x, data.edge_index, data.edge_time)
         probs = F.softmax(out, dim=1)
         pred = out.argmax(dim=1)
-        dst = data.edge_index[1]
+        dst = data.edge_index[1, edge_ids]
         labels = data.y[dst]
-        all_preds.append(pred.detach().cpu().numpy())
-        all_probs.append(probs[:, 1].detach().cpu().numpy())
-        all_labels.append(labels.detach().cpu().numpy())
-    all_preds = np.concatenate(all_preds)
-    all_probs = np.concatenate(all_probs)
-    all_labels = np.concatenate(all_labels)
-    accuracy = accuracy_score(all_labels, all_preds)
-    precision = precision_score(all_labels, all_preds, average='macro', zero_division=0)
-    recall = recall_score(all_labels, all_preds, average='macro', zero_division=0)
-    f1 = f1_score(all_labels, all_preds, average='macro', zero_division=0)
-    mrr = mrr_score(all_labels, all_probs)
-    ndcg = ndcg_score(all_labels, all_probs)
+        confusion.update(labels, pred)
+        ranking.update(labels, probs[:, 1])
+    accuracy = confusion.accuracy()
+    precision, recall, f1 = confusion.precision_recall_f1(average='macro')
+    mrr, ndcg = ranking.mrr(), ranking.ndcg()
     return accuracy, precision, recall, f1, mrr, ndcg
 
 accuracy, precision, recall, f1, mrr, ndcg = evaluate_with_metrics(model, test_loader)
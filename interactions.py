@@ -0,0 +1,132 @@
+"""CSR-style per-user interaction index."""
+
+import numpy as np
+
+
+def _sortable(ids):
+    # Object columns (e.g. Last.fm usernames) are sorted once into integer codes
+    ids = np.asarray(ids)
+    if ids.dtype != object:
+        return ids, None
+    vocab, codes = np.unique(ids, return_inverse=True)
+    return codes, vocab
+
+
+class InteractionIndex:
+    """Distinct (user, item) pairs grouped by user, built with a single lexsort.
+
+    `users` holds the sorted distinct user ids; the items of `users[i]` are
+    `items[indptr[i]:indptr[i + 1]]`, sorted and de-duplicated.
+    """
+
+    def __init__(self, user_ids, item_ids):
+        user_ids, user_vocab = _sortable(user_ids)
+        item_ids, item_vocab = _sortable(item_ids)
+        order = np.lexsort((item_ids, user_ids))
+        user_ids, item_ids = user_ids[order], item_ids[order]
+
+        # Drop repeated interactions with the same item
+        keep = np.ones(len(user_ids), dtype=bool)
+        keep[1:] = (user_ids[1:] != user_ids[:-1]) | (item_ids[1:] != item_ids[:-1])
+        user_ids, item_ids = user_ids[keep], item_ids[keep]
+
+        users, counts = np.unique(user_ids, return_counts=True)
+        self.users = users if user_vocab is None else user_vocab[users]
+        self.items = item_ids if item_vocab is None else item_vocab[item_ids]
+        self.indptr = np.zeros(len(self.users) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+
+    @classmethod
+    def from_frame(cls, df, user_col='user_id', item_col='item_id'):
+        return cls(df[user_col].to_numpy(), df[item_col].to_numpy())
+
+    @property
+    def num_users(self):
+        return len(self.users)
+
+    @property
+    def lengths(self):
+        return np.diff(self.indptr)
+
+    def __len__(self):
+        return len(self.items)
+
+    def positives(self, row):
+        """Items of the user at position `row` of `users`."""
+        return self.items[self.indptr[row]:self.indptr[row + 1]]
+
+    def __iter__(self):
+        for row, user in enumerate(self.users):
+            yield user, self.positives(row)
+
+    def rows_for(self, user_ids):
+        """Row of each user id in this index, or -1 where the user has no interactions."""
+        user_ids = np.asarray(user_ids)
+        if len(self.users) == 0:
+            return np.full(len(user_ids), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.users, user_ids), len(self.users) - 1)
+        return np.where(self.users[rows] == user_ids, rows, -1)
+
+    def expand(self, user_ids):
+        """Flatten the interactions of `user_ids` into (position in user_ids, item) pairs."""
+        rows = self.rows_for(user_ids)
+        if len(self.users) == 0:
+            return np.zeros(0, dtype=np.int64), self.items[:0]
+        counts = np.where(rows >= 0, self.lengths[np.maximum(rows, 0)], 0)
+        owner = np.repeat(np.arange(len(rows)), counts)
+        first = np.cumsum(counts) - counts
+        flat = self.indptr[np.maximum(rows, 0)][owner] + np.arange(counts.sum()) - first[owner]
+        return owner, self.items[flat]
+
+
+def sample_negatives(index, catalog, num_negatives, user_ids=None, rng=None, max_rounds=50):
+    """Draw `num_negatives` items per user uniformly from `catalog`, excluding the user's items in `index`.
+
+    All users are sampled at once: candidates are drawn as catalog positions, checked against
+    every user's sorted interactions with one binary search over (user, item) keys, and only
+    the collisions and repeats within a row are redrawn. Returns an array of shape
+    [len(user_ids), num_negatives] whose rows hold distinct items. Users with fewer than
+    `num_negatives` unseen items, or who have seen almost the whole catalog, may keep
+    collisions or repeats after `max_rounds`.
+    """
+    rng = np.random.default_rng(rng)
+    catalog = np.unique(catalog)
+    num_items = len(catalog)
+    rows = np.arange(index.num_users) if user_ids is None else index.rows_for(user_ids)
+
+    # Seen items as catalog positions; sorted per user, so the (row, position) keys are globally sorted
+    codes = np.searchsorted(catalog, index.items)
+    codes = np.minimum(codes, num_items - 1)
+    in_catalog = catalog[codes] == index.items
+    owners = np.repeat(np.arange(index.num_users), index.lengths)
+    seen_keys = (owners * num_items + codes)[in_catalog]
+
+    def collisions(row, draw):
+        if len(seen_keys) == 0:
+            return np.zeros(draw.shape, dtype=bool)
+        keys = row * num_items + draw
+        pos = np.minimum(np.searchsorted(seen_keys, keys), len(seen_keys) - 1)
+        return (row >= 0) & (seen_keys[pos] == keys)
+
+    def repeats(draw):
+        # Every occurrence of an item after its first in the row (stable sort keeps the earliest)
+        order = np.argsort(draw, axis=1, kind='stable')
+        ranked = np.take_along_axis(draw, order, axis=1)
+        repeated = np.zeros(draw.shape, dtype=bool)
+        repeated[:, 1:] = ranked[:, 1:] == ranked[:, :-1]
+        mask = np.empty_like(repeated)
+        np.put_along_axis(mask, order, repeated, axis=1)
+        return mask
+
+    row_grid = np.repeat(rows[:, None], num_negatives, axis=1)
+    draws = rng.integers(0, num_items, size=row_grid.shape)
+    bad = collisions(row_grid, draws) | repeats(draws)
+    for _ in range(max_rounds):
+        if not bad.any():
+            break
+        draws[bad] = rng.integers(0, num_items, size=int(bad.sum()))
+        # Redrawn rows are re-checked for repeats as a whole; a new draw may match a kept one
+        redrawn = bad.any(axis=1)
+        bad[bad] = collisions(row_grid[bad], draws[bad])
+        bad[redrawn] |= repeats(draws[redrawn])
+    return catalog[draws]
@@ -0,0 +1,106 @@
+"""Per-user ranking metrics sharded across a process pool over shared-memory buffers."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from interactions import _sortable
+from rank_metrics import RankedScores
+from resources import limit_threads
+
+_BUFFERS = None
+
+
+def _init_worker(specs):
+    # Metric shards are pure NumPy; one thread per process avoids oversubscribing the cores
+    limit_threads(1)
+
+    # Attach once per worker; the arrays are views of the parent's segments, nothing is copied
+    global _BUFFERS
+    _BUFFERS = {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _BUFFERS[name] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+
+def _shard_metrics(start, stop, k):
+    labels, scores, groups = (_BUFFERS[name][1][start:stop] for name in ('labels', 'scores', 'groups'))
+    return _metrics(labels, scores, groups, k)
+
+
+def _metrics(labels, scores, groups, k):
+    ranked = RankedScores(labels, scores, groups=groups)
+    return ranked.mrr(return_per_group=True), ranked.ndcg(k, return_per_group=True), ranked.num_positives
+
+
+def _shards(group_start, num_rows, num_shards):
+    """Row ranges of roughly equal size that never split a group."""
+    targets = np.linspace(0, num_rows, num_shards + 1)[1:-1]
+    cuts = group_start[np.minimum(np.searchsorted(group_start, targets), len(group_start) - 1)]
+    bounds = np.unique(np.concatenate([[0], cuts, [num_rows]]))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _share(arrays):
+    segments, specs = [], {}
+    for name, array in arrays.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        segments.append(shm)
+        specs[name] = (shm.name, array.shape, array.dtype)
+    return segments, specs
+
+
+def parallel_rank_metrics(y_true, y_score, groups, k=10, max_workers=None, shards_per_worker=4,
+                          mp_context=None, return_per_user=False, min_rows_per_worker=1 << 18):
+    """MRR and NDCG@k per group (user), computed by a process pool.
+
+    Rows are sorted by group once in the parent and copied into shared memory; each worker
+    attaches to the same buffers and runs the vectorized `RankedScores` over a contiguous
+    shard of whole groups, so no scores are pickled. Inputs too small to give every worker
+    `min_rows_per_worker` rows use fewer workers, down to running inline. Pass `max_workers=1`
+    when calling from inside another pool's worker. Overall values average the groups that
+    have at least one positive. Per-user arrays follow the sorted distinct group ids.
+    """
+    y_true = np.asarray(y_true)
+    y_score = np.asarray(y_score, dtype=np.float64)
+    codes, vocab = _sortable(groups)
+    order = np.argsort(codes, kind='stable')
+    codes = np.ascontiguousarray(codes[order])
+    labels = np.ascontiguousarray(y_true[order] > 0)
+    scores = np.ascontiguousarray(y_score[order])
+
+    new_group = np.ones(len(codes), dtype=bool)
+    new_group[1:] = codes[1:] != codes[:-1]
+    group_start = np.flatnonzero(new_group)
+    user_ids = codes[group_start] if vocab is None else vocab[codes[group_start]]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    # Starting a pool costs more than ranking a few hundred thousand rows inline
+    max_workers = max(1, min(max_workers, len(codes) // max(min_rows_per_worker, 1)))
+    shards = _shards(group_start, len(codes), max_workers * shards_per_worker) if len(codes) else []
+
+    if max_workers == 1 or len(shards) <= 1:
+        parts = [_metrics(labels, scores, codes, k)]
+    else:
+        segments, specs = _share({'labels': labels, 'scores': scores, 'groups': codes})
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                                     initializer=_init_worker, initargs=(specs,)) as pool:
+                parts = list(pool.map(_shard_metrics, *zip(*shards), [k] * len(shards)))
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+    mrr, ndcg, num_positives = (np.concatenate(values) for values in zip(*parts))
+    has_positive = num_positives > 0
+    per_user = {'user_id': user_ids, 'MRR': mrr, f'NDCG@{k}': ndcg}
+    results = {name: float(values[has_positive].mean()) if has_positive.any() else 0.0
+               for name, values in per_user.items() if name != 'user_id'}
+    if return_per_user:
+        return results, per_user
+    return results
@@ -0,0 +1,78 @@
+"""MRR and NDCG from a single sort of the scores, over the whole set or per user."""
+
+import numpy as np
+
+from interactions import _sortable
+
+
+class RankedScores:
+    """Scores sorted once in descending order, optionally within groups (e.g. users).
+
+    The sort is stable, so tied scores keep their input order. `ranks` are competition
+    ranks: 1 + the number of examples in the same group with a strictly higher score, so
+    ties never push a positive down. Relevance is binary (`y_true > 0`), as in the
+    evaluation cells, which lets NDCG's ideal ordering come from the positive counts
+    instead of a second sort.
+    """
+
+    def __init__(self, y_true, y_score, groups=None):
+        y_true = np.asarray(y_true)
+        y_score = np.asarray(y_score, dtype=np.float64)
+        n = len(y_score)
+
+        if groups is None:
+            self.order = np.argsort(-y_score, kind='stable')
+            keys = np.zeros(n, dtype=np.int64)
+        else:
+            codes, vocab = _sortable(groups)
+            self.order = np.lexsort((-y_score, codes))
+            keys = codes[self.order]
+        self.scores = y_score[self.order]
+        self.relevant = y_true[self.order] > 0
+
+        positions = np.arange(n)
+        new_group = np.ones(n, dtype=bool)
+        new_group[1:] = keys[1:] != keys[:-1]
+        self.group_start = np.flatnonzero(new_group)
+        self.group_ids = np.cumsum(new_group) - 1
+        self.groups = None if groups is None else (keys if vocab is None else vocab[keys])[self.group_start]
+        self.position = positions - self.group_start[self.group_ids]
+
+        # A tie run starts wherever the group or the score changes; every member gets the run's first rank
+        new_run = new_group.copy()
+        new_run[1:] |= self.scores[1:] != self.scores[:-1]
+        run_start = np.maximum.accumulate(np.where(new_run, positions, 0))
+        self.ranks = run_start - self.group_start[self.group_ids] + 1
+
+    @property
+    def num_groups(self):
+        return len(self.group_start)
+
+    @property
+    def num_positives(self):
+        return np.bincount(self.group_ids[self.relevant], minlength=self.num_groups)
+
+    def _reduce(self, per_group, num_positives, return_per_group):
+        if return_per_group:
+            return per_group
+        has_positive = num_positives > 0
+        return float(per_group[has_positive].mean()) if has_positive.any() else 0.0
+
+    def mrr(self, return_per_group=False):
+        """Mean reciprocal rank of the positives; averaged over groups that have any positive."""
+        num_positives = self.num_positives
+        rr = np.bincount(self.group_ids[self.relevant], weights=1.0 / self.ranks[self.relevant],
+                         minlength=self.num_groups)
+        per_group = np.divide(rr, num_positives, out=np.zeros(self.num_groups), where=num_positives > 0)
+        return self._reduce(per_group, num_positives, return_per_group)
+
+    def ndcg(self, k=10, return_per_group=False):
+        num_positives = self.num_positives
+        top = self.position < k
+        discounts = 1.0 / np.log2(self.position[top] + 2)
+        dcg = np.bincount(self.group_ids[top], weights=self.relevant[top] * discounts, minlength=self.num_groups)
+
+        ideal = np.cumsum(1.0 / np.log2(np.arange(2, k + 2)))
+        idcg = ideal[np.clip(num_positives, 1, k) - 1]
+        per_group = np.where(num_positives > 0, dcg / idcg, 0.0)
+        return self._reduce(per_group, num_positives, return_per_group)
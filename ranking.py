@@ -0,0 +1,82 @@
+"""Full-catalog ranking evaluation with chunked top-K."""
+
+import torch
+
+
+def dot_scores(user_emb, item_emb):
+    return user_emb @ item_emb.t()
+
+
+def _discounts(k, device):
+    return 1.0 / torch.log2(torch.arange(2, k + 2, dtype=torch.float, device=device))
+
+
+def topk_metrics(hits, num_positives):
+    """Per-user Recall/NDCG/MRR/HitRate from a [B, k] hit matrix in rank order."""
+    k = hits.size(1)
+    hits = hits.float()
+    discounts = _discounts(k, hits.device)
+    ideal = torch.cumsum(discounts, 0)
+    num_positives = num_positives.float()
+
+    dcg = (hits * discounts).sum(dim=1)
+    idcg = ideal[(num_positives.clamp(min=1, max=k) - 1).long()]
+    reciprocal_rank = (hits / torch.arange(1, k + 1, dtype=torch.float, device=hits.device)).max(dim=1).values
+    return {
+        f'Recall@{k}': hits.sum(dim=1) / num_positives.clamp(min=1),
+        f'NDCG@{k}': dcg / idcg,
+        f'MRR@{k}': reciprocal_rank,
+        f'HitRate@{k}': hits.max(dim=1).values,
+    }
+
+
+@torch.no_grad()
+def full_ranking_evaluation(user_emb, item_emb, test_index, k=10, train_index=None, score_fn=dot_scores,
+                            user_chunk=1024, item_chunk=65536, return_per_user=False):
+    """Score every test user against the whole catalog and compute top-K metrics in one pass.
+
+    `test_index` (and the optional `train_index`, whose items are excluded from the ranking)
+    are InteractionIndex objects whose user ids are rows of `user_emb` and whose item ids
+    are rows of `item_emb`. Scores are produced `user_chunk x item_chunk` at a time and folded
+    into a running `torch.topk`, so peak memory does not depend on the catalog size.
+    """
+    device = user_emb.device
+    num_items = item_emb.size(0)
+    per_user = {}
+
+    for start in range(0, test_index.num_users, user_chunk):
+        users = test_index.users[start:start + user_chunk]
+        queries = user_emb[torch.as_tensor(users, dtype=torch.long, device=device)]
+        top_scores = torch.full((len(users), k), float('-inf'), device=device)
+        top_items = torch.full((len(users), k), -1, dtype=torch.long, device=device)
+
+        if train_index is not None:
+            seen_rows, seen_items = (torch.as_tensor(a, dtype=torch.long, device=device)
+                                     for a in train_index.expand(users))
+
+        for item_start in range(0, num_items, item_chunk):
+            item_stop = min(item_start + item_chunk, num_items)
+            scores = score_fn(queries, item_emb[item_start:item_stop]).float()
+            if train_index is not None:
+                in_chunk = (seen_items >= item_start) & (seen_items < item_stop)
+                scores[seen_rows[in_chunk], seen_items[in_chunk] - item_start] = float('-inf')
+
+            item_ids = torch.arange(item_start, item_stop, device=device).expand(len(users), -1)
+            top_scores, idx = torch.topk(torch.cat([top_scores, scores], dim=1), k, dim=1)
+            top_items = torch.gather(torch.cat([top_items, item_ids], dim=1), 1, idx)
+
+        # A recommended item is a hit if (user row, item) is one of the test positives
+        pos_rows, pos_items = (torch.as_tensor(a, dtype=torch.long, device=device) for a in test_index.expand(users))
+        pos_keys = pos_rows * num_items + pos_items
+        top_keys = torch.arange(len(users), device=device).unsqueeze(1) * num_items + top_items
+        hits = torch.isin(top_keys, pos_keys) & (top_items >= 0)
+
+        num_positives = torch.as_tensor(test_index.lengths[start:start + user_chunk], device=device)
+        for name, values in topk_metrics(hits, num_positives).items():
+            per_user.setdefault(name, []).append(values.cpu())
+
+    per_user = {name: torch.cat(values).numpy() for name, values in per_user.items()}
+    results = {name: float(values.mean()) if len(values) else 0.0 for name, values in per_user.items()}
+    if return_per_user:
+        return results, per_user
+    return results
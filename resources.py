@@ -0,0 +1,70 @@
+"""Process resource helpers shared by the benchmark, sweep and metric pools: RSS sampling and thread caps."""
+
+import os
+import resource
+import sys
+import threading
+
+_STATM = '/proc/self/statm'
+_PAGE_MB = os.sysconf('SC_PAGE_SIZE') / (1 << 20) if hasattr(os, 'sysconf') else None
+
+
+def limit_threads(num_threads):
+    """Cap the BLAS/OpenMP and torch thread pools of the current (worker) process.
+
+    Forked workers inherit native libraries that already read OMP_NUM_THREADS and friends, so
+    the pools are resized through threadpoolctl. Without it the variables are still set, which
+    only takes effect in spawned workers and in processes the worker starts itself.
+    """
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(num_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=num_threads)
+    except ImportError:
+        pass
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+def max_rss_mb():
+    """High-water mark of this process's RSS, from getrusage (KiB on Linux, bytes on macOS)."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1 << 20) if sys.platform == 'darwin' else max_rss / 1024
+
+
+def rss_mb():
+    """Current RSS of this process in MiB.
+
+    Read from /proc/self/statm; where there is no /proc (e.g. macOS) this falls back to the
+    getrusage high-water mark, so readings never decrease and only growth above the previous
+    peak shows up.
+    """
+    try:
+        with open(_STATM) as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except OSError:
+        return max_rss_mb()
+
+
+class RssSampler(threading.Thread):
+    """Polls the process RSS in the background and keeps the maximum seen while running."""
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_mb()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, rss_mb())
+        return self.peak
@@ -0,0 +1,128 @@
+"""SQLite store of experiment runs: config, metrics, timings, peak memory and per-user metric arrays."""
+
+import io
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# Config fields promoted to real columns so plots and reports can filter on them in SQL
+_INDEXED = ('dataset', 'model', 'granularity', 'seed')
+_FILTERABLE = ('key',) + _INDEXED + ('code_version',)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT,
+    created REAL NOT NULL,
+    dataset TEXT,
+    model TEXT,
+    granularity TEXT,
+    seed INTEGER,
+    config TEXT NOT NULL,
+    metrics TEXT NOT NULL,
+    wall_time_s REAL,
+    peak_rss_mb REAL,
+    job_rss_mb REAL,
+    code_version TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (key);
+CREATE INDEX IF NOT EXISTS runs_cell ON runs (dataset, model, granularity);
+CREATE TABLE IF NOT EXISTS run_arrays (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+'''
+
+
+class ResultsStore:
+    """Every run is appended, never overwritten, so metrics and throughput can be compared over time."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        # Stores created before job_rss_mb had its own column
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(runs)')}
+        if 'job_rss_mb' not in columns:
+            with self.conn:
+                self.conn.execute('ALTER TABLE runs ADD COLUMN job_rss_mb REAL')
+
+    def record(self, config, metrics, key=None, wall_time_s=None, peak_rss_mb=None, job_rss_mb=None,
+               code_version=None, arrays=None):
+        """Append one run; `arrays` maps names to NumPy arrays (e.g. per-user metrics) kept next to it.
+
+        Timings and memory go in their own columns, never into `metrics`.
+        """
+        columns = [config.get(name) for name in _INDEXED]
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO runs (key, created, dataset, model, granularity, seed, config, metrics, '
+                'wall_time_s, peak_rss_mb, job_rss_mb, code_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [key, time.time(), *columns, json.dumps(config, default=str), json.dumps(metrics, default=str),
+                 wall_time_s, peak_rss_mb, job_rss_mb, code_version])
+            for name, array in (arrays or {}).items():
+                buffer = io.BytesIO()
+                np.save(buffer, np.asarray(array), allow_pickle=False)
+                self.conn.execute('INSERT INTO run_arrays (run_id, name, data) VALUES (?, ?, ?)',
+                                  (cursor.lastrowid, name, buffer.getvalue()))
+        return cursor.lastrowid
+
+    def arrays(self, run_id):
+        """The arrays recorded with run `run_id` (the `id` column of `runs()`), by name."""
+        rows = self.conn.execute('SELECT name, data FROM run_arrays WHERE run_id = ?', (int(run_id),)).fetchall()
+        return {name: np.load(io.BytesIO(data), allow_pickle=False) for name, data in rows}
+
+    def __contains__(self, key):
+        return self.conn.execute('SELECT 1 FROM runs WHERE key = ? LIMIT 1', (key,)).fetchone() is not None
+
+    def get(self, key):
+        """Latest run with this key as a flat dict (config, metrics, timings), or None."""
+        runs = self.runs(key=key)
+        return None if runs.empty else runs.iloc[-1].dropna().to_dict()
+
+    def runs(self, latest=False, **filters):
+        """All runs as a DataFrame with one column per config field and metric.
+
+        Filters match columns of the table (key, dataset, model, granularity, seed, code_version);
+        a list value matches any of its items. With `latest`, only the newest run per key is kept.
+        """
+        clauses, params = [], []
+        for name, value in filters.items():
+            if name not in _FILTERABLE:
+                raise ValueError(f'cannot filter runs on {name!r}; use one of {_FILTERABLE}')
+            values = value if isinstance(value, (list, tuple)) else [value]
+            clauses.append(f'{name} IN ({", ".join("?" * len(values))})')
+            params.extend(values)
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        rows = self.conn.execute(
+            f'SELECT id, key, created, config, metrics, wall_time_s, peak_rss_mb, job_rss_mb, code_version '
+            f'FROM runs{where} ORDER BY id', params).fetchall()
+
+        records = []
+        for run_id, key, created, config, metrics, wall_time_s, peak_rss_mb, job_rss_mb, code_version in rows:
+            record = {'id': run_id, 'key': key, 'created': pd.to_datetime(created, unit='s')}
+            record.update(json.loads(config))
+            record.update(json.loads(metrics))
+            record.update(wall_time_s=wall_time_s, peak_rss_mb=peak_rss_mb, job_rss_mb=job_rss_mb,
+                          code_version=code_version)
+            records.append(record)
+        frame = pd.DataFrame(records)
+        if latest and not frame.empty:
+            keyed = frame['key'].notna()
+            frame = pd.concat([frame[~keyed], frame[keyed].drop_duplicates('key', keep='last')]).sort_values('id')
+        return frame
+
+    def table(self, index, columns, values, aggfunc='mean', **filters):
+        """Pivot of the latest run per key, e.g. table('dataset', 'model', 'test_acc') averaged over seeds."""
+        return self.runs(latest=True, **filters).pivot_table(index=index, columns=columns, values=values,
+                                                             aggfunc=aggfunc)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,72 @@
+"""RNN baseline over real per-user interaction histories."""
+
+import torch
+import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
+
+from sequences import build_user_sequences, length_buckets, padded_edge_ids, session_windows, split_sessions
+
+
+class RNNModel(nn.Module):
+    """Runs the RNN over each user's time-ordered interactions as packed variable-length sequences.
+
+    Users are bucketed by history length so a batch is padded to at most its own longest
+    sequence. `forward` returns one prediction per step together with the id of the edge it
+    belongs to; with `max_len` only each user's last `max_len` edges are kept. With
+    `session_gap` (same unit as edge_time) each session is its own sequence instead. With
+    `window`, training cuts sequences into fixed-length windows (`window_stride` apart, by
+    default not overlapping) that run without padding or packing; steps outside any window,
+    such as sessions shorter than `window`, are not trained on. In eval mode every edge runs
+    through the packed path, so all edges get a prediction.
+    Timestamps should be int64 or float64: float32 epoch seconds only resolve to ~2 minutes.
+    """
+
+    def __init__(self, input_size, hidden_size, output_size, max_len=None, batch_size=256, session_gap=None,
+                 window=None, window_stride=None):
+        super(RNNModel, self).__init__()
+        self.hidden_size = hidden_size
+        self.max_len = max_len
+        self.batch_size = batch_size
+        self.session_gap = session_gap
+        self.window = window
+        self.window_stride = window_stride or window
+        self.rnn = nn.RNN(input_size, hidden_size, batch_first=True)
+        self.fc = nn.Linear(hidden_size, output_size)
+
+    def forward(self, x, edge_index, edge_time):
+        keys = edge_index[0]
+        if self.session_gap is not None:
+            keys = split_sessions(keys, edge_time, self.session_gap)
+        sequences = build_user_sequences(keys, edge_time, self.max_len)
+        if self.window is not None and self.training:
+            return self._forward_windows(x, edge_index, sequences)
+
+        outputs, edge_ids = [], []
+        for user_idx in length_buckets(sequences.lengths, self.batch_size):
+            batch_edges, mask = padded_edge_ids(sequences, user_idx)
+
+            # Each step's input is the item the user interacted with at that point in time
+            inputs = x[edge_index[1, batch_edges]]
+            lengths = sequences.lengths[user_idx].cpu()
+            packed = pack_padded_sequence(inputs, lengths, batch_first=True, enforce_sorted=True)
+            out, _ = self.rnn(packed)
+            out, _ = pad_packed_sequence(out, batch_first=True, total_length=mask.size(1))
+
+            outputs.append(out[mask])
+            edge_ids.append(batch_edges[mask])
+
+        if not outputs:
+            return x.new_empty(0, self.fc.out_features), edge_index.new_empty(0)
+        return self.fc(torch.cat(outputs)), torch.cat(edge_ids)
+
+    def _forward_windows(self, x, edge_index, sequences):
+        # Every window has the same length, so a batch is one dense [B, window] tensor
+        windows, _ = session_windows(sequences, self.window, self.window_stride)
+        outputs = []
+        for start in range(0, windows.size(0), self.batch_size):
+            out, _ = self.rnn(x[edge_index[1, windows[start:start + self.batch_size]]])
+            outputs.append(out.reshape(-1, self.hidden_size))
+
+        if not outputs:
+            return x.new_empty(0, self.fc.out_features), edge_index.new_empty(0)
+        return self.fc(torch.cat(outputs)), windows.reshape(-1)
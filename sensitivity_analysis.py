@@ -28,11 +28,12 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torch_geometric.data import Data
 from torch_geometric.nn import GCNConv
+from torch_geometric.nn.conv.gcn_conv import gcn_norm
 from torch_scatter import scatter_add
 from sklearn.model_selection import train_test_split
-import networkx as nx
-from sklearn.metrics import ndcg_score
-from collections import defaultdict
+from interactions import InteractionIndex, sample_negatives
+from parallel_metrics import parallel_rank_metrics
+from edge_store import TemporalGraph, build_edge_store
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -61,124 +62,85 @@ def load_lastfm_data(path):
 csv_path = '/content/lastfm_data/Last.fm_data.csv'
 df = load_lastfm_data(csv_path)
 
-# --- Temporal Graph Construction ---
-def create_temporal_graph(data, time_granularity='D'):
-    """Create graph with temporal edges"""
-    data = data.copy()
-    data['time_group'] = data['timestamp'].dt.floor(time_granularity)
-    G = nx.DiGraph()
-
-    # Add nodes
-    for node in set(data['user_id']).union(set(data['item_id'])):
-        G.add_node(node)
-
-    # Add temporal edges
-    for _, row in data.iterrows():
-        G.add_edge(row['user_id'], row['item_id'],
-                  timestamp=row['timestamp'].timestamp(),
-                  time_group=row['time_group'])
-    return G
-
-# --- PyG Data Conversion ---
-def graph_to_pyg_data(graph, num_features=32):
-    nodes = list(graph.nodes())
-    node_map = {n:i for i,n in enumerate(nodes)}
-
-    # Edge features
-    edge_index = []
-    edge_time = []
-    for u,v,data in graph.edges(data=True):
-        edge_index.append([node_map[u], node_map[v]])
-        edge_time.append(data['timestamp'])
-
-    # Node features
-    x = torch.randn(len(nodes), num_features)
-
-    return Data(
-        x=x,
-        edge_index=torch.tensor(edge_index).t().contiguous(),
-        edge_time=torch.tensor(edge_time, dtype=torch.float)
-    )
-
 # --- HTGNN Model ---
 class HTGNN(nn.Module):
     def __init__(self, in_dim, out_dim, time_dim=16, mem_dim=32):
         super().__init__()
         self.time_emb = nn.Embedding(365, time_dim)
-        self.conv1 = GCNConv(in_dim + time_dim, mem_dim)
-        self.conv2 = GCNConv(mem_dim, out_dim)
+        self.conv1 = GCNConv(in_dim + time_dim, mem_dim, normalize=False)
+        self.conv2 = GCNConv(mem_dim, out_dim, normalize=False)
 
     def forward(self, data):
         # Time embeddings
         time_embeds = self.time_emb((data.edge_time % 365).long())
 
+        # GCN normalization: shared by every granularity view of a TemporalGraph, else computed once here
+        if 'norm_edge_weight' in data:
+            norm_edge_index, norm_edge_weight = data.norm_edge_index, data.norm_edge_weight
+        else:
+            norm_edge_index, norm_edge_weight = gcn_norm(data.edge_index, num_nodes=data.num_nodes)
+
         # Message passing with time
-        x = torch.cat([data.x, scatter_add(time_embeds, data.edge_index[0])], dim=1)
-        x = F.relu(self.conv1(x, data.edge_index))
-        return self.conv2(x, data.edge_index)
+        x = torch.cat([data.x, scatter_add(time_embeds, data.edge_index[0], dim=0, dim_size=data.x.size(0))], dim=1)
+        x = F.relu(self.conv1(x, norm_edge_index, norm_edge_weight))
+        return self.conv2(x, norm_edge_index, norm_edge_weight)
 
 # --- Evaluation Metrics ---
-def calculate_ndcg(model, graph, test_interactions, k=10):
+def calculate_ndcg(model, users, items, test_interactions, k=10, num_negatives=100, max_workers=None):
     model.eval()
-    user_items = defaultdict(set)
-    item_users = defaultdict(set)
-
-    # Build interaction dictionaries
-    for u,v in graph.edges():
-        user_items[u].add(v)
-        item_users[v].add(u)
 
-    ndcgs = []
-    for user in test_interactions['user_id'].unique():
-        # Get test items for user
-        pos_items = set(test_interactions[test_interactions['user_id']==user]['item_id'])
+    # Seen items per user (from the graph's edges), and every item in the graph as the candidate catalog
+    seen_index = InteractionIndex(users, items)
 
-        # Sample negatives (items user hasn't interacted with)
-        neg_items = set(graph.nodes()) - user_items[user]
-        neg_samples = list(neg_items)[:min(100, len(neg_items))]
+    # Group test positives per user once (CSR) instead of masking the frame for every user
+    test_index = InteractionIndex.from_frame(test_interactions)
 
-        # Create test pairs
-        test_pairs = [(user,item) for item in list(pos_items)+neg_samples]
-        labels = [1 if item in pos_items else 0 for _,item in test_pairs]
+    # Sample negatives (items user hasn't interacted with) for all test users at once
+    negatives = sample_negatives(seen_index, items, num_negatives, user_ids=test_index.users)
 
-        # Get predictions (simplified - replace with real model predictions)
-        preds = np.random.rand(len(test_pairs))
+    # Create test pairs for every user as flat arrays: positives first, then the sampled negatives
+    rows = np.arange(test_index.num_users)
+    test_users = np.concatenate([np.repeat(rows, test_index.lengths), np.repeat(rows, num_negatives)])
+    test_items = np.concatenate([test_index.items, negatives.ravel()])
+    labels = np.concatenate([np.ones(len(test_index)), np.zeros(negatives.size)])
 
-        ndcgs.append(ndcg_score([labels], [preds], k=k))
+    # Get predictions (simplified - replace with real model predictions)
+    preds = np.random.rand(len(test_items))
 
-    return np.mean(ndcgs)
+    # Users are sharded across processes; each worker scores its shard in one vectorized pass
+    return parallel_rank_metrics(labels, preds, test_users, k=k, max_workers=max_workers)[f'NDCG@{k}']
 
 # --- Temporal Sensitivity Analysis ---
-def temporal_sensitivity_analysis(data, granularities=['D','h','min']):
+def temporal_sensitivity_analysis(data, granularities=['D','h','min'], store_path='/content/lastfm_store'):
     results = []
 
+    # Build the edge store, graph structure, degrees and normalization once for all granularities
+    graph = TemporalGraph(build_edge_store(data, store_path))
+
     for gran in granularities:
         print(f"\nAnalyzing granularity: {gran}")
 
-        # Create temporal graph
-        graph = create_temporal_graph(data, gran)
+        # Temporal graph view: only the time buckets are recomputed
+        view = graph.view(gran)
 
         # Temporal train-test split (80% early, 20% late)
-        time_groups = sorted({data['time_group'] for _,_,data in graph.edges(data=True)})
-        split_idx = int(0.8 * len(time_groups))
-        train_edges = [(u,v) for u,v,d in graph.edges(data=True) if d['time_group'] <= time_groups[split_idx]]
-        test_edges = [(u,v) for u,v,d in graph.edges(data=True) if d['time_group'] > time_groups[split_idx]]
+        train_mask = view.split(0.8)
 
         # Convert to PyG data
-        train_data = graph_to_pyg_data(graph)
+        train_data = view.to_pyg_data(num_features=32)
 
         # Train model (placeholder - replace with actual training)
         model = HTGNN(train_data.num_features, 16)
 
         # Evaluate
-        test_df = pd.DataFrame(test_edges, columns=['user_id','item_id'])
-        ndcg = calculate_ndcg(model, graph, test_df)
+        test_df = pd.DataFrame({'user_id': graph.src[~train_mask], 'item_id': graph.dst[~train_mask]})
+        ndcg = calculate_ndcg(model, graph.src, graph.dst, test_df)
 
         results.append({
             'Granularity': gran,
             'NDCG@10': ndcg,
-            'Train_Edges': len(train_edges),
-            'Test_Edges': len(test_edges)
+            'Train_Edges': int(train_mask.sum()),
+            'Test_Edges': int((~train_mask).sum())
         })
 
     return pd.DataFrame(results)
@@ -190,6 +152,35 @@ if __name__ == "__main__":
     print("\nTemporal Sensitivity Results:")
     print(results[['Granularity', 'NDCG@10', 'Train_Edges', 'Test_Edges']])
 
+"""# **parametre** sweep Last.fm"""
+
+from edge_store import build_edge_store, bucket_times, temporal_split, to_pyg_data
+from sweep import run_sweep, expand_grid
+
+# Preprocess once; every sweep job memory-maps the same arrays instead of rebuilding the graph
+store_path = '/content/lastfm_store'
+build_edge_store(df, store_path)
+
+def granularity_job(store, granularity, time_dim=16, mem_dim=32, seed=0):
+    torch.manual_seed(seed)
+    time_groups = bucket_times(store.ts, granularity)
+    train_mask = temporal_split(time_groups)
+
+    train_data = to_pyg_data(store, mask=train_mask, num_features=32)
+    model = HTGNN(train_data.num_features, 16, time_dim=time_dim, mem_dim=mem_dim)
+
+    test_df = pd.DataFrame({'user_id': store.src[~train_mask], 'item_id': store.dst[~train_mask]})
+    # Already inside a sweep worker: rank inline rather than nesting another pool
+    ndcg = calculate_ndcg(model, store.src, store.dst, test_df, max_workers=1)
+
+    return {'NDCG@10': ndcg, 'Train_Edges': int(train_mask.sum()), 'Test_Edges': int((~train_mask).sum())}
+
+if __name__ == "__main__":
+    configs = expand_grid(granularity=['D', 'h', 'min'], time_dim=[8, 16], mem_dim=[32, 64])
+    sweep_results = run_sweep(store_path, configs, granularity_job, threads_per_job=2)
+    print("\nSweep Results:")
+    print(sweep_results)
+
 """# **parametre** MovieLens"""
 
 # ------------------- Imports -------------------
@@ -200,11 +191,12 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torch_geometric.data import Data
 from torch_geometric.nn import GCNConv
+from torch_geometric.nn.conv.gcn_conv import gcn_norm
 from torch_scatter import scatter_add
 from sklearn.model_selection import train_test_split
-import networkx as nx
-from sklearn.metrics import ndcg_score
-from collections import defaultdict
+from interactions import InteractionIndex, sample_negatives
+from parallel_metrics import parallel_rank_metrics
+from edge_store import TemporalGraph, build_edge_store
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -227,85 +219,54 @@ def load_movielens_data(path):
 csv_path = '/content/drive/MyDrive/movielens/ratings_small.csv'
 df = load_movielens_data(csv_path)
 
-# ------------------- Temporal Graph Construction -------------------
-def create_temporal_graph(data, time_granularity='D'):
-    data = data.copy()
-    data['time_group'] = data['timestamp'].dt.floor(time_granularity)
-    G = nx.DiGraph()
-    for node in set(data['user_id']).union(set(data['item_id'])):
-        G.add_node(node)
-    for _, row in data.iterrows():
-        G.add_edge(row['user_id'], row['item_id'],
-                   timestamp=row['timestamp'].timestamp(),
-                   time_group=row['time_group'])
-    return G
-
-# ------------------- PyG Data Conversion -------------------
-def graph_to_pyg_data(graph, num_features=32):
-    nodes = list(graph.nodes())
-    node_map = {n: i for i, n in enumerate(nodes)}
-    edge_index = []
-    edge_time = []
-    for u, v, data in graph.edges(data=True):
-        edge_index.append([node_map[u], node_map[v]])
-        edge_time.append(data['timestamp'])
-    x = torch.randn(len(nodes), num_features)
-    return Data(
-        x=x,
-        edge_index=torch.tensor(edge_index).t().contiguous(),
-        edge_time=torch.tensor(edge_time, dtype=torch.float)
-    )
-
 # ------------------- HTGNN Model -------------------
 class HTGNN(nn.Module):
     def __init__(self, in_dim, out_dim, time_dim=16, mem_dim=32):
         super().__init__()
         self.time_emb = nn.Embedding(365, time_dim)
-        self.conv1 = GCNConv(in_dim + time_dim, mem_dim)
-        self.conv2 = GCNConv(mem_dim, out_dim)
+        self.conv1 = GCNConv(in_dim + time_dim, mem_dim, normalize=False)
+        self.conv2 = GCNConv(mem_dim, out_dim, normalize=False)
 
     def forward(self, data):
         time_embeds = self.time_emb((data.edge_time % 365).long())
+        if 'norm_edge_weight' in data:  # Shared by every granularity view of a TemporalGraph
+            norm_edge_index, norm_edge_weight = data.norm_edge_index, data.norm_edge_weight
+        else:
+            norm_edge_index, norm_edge_weight = gcn_norm(data.edge_index, num_nodes=data.num_nodes)
         x = torch.cat([data.x, scatter_add(time_embeds, data.edge_index[0], dim=0, dim_size=data.x.size(0))], dim=1)
-        x = F.relu(self.conv1(x, data.edge_index))
-        return self.conv2(x, data.edge_index)
+        x = F.relu(self.conv1(x, norm_edge_index, norm_edge_weight))
+        return self.conv2(x, norm_edge_index, norm_edge_weight)
 
 # ------------------- Evaluation Metrics -------------------
-def calculate_ndcg(model, graph, test_interactions, k=10):
+def calculate_ndcg(model, users, items, test_interactions, k=10, num_negatives=100, max_workers=None):
     model.eval()
-    user_items = defaultdict(set)
-    for u, v in graph.edges():
-        user_items[u].add(v)
-    ndcgs = []
-    for user in test_interactions['user_id'].unique():
-        pos_items = set(test_interactions[test_interactions['user_id'] == user]['item_id'])
-        neg_items = set(graph.nodes()) - user_items[user]
-        neg_samples = list(neg_items)[:min(100, len(neg_items))]
-        test_pairs = [(user, item) for item in list(pos_items) + neg_samples]
-        labels = [1 if item in pos_items else 0 for _, item in test_pairs]
-        preds = np.random.rand(len(test_pairs))  # Placeholder
-        ndcgs.append(ndcg_score([labels], [preds], k=k))
-    return np.mean(ndcgs)
+    seen_index = InteractionIndex(users, items)
+    test_index = InteractionIndex.from_frame(test_interactions)
+    negatives = sample_negatives(seen_index, items, num_negatives, user_ids=test_index.users)
+    rows = np.arange(test_index.num_users)
+    test_users = np.concatenate([np.repeat(rows, test_index.lengths), np.repeat(rows, num_negatives)])
+    test_items = np.concatenate([test_index.items, negatives.ravel()])
+    labels = np.concatenate([np.ones(len(test_index)), np.zeros(negatives.size)])
+    preds = np.random.rand(len(test_items))  # Placeholder
+    return parallel_rank_metrics(labels, preds, test_users, k=k, max_workers=max_workers)[f'NDCG@{k}']
 
 # ------------------- Temporal Sensitivity Analysis -------------------
-def temporal_sensitivity_analysis(data, granularities=['D', 'h', 'min']):
+def temporal_sensitivity_analysis(data, granularities=['D', 'h', 'min'], store_path='/content/movielens_store'):
     results = []
+    graph = TemporalGraph(build_edge_store(data, store_path))  # Structure, degrees and normalization built once
     for gran in granularities:
         print(f"\nAnalyzing granularity: {gran}")
-        graph = create_temporal_graph(data, gran)
-        time_groups = sorted({d['time_group'] for _, _, d in graph.edges(data=True)})
-        split_idx = int(0.8 * len(time_groups))
-        train_edges = [(u, v) for u, v, d in graph.edges(data=True) if d['time_group'] <= time_groups[split_idx]]
-        test_edges = [(u, v) for u, v, d in graph.edges(data=True) if d['time_group'] > time_groups[split_idx]]
-        train_data = graph_to_pyg_data(graph)
+        view = graph.view(gran)
+        train_mask = view.split(0.8)
+        train_data = view.to_pyg_data(num_features=32)
         model = HTGNN(train_data.num_features, 16)
-        test_df = pd.DataFrame(test_edges, columns=['user_id', 'item_id'])
-        ndcg = calculate_ndcg(model, graph, test_df)
+        test_df = pd.DataFrame({'user_id': graph.src[~train_mask], 'item_id': graph.dst[~train_mask]})
+        ndcg = calculate_ndcg(model, graph.src, graph.dst, test_df)
         results.append({
             'Granularity': gran,
             'NDCG@10': ndcg,
-            'Train_Edges': len(train_edges),
-            'Test_Edges': len(test_edges)
+            'Train_Edges': int(train_mask.sum()),
+            'Test_Edges': int((~train_mask).sum())
         })
     return pd.DataFrame(results)
 
@@ -0,0 +1,80 @@
+"""Per-user interaction sequences for the sequential baselines."""
+
+from collections import namedtuple
+
+import torch
+
+# edge_ids: edges grouped by user and time-ordered within each user
+# users/lengths/offsets: one entry per user, offsets index into edge_ids
+UserSequences = namedtuple('UserSequences', ['edge_ids', 'users', 'lengths', 'offsets'])
+
+
+def build_user_sequences(users, edge_time, max_len=None):
+    """Group edges per user in time order with one pair of stable sorts, keeping the last `max_len`.
+
+    `users` can be any per-edge group key, e.g. the session ids from `split_sessions`.
+    """
+    order = torch.argsort(edge_time, stable=True)
+    order = order[torch.argsort(users[order], stable=True)]
+    unique_users, counts = torch.unique_consecutive(users[order], return_counts=True)
+
+    if max_len is not None:
+        starts = torch.repeat_interleave(torch.cumsum(counts, 0) - counts, counts)
+        rank = torch.arange(order.numel(), device=order.device) - starts
+        keep = rank >= torch.repeat_interleave(counts - max_len, counts)
+        order = order[keep]
+        counts = counts.clamp(max=max_len)
+
+    offsets = torch.cumsum(counts, 0) - counts
+    return UserSequences(order, unique_users, counts, offsets)
+
+
+def length_buckets(lengths, batch_size):
+    """Yield user index batches of similar length (longest first), to keep padding small."""
+    by_length = torch.argsort(lengths, descending=True, stable=True)
+    for start in range(0, by_length.numel(), batch_size):
+        yield by_length[start:start + batch_size]
+
+
+def padded_edge_ids(sequences, user_idx):
+    """[B, L] edge ids for a batch of users plus the mask of real (non-padding) steps."""
+    lengths = sequences.lengths[user_idx]
+    steps = torch.arange(int(lengths.max()), device=lengths.device)
+    mask = steps.unsqueeze(0) < lengths.unsqueeze(1)
+    positions = sequences.offsets[user_idx].unsqueeze(1) + steps.unsqueeze(0)
+    positions = torch.where(mask, positions, torch.zeros_like(positions))
+    return sequences.edge_ids[positions], mask
+
+
+def split_sessions(users, edge_time, max_gap):
+    """Per-edge session ids: a user's session ends wherever the gap to the next event exceeds `max_gap`."""
+    order = torch.argsort(edge_time, stable=True)
+    order = order[torch.argsort(users[order], stable=True)]
+    sorted_users, sorted_time = users[order], edge_time[order]
+
+    new_session = torch.ones(order.numel(), dtype=torch.bool, device=order.device)
+    new_session[1:] = (sorted_users[1:] != sorted_users[:-1]) | (sorted_time[1:] - sorted_time[:-1] > max_gap)
+    session_ids = torch.empty_like(order)
+    session_ids[order] = torch.cumsum(new_session.long(), 0) - 1
+    return session_ids
+
+
+def session_windows(sequences, window, stride=1):
+    """Fixed-length windows of edge ids that never cross a sequence (session) boundary.
+
+    All windows are rows of one strided view over the flat `edge_ids` array; only the
+    selected rows are materialized. Returns ([W, window] edge ids, [W] owning sequence index).
+    """
+    edge_ids = sequences.edge_ids
+    empty = edge_ids.new_empty(0, window), edge_ids.new_empty(0)
+    if edge_ids.numel() < window:
+        return empty
+
+    per_sequence = torch.div(sequences.lengths - window, stride, rounding_mode='floor').add(1).clamp(min=0)
+    total = int(per_sequence.sum())
+    if total == 0:
+        return empty
+    owner = torch.repeat_interleave(torch.arange(per_sequence.numel(), device=edge_ids.device), per_sequence)
+    first = torch.cumsum(per_sequence, 0) - per_sequence
+    starts = sequences.offsets[owner] + (torch.arange(total, device=edge_ids.device) - first[owner]) * stride
+    return edge_ids.unfold(0, window, 1)[starts], owner
@@ -0,0 +1,71 @@
+"""Paired bootstrap confidence intervals and permutation tests over per-user metric arrays."""
+
+import numpy as np
+
+# Resamples are generated in blocks so a block's [resamples, users] matrix stays around this many entries
+_BLOCK_ENTRIES = 1 << 22
+
+
+def _paired(a, b):
+    a = np.asarray(a, dtype=np.float64).ravel()
+    b = np.asarray(b, dtype=np.float64).ravel()
+    if a.shape != b.shape:
+        raise ValueError(f'paired arrays differ in length: {len(a)} vs {len(b)}')
+    return a - b
+
+
+def _blocks(num_resamples, n):
+    size = max(1, _BLOCK_ENTRIES // max(n, 1))
+    for start in range(0, num_resamples, size):
+        yield min(size, num_resamples - start)
+
+
+def paired_bootstrap(a, b, num_resamples=10000, confidence=0.95, rng=None):
+    """Percentile CI for mean(a) - mean(b), resampling users with replacement.
+
+    `a` and `b` hold one metric value per user for two models, aligned by user. Every block
+    of resamples is a single [block, users] fancy-index and row mean.
+    """
+    rng = np.random.default_rng(rng)
+    diff = _paired(a, b)
+    n = len(diff)
+    means = np.concatenate([diff[rng.integers(0, n, size=(block, n))].mean(axis=1)
+                            for block in _blocks(num_resamples, n)])
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return {'diff': float(diff.mean()), 'ci_low': float(low), 'ci_high': float(high),
+            'std_err': float(means.std(ddof=1))}
+
+
+def permutation_test(a, b, num_permutations=10000, alternative='two-sided', rng=None):
+    """Paired permutation (sign-flip) test of mean(a) - mean(b) == 0.
+
+    Under the null each user's two values are exchangeable, so a permutation flips the sign
+    of that user's difference; each block of permutations is one [block, users] @ [users] matmul.
+    """
+    rng = np.random.default_rng(rng)
+    diff = _paired(a, b)
+    n = len(diff)
+    observed = diff.mean()
+    null = np.concatenate([(rng.integers(0, 2, size=(block, n), dtype=np.int8) * 2 - 1).astype(np.float64) @ diff / n
+                           for block in _blocks(num_permutations, n)])
+
+    if alternative == 'two-sided':
+        extreme = np.abs(null) >= abs(observed)
+    elif alternative == 'greater':
+        extreme = null >= observed
+    elif alternative == 'less':
+        extreme = null <= observed
+    else:
+        raise ValueError(f'unknown alternative: {alternative}')
+    # The observed assignment counts as one of the permutations, so p is never exactly 0
+    return float((extreme.sum() + 1) / (num_permutations + 1))
+
+
+def compare_models(a, b, num_resamples=10000, confidence=0.95, rng=None):
+    """Mean of each model, bootstrap CI of the paired difference and the permutation p-value."""
+    rng = np.random.default_rng(rng)
+    result = {'mean_a': float(np.mean(a)), 'mean_b': float(np.mean(b)), 'num_users': len(np.ravel(a))}
+    result.update(paired_bootstrap(a, b, num_resamples, confidence, rng=rng))
+    result['p_value'] = permutation_test(a, b, num_resamples, rng=rng)
+    return result
@@ -0,0 +1,95 @@
+"""Metric accumulators updated batch by batch, without keeping every prediction and label."""
+
+import numpy as np
+
+
+def _numpy(values):
+    if hasattr(values, 'detach'):
+        values = values.detach().cpu().numpy()
+    return np.asarray(values)
+
+
+class ConfusionMatrix:
+    """Running [true, predicted] counts; accuracy and precision/recall/F1 as sklearn computes them."""
+
+    def __init__(self, num_classes=2):
+        self.num_classes = num_classes
+        self.counts = np.zeros((num_classes, num_classes), dtype=np.int64)
+
+    def update(self, y_true, y_pred):
+        y_true, y_pred = _numpy(y_true).ravel(), _numpy(y_pred).ravel()
+        flat = np.bincount(y_true * self.num_classes + y_pred, minlength=self.num_classes ** 2)
+        self.counts += flat.reshape(self.num_classes, self.num_classes)
+
+    def accuracy(self):
+        total = self.counts.sum()
+        return float(np.trace(self.counts) / total) if total else 0.0
+
+    def precision_recall_f1(self, average='macro'):
+        """Per-class values with zero_division=0; 'macro' averages the classes seen in labels or predictions."""
+        true_positive = np.diag(self.counts).astype(np.float64)
+        predicted = self.counts.sum(axis=0)
+        support = self.counts.sum(axis=1)
+        precision = np.divide(true_positive, predicted, out=np.zeros(self.num_classes), where=predicted > 0)
+        recall = np.divide(true_positive, support, out=np.zeros(self.num_classes), where=support > 0)
+        denominator = precision + recall
+        f1 = np.divide(2 * precision * recall, denominator, out=np.zeros(self.num_classes), where=denominator > 0)
+        if average is None:
+            return precision, recall, f1
+        if average != 'macro':
+            raise ValueError(f'unsupported average: {average}')
+        present = (predicted + support) > 0
+        if not present.any():
+            return 0.0, 0.0, 0.0
+        return float(precision[present].mean()), float(recall[present].mean()), float(f1[present].mean())
+
+
+class GlobalRankAccumulator:
+    """MRR and NDCG@k of one ranking over every scored example, updated batch by batch.
+
+    NDCG@k only keeps the running top-k (score, label) pairs and the positive count, with ties
+    going to the earlier example as in `RankedScores`. MRR is exact too: a positive's rank is
+    1 + the number of examples with a strictly higher score, counted with one binary search
+    over all scores, so this is the one part whose memory grows with the test set (a float64
+    per example plus the positives' scores; no labels or sorts are kept per batch).
+    """
+
+    def __init__(self, k=10):
+        self.k = k
+        self.scores = []
+        self.positive_scores = []
+        self.top_scores = np.zeros(0)
+        self.top_labels = np.zeros(0, dtype=bool)
+
+    @property
+    def num_positives(self):
+        return sum(len(scores) for scores in self.positive_scores)
+
+    def update(self, y_true, y_score):
+        relevant = _numpy(y_true).ravel() > 0
+        scores = _numpy(y_score).astype(np.float64).ravel()
+        self.scores.append(scores)
+        self.positive_scores.append(scores[relevant])
+
+        # Earlier examples come first, so a stable sort keeps them ahead of later ties
+        scores = np.concatenate([self.top_scores, scores])
+        labels = np.concatenate([self.top_labels, relevant])
+        keep = np.argsort(-scores, kind='stable')[:self.k]
+        self.top_scores, self.top_labels = scores[keep], labels[keep]
+
+    def mrr(self):
+        if self.num_positives == 0:
+            return 0.0
+        scores = np.sort(np.concatenate(self.scores))
+        positives = np.concatenate(self.positive_scores)
+        higher = len(scores) - np.searchsorted(scores, positives, side='right')
+        return float(np.mean(1.0 / (higher + 1)))
+
+    def ndcg(self):
+        num_positives = self.num_positives
+        if num_positives == 0:
+            return 0.0
+        discounts = 1.0 / np.log2(np.arange(2, self.k + 2))
+        dcg = (self.top_labels * discounts[:len(self.top_labels)]).sum()
+        return float(dcg / discounts[:min(num_positives, self.k)].sum())
+
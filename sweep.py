@@ -0,0 +1,80 @@
+"""Process-pool sweep runner over hyperparameter / granularity configurations."""
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from resources import RssSampler, limit_threads, rss_mb
+from edge_store import load_edge_store
+
+_STORE = None
+_STORES = {}
+
+
+def _init_worker(store_path, threads_per_job):
+    # Pin the thread budget before the job spins up any intra-op pool
+    limit_threads(threads_per_job)
+
+    # One memory-mapped store per worker; the pages themselves are shared through the OS cache
+    global _STORE
+    if store_path is not None:
+        _STORE = load_edge_store(store_path)
+
+
+def _worker_store(store_path):
+    # Workers serving several datasets open each store on first use and keep it
+    if store_path not in _STORES:
+        _STORES[store_path] = load_edge_store(store_path)
+    return _STORES[store_path]
+
+
+def _run_job(job_fn, config, store_path=None):
+    start = time.perf_counter()
+    store = _STORE if store_path is None else _worker_store(store_path)
+    # Workers are reused, so the process high-water mark would carry over earlier jobs; sample this one
+    start_rss = rss_mb()
+    sampler = RssSampler()
+    sampler.start()
+    try:
+        result = job_fn(store, **config)
+    finally:
+        peak_rss = sampler.stop()
+    row = dict(config)
+    row.update(result)
+    row['wall_time_s'] = time.perf_counter() - start
+    row['pid'] = os.getpid()
+    row['peak_rss_mb'] = peak_rss
+    row['job_rss_mb'] = max(peak_rss - start_rss, 0.0)
+    return row
+
+
+def expand_grid(**params):
+    """Cartesian product of parameter lists, e.g. expand_grid(granularity=['D', 'h'], lr=[0.01])."""
+    keys = list(params)
+    return [dict(zip(keys, values)) for values in itertools.product(*(params[k] for k in keys))]
+
+
+def run_sweep(store_path, configs, job_fn, max_workers=None, threads_per_job=1, mp_context=None):
+    """Run `job_fn(store, **config)` for every config in a process pool.
+
+    `job_fn` must be picklable (a module- or notebook-level function) and return a dict of
+    metrics. Each row of the returned DataFrame is one config merged with its metrics.
+    """
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 1) // threads_per_job)
+
+    rows = [None] * len(configs)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                             initializer=_init_worker, initargs=(store_path, threads_per_job)) as pool:
+        futures = {pool.submit(_run_job, job_fn, config): i for i, config in enumerate(configs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                rows[i] = future.result()
+            except Exception as exc:
+                # A failing config should not take the rest of the sweep down with it
+                rows[i] = dict(configs[i], error=repr(exc))
+    return pd.DataFrame(rows)
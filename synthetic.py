@@ -0,0 +1,191 @@
+"""Synthetic user-item-timestamp event logs at benchmark scale, written in the real datasets' schemas."""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from edge_store import EdgeStore
+
+# Column layouts the notebook loaders read, as in the Kaggle CSVs
+SCHEMAS = {
+    'houses': ('user_id', 'item_id', 'create_timestamp'),
+    'movielens': ('userId', 'movieId', 'rating', 'timestamp'),
+    'amazon': ('UserId', 'ProductId', 'Rating', 'Timestamp'),
+    'lastfm': ('Username', 'Artist', 'Track', 'Album', 'Date', 'Time'),
+    'retailrocket': ('timestamp', 'visitorid', 'event', 'itemid', 'transactionid'),
+}
+
+
+def _zipf_cdf(n, exponent):
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def _hourly_rates(start, num_hours, diurnal_amplitude, peak_hour, weekend_boost):
+    """Start of every hour in the span and its relative event rate."""
+    hours = np.datetime64(start, 'h') + np.arange(num_hours)
+    hour_of_day = hours.astype(np.int64) % 24
+    # 1970-01-01 was a Thursday, so with Monday = 0 day 0 is weekday 3
+    weekday = (hours.astype('datetime64[D]').astype(np.int64) + 3) % 7
+    rates = 1 + diurnal_amplitude * np.cos(2 * np.pi * (hour_of_day - peak_hour) / 24)
+    rates *= np.where(weekday >= 5, 1 + weekend_boost, 1.0)
+    return hours, rates
+
+
+def _apply_repeats(users, items, repeat, last_item):
+    """Replace the items of repeat events with the user's most recent new item.
+
+    Events are in time order. A user's new items are the anchors; a repeat copies the last
+    anchor before it, or the item carried over from earlier chunks in `last_item` (updated in
+    place). A repeat with nothing to repeat keeps its fresh popularity draw.
+    """
+    n = len(users)
+    # Stable, so each user's events stay in time order
+    order = np.argsort(users, kind='stable')
+    sorted_users, sorted_items = users[order], items[order]
+    positions = np.arange(n)
+
+    new_user = np.ones(n, dtype=bool)
+    new_user[1:] = sorted_users[1:] != sorted_users[:-1]
+    carried = last_item[sorted_users]
+    fresh = ~repeat[order] | (new_user & (carried < 0))
+
+    group_start = np.maximum.accumulate(np.where(new_user, positions, 0))
+    anchor = np.maximum.accumulate(np.where(fresh, positions, -1))
+    repeated = np.where(anchor >= group_start, sorted_items[np.maximum(anchor, 0)], carried)
+    sorted_items = np.where(fresh, sorted_items, repeated)
+
+    last_of_user = np.ones(n, dtype=bool)
+    last_of_user[:-1] = new_user[1:]
+    last_item[sorted_users[last_of_user]] = sorted_items[last_of_user]
+
+    result = np.empty_like(items)
+    result[order] = sorted_items
+    return result
+
+
+def generate_interactions(num_edges, num_users=100_000, num_items=50_000, user_exponent=1.0, item_exponent=1.0,
+                          repeat_rate=0.3, start='2020-01-01', days=365, diurnal_amplitude=0.6, peak_hour=20,
+                          weekend_boost=0.3, chunk_size=1 << 24, seed=0):
+    """Yield time-ordered DataFrame chunks of (user_id, item_id, timestamp) events.
+
+    User activity and item popularity follow power laws (Zipf with the given exponents), over
+    shuffled ids. Event times follow an hourly rate with a daily cosine peaking at `peak_hour`
+    and `weekend_boost` extra traffic on Saturdays and Sundays. A `repeat_rate` fraction of
+    events re-consume the user's most recent new item. Chunks hold whole hours, about
+    `chunk_size` events each, so 500M-edge logs are produced in bounded memory.
+    """
+    if not 0 <= diurnal_amplitude < 1:
+        raise ValueError(f'diurnal_amplitude must be in [0, 1), got {diurnal_amplitude}')
+    if not 0 <= repeat_rate < 1:
+        raise ValueError(f'repeat_rate must be in [0, 1), got {repeat_rate}')
+    rng = np.random.default_rng(seed)
+    user_cdf = _zipf_cdf(num_users, user_exponent)
+    item_cdf = _zipf_cdf(num_items, item_exponent)
+    # Popularity rank -> id, so the most active users and popular items are spread over the id range
+    user_ids = rng.permutation(num_users)
+    item_ids = rng.permutation(num_items)
+
+    hours, rates = _hourly_rates(start, days * 24, diurnal_amplitude, peak_hour, weekend_boost)
+    counts = rng.multinomial(num_edges, rates / rates.sum())
+    ends = np.cumsum(counts)
+    hour_starts = hours.astype('datetime64[s]').astype(np.int64)
+    last_item = np.full(num_users, -1, dtype=np.int64)
+
+    first = 0
+    while first < len(counts):
+        done = ends[first - 1] if first else 0
+        last = max(int(np.searchsorted(ends, done + chunk_size, side='right')), first + 1)
+        n = int(ends[last - 1] - done)
+        if n:
+            ts = np.repeat(hour_starts[first:last], counts[first:last]) + rng.integers(0, 3600, n)
+            ts.sort()
+            users = user_ids[np.searchsorted(user_cdf, rng.random(n), side='right')]
+            items = item_ids[np.searchsorted(item_cdf, rng.random(n), side='right')]
+            items = _apply_repeats(users, items, rng.random(n) < repeat_rate, last_item)
+            yield pd.DataFrame({'user_id': users, 'item_id': items, 'timestamp': ts.astype('datetime64[s]')})
+        first = last
+
+
+def _format_chunk(schema, chunk, rng, next_transaction):
+    """Rename and reformat a generated chunk to `schema`; returns it and the next transaction id."""
+    users, items = chunk['user_id'].values, chunk['item_id'].values
+    ts = chunk['timestamp'].values.astype('datetime64[s]')
+    n = len(chunk)
+
+    if schema == 'houses':
+        columns = [users, items, np.datetime_as_string(ts, unit='s')]
+    elif schema == 'movielens':
+        columns = [users, items, rng.integers(1, 11, n) / 2, ts.astype(np.int64)]
+    elif schema == 'amazon':
+        columns = [users, items, rng.integers(1, 6, n).astype(np.float64), ts.astype(np.int64)]
+    elif schema == 'lastfm':
+        text = np.datetime_as_string(ts, unit='s').astype('U19')
+        # 'YYYY-MM-DDTHH:MM:SS' split into the loader's Date and Time columns
+        chars = text.view('U1').reshape(n, 19)
+        time_of_day = np.ascontiguousarray(chars[:, 11:]).view('U8').ravel()
+        columns = [users, items // 16, items, items // 4, text.astype('U10'), time_of_day]
+    elif schema == 'retailrocket':
+        # Roughly the event mix of the real log
+        event = rng.choice(np.array(['view', 'addtocart', 'transaction']), size=n, p=[0.96, 0.03, 0.01])
+        is_transaction = event == 'transaction'
+        transaction_id = np.full(n, np.nan)
+        transaction_id[is_transaction] = next_transaction + np.arange(is_transaction.sum())
+        next_transaction += int(is_transaction.sum())
+        millis = ts.astype(np.int64) * 1000 + rng.integers(0, 1000, n)
+        columns = [millis, users, event, items, transaction_id]
+    else:
+        raise ValueError(f'unknown schema {schema!r}; use one of {tuple(SCHEMAS)}')
+    return pd.DataFrame(dict(zip(SCHEMAS[schema], columns))), next_transaction
+
+
+def write_interactions(path, num_edges, schema='houses', seed=0, **kwargs):
+    """Write a synthetic event log as one CSV in a loader's schema; `kwargs` go to `generate_interactions`.
+
+    Rows are in time order. The file is written next to `path` and renamed into place, so an
+    interrupted run never leaves a truncated CSV behind. Returns the number of rows written.
+    """
+    if schema not in SCHEMAS:
+        raise ValueError(f'unknown schema {schema!r}; use one of {tuple(SCHEMAS)}')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Ratings, events and the like come from their own stream, so every schema gets the same edges
+    rng = np.random.default_rng([seed, 1])
+    tmp_path = path + '.tmp'
+    rows, next_transaction = 0, 0
+    for chunk in generate_interactions(num_edges, seed=seed, **kwargs):
+        frame, next_transaction = _format_chunk(schema, chunk, rng, next_transaction)
+        frame.to_csv(tmp_path, mode='a' if rows else 'w', header=not rows, index=False)
+        rows += len(frame)
+    os.replace(tmp_path, path)
+    return rows
+
+
+def write_synthetic_edge_store(path, num_edges, num_users=100_000, num_items=50_000, **kwargs):
+    """Write a synthetic log straight into the `build_edge_store` layout, skipping CSV parsing.
+
+    The arrays are filled chunk by chunk through memory maps. Node ids are the generator's ids
+    (items offset by `num_users`), so users or items that never occur stay as isolated nodes.
+    """
+    os.makedirs(path, exist_ok=True)
+    arrays = {name: np.lib.format.open_memmap(os.path.join(path, f'{name}.npy'), mode='w+', dtype=np.int64,
+                                              shape=(num_edges,))
+              for name in ('src', 'dst', 'ts')}
+    offset = 0
+    for chunk in generate_interactions(num_edges, num_users=num_users, num_items=num_items, **kwargs):
+        end = offset + len(chunk)
+        arrays['src'][offset:end] = chunk['user_id'].values
+        arrays['dst'][offset:end] = chunk['item_id'].values + num_users
+        arrays['ts'][offset:end] = chunk['timestamp'].values.astype('datetime64[s]').astype(np.int64)
+        offset = end
+    for array in arrays.values():
+        array.flush()
+    del arrays
+
+    np.save(os.path.join(path, 'users.npy'), np.arange(num_users).astype(object), allow_pickle=True)
+    np.save(os.path.join(path, 'items.npy'), np.arange(num_items).astype(object), allow_pickle=True)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'num_users': num_users, 'num_items': num_items, 'num_edges': num_edges}, f)
+    return EdgeStore(path)
@@ -0,0 +1,46 @@
+"""IVF search against exact inner-product top-k."""
+
+import numpy as np
+import pytest
+
+from ann import build_ivf_index, exact_search, load_ivf_index
+
+
+def embeddings(seed=0, num_items=2000, num_queries=100, dim=16):
+    rng = np.random.default_rng(seed)
+    # Clustered items, as trained embeddings are
+    centers = rng.normal(size=(20, dim))
+    items = centers[rng.integers(0, 20, num_items)] + 0.3 * rng.normal(size=(num_items, dim))
+    return items.astype(np.float32), rng.normal(size=(num_queries, dim)).astype(np.float32)
+
+
+def test_exact_search_matches_argsort():
+    items, queries = embeddings()
+    scores, ids = exact_search(queries, items, k=10, item_chunk=300)
+    expected = np.argsort(-(queries @ items.T), axis=1, kind='stable')[:, :10]
+    assert (ids == expected).all()
+    assert np.allclose(scores, np.take_along_axis(queries @ items.T, expected, axis=1))
+
+
+def recall(ids, exact_ids):
+    return np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(ids.tolist(), exact_ids.tolist())])
+
+
+def test_probing_every_list_is_exact():
+    items, queries = embeddings()
+    index = build_ivf_index(items, nlist=16)
+    _, ids = index.search(queries, k=10, nprobe=16)
+    _, exact_ids = exact_search(queries, items, k=10)
+    assert recall(ids, exact_ids) == 1.0
+
+
+def test_recall_grows_with_nprobe(tmp_path):
+    items, queries = embeddings(seed=1)
+    index = build_ivf_index(items, item_ids=np.arange(len(items)) + 1000, nlist=32)
+    index.save(str(tmp_path))
+    index = load_ivf_index(str(tmp_path))
+    _, exact_ids = exact_search(queries, items, k=10)
+
+    recalls = [recall(index.search(queries, k=10, nprobe=nprobe)[1], exact_ids + 1000) for nprobe in (1, 4, 16)]
+    assert recalls == sorted(recalls)
+    assert recalls[-1] >= 0.9
@@ -0,0 +1,42 @@
+"""Checkpoints resume TGN training exactly and prune old files."""
+
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from checkpoint import AsyncCheckpointer
+from tgn import TGNModel, train_epoch
+from test_tgn import synthetic_stream
+
+
+def test_resume_restores_tgn_memory(tmp_path):
+    loader = [synthetic_stream()]
+    model = TGNModel(in_channels=4, out_channels=2)
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
+    train_epoch(model, loader, optimizer, torch.nn.CrossEntropyLoss())
+    with AsyncCheckpointer(str(tmp_path)) as checkpointer:
+        checkpointer.save(0, model, optimizer)
+
+    resumed = TGNModel(in_channels=4, out_channels=2)
+    resumed_optimizer = torch.optim.Adam(resumed.parameters(), lr=0.01)
+    with AsyncCheckpointer(str(tmp_path)) as checkpointer:
+        assert checkpointer.resume(resumed, resumed_optimizer) == 1
+
+    nodes = torch.arange(64)
+    assert torch.equal(resumed.memory[nodes], model.memory[nodes])
+    for expected, actual in zip(model.parameters(), resumed.parameters()):
+        assert torch.equal(expected, actual)
+
+
+def test_keeps_only_the_last_checkpoints(tmp_path):
+    model = torch.nn.Linear(2, 2)
+    with AsyncCheckpointer(str(tmp_path), keep_last=2) as checkpointer:
+        for epoch in range(5):
+            checkpointer.save(epoch, model)
+        checkpointer.wait()
+        assert checkpointer.checkpoints() == [checkpointer.path_for(3), checkpointer.path_for(4)]
+
+
+def test_keep_last_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        AsyncCheckpointer(str(tmp_path), keep_last=0)
@@ -0,0 +1,62 @@
+"""InteractionIndex and negative sampling against plain Python references."""
+
+import numpy as np
+import pytest
+
+from interactions import InteractionIndex, sample_negatives
+
+
+def random_interactions(seed=0, num_users=40, num_items=30, size=500):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, num_users, size), rng.integers(0, num_items, size)
+
+
+def test_index_groups_distinct_items_per_user():
+    users, items = random_interactions()
+    index = InteractionIndex(users, items)
+
+    expected = {}
+    for user, item in zip(users.tolist(), items.tolist()):
+        expected.setdefault(user, set()).add(item)
+    assert index.users.tolist() == sorted(expected)
+    for user, positives in index:
+        assert positives.tolist() == sorted(expected[user])
+
+
+def test_index_accepts_string_ids():
+    index = InteractionIndex(np.array(['b', 'a', 'b', 'a'], dtype=object), np.array(['x', 'y', 'x', 'z'], dtype=object))
+    assert index.users.tolist() == ['a', 'b']
+    assert [items.tolist() for _, items in index] == [['y', 'z'], ['x']]
+
+
+def test_expand_flattens_requested_users():
+    users, items = random_interactions(seed=1)
+    index = InteractionIndex(users, items)
+    query = np.array([5, 999, 2])  # 999 has no interactions
+    owner, flat_items = index.expand(query)
+    for position, user in enumerate(query):
+        row = index.rows_for([user])[0]
+        expected = index.positives(row).tolist() if row >= 0 else []
+        assert flat_items[owner == position].tolist() == expected
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_negatives_are_unseen_and_distinct(seed):
+    users, items = random_interactions(seed=seed)
+    index = InteractionIndex(users, items)
+    catalog = np.arange(30)
+    negatives = sample_negatives(index, catalog, num_negatives=8, rng=seed)
+
+    assert negatives.shape == (index.num_users, 8)
+    for row, (user, positives) in enumerate(index):
+        assert len(set(negatives[row].tolist())) == 8
+        assert not set(negatives[row].tolist()) & set(positives.tolist())
+        assert set(negatives[row].tolist()) <= set(catalog.tolist())
+
+
+def test_negatives_for_selected_users():
+    users, items = random_interactions(seed=4)
+    index = InteractionIndex(users, items)
+    negatives = sample_negatives(index, np.arange(30), num_negatives=5, user_ids=[3, 7], rng=0)
+    for user, row in zip([3, 7], negatives):
+        assert not set(row.tolist()) & set(index.positives(index.rows_for([user])[0]).tolist())
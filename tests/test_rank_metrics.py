@@ -0,0 +1,63 @@
+"""RankedScores and the process-pool metrics against a per-group brute force."""
+
+import numpy as np
+import pytest
+
+from parallel_metrics import parallel_rank_metrics
+from rank_metrics import RankedScores
+
+
+def brute_force(labels, scores, k):
+    """Per-group (MRR, NDCG@k, positives) with competition ranks and input order among ties."""
+    relevant = labels > 0
+    positives = int(relevant.sum())
+    if positives == 0:
+        return 0.0, 0.0, 0
+    ranks = [1 + int((scores > score).sum()) for score in scores[relevant]]
+    mrr = float(np.mean([1.0 / rank for rank in ranks]))
+    order = sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+    dcg = sum(relevant[i] / np.log2(position + 2) for position, i in enumerate(order))
+    idcg = sum(1 / np.log2(position + 2) for position in range(min(positives, k)))
+    return mrr, dcg / idcg, positives
+
+
+def random_scores(seed, size=2000, num_groups=60):
+    rng = np.random.default_rng(seed)
+    # Rounded scores, so ties are common
+    return rng.integers(0, 2, size), np.round(rng.random(size), 2), rng.integers(0, num_groups, size)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_ranked_scores_per_group(seed):
+    labels, scores, groups = random_scores(seed)
+    ranked = RankedScores(labels, scores, groups=groups)
+    mrr, ndcg = ranked.mrr(return_per_group=True), ranked.ndcg(k=5, return_per_group=True)
+
+    for i, group in enumerate(ranked.groups):
+        in_group = groups == group
+        expected_mrr, expected_ndcg, positives = brute_force(labels[in_group], scores[in_group], 5)
+        assert ranked.num_positives[i] == positives
+        assert mrr[i] == pytest.approx(expected_mrr)
+        assert ndcg[i] == pytest.approx(expected_ndcg)
+
+
+def test_ranked_scores_global():
+    labels, scores, _ = random_scores(3)
+    expected_mrr, expected_ndcg, _ = brute_force(labels, scores, 10)
+    ranked = RankedScores(labels, scores)
+    assert ranked.mrr() == pytest.approx(expected_mrr)
+    assert ranked.ndcg(k=10) == pytest.approx(expected_ndcg)
+
+
+@pytest.mark.parametrize('max_workers', [1, 3])
+def test_parallel_matches_ranked_scores(max_workers):
+    labels, scores, groups = random_scores(4, size=5000, num_groups=200)
+    results, per_user = parallel_rank_metrics(labels, scores, groups, k=10, max_workers=max_workers,
+                                              min_rows_per_worker=100, return_per_user=True)
+
+    ranked = RankedScores(labels, scores, groups=groups)
+    assert per_user['user_id'].tolist() == ranked.groups.tolist()
+    assert np.allclose(per_user['MRR'], ranked.mrr(return_per_group=True))
+    assert np.allclose(per_user['NDCG@10'], ranked.ndcg(k=10, return_per_group=True))
+    assert results['MRR'] == pytest.approx(ranked.mrr())
+    assert results['NDCG@10'] == pytest.approx(ranked.ndcg(k=10))
@@ -0,0 +1,42 @@
+"""Chunked full-catalog ranking against dense scoring of every (user, item) pair."""
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from interactions import InteractionIndex
+from ranking import full_ranking_evaluation
+
+
+def brute_force(user_emb, item_emb, test_index, train_index, k):
+    scores = (user_emb @ item_emb.T).numpy()
+    seen = dict(iter(train_index))
+    metrics = {name: [] for name in (f'Recall@{k}', f'NDCG@{k}', f'MRR@{k}', f'HitRate@{k}')}
+    for user, positives in test_index:
+        row = scores[user].copy()
+        row[seen.get(user, [])] = -np.inf
+        top = np.argsort(-row, kind='stable')[:k]
+        hits = np.isin(top, positives)
+        discounts = 1 / np.log2(np.arange(2, k + 2))
+        metrics[f'Recall@{k}'].append(hits.sum() / len(positives))
+        metrics[f'NDCG@{k}'].append((hits * discounts).sum() / discounts[:min(len(positives), k)].sum())
+        metrics[f'MRR@{k}'].append(1 / (np.argmax(hits) + 1) if hits.any() else 0.0)
+        metrics[f'HitRate@{k}'].append(float(hits.any()))
+    return {name: float(np.mean(values)) for name, values in metrics.items()}
+
+
+@pytest.mark.parametrize('chunks', [(1024, 65536), (7, 13)])
+def test_full_ranking_matches_dense_scoring(chunks):
+    user_chunk, item_chunk = chunks
+    generator = torch.Generator().manual_seed(0)
+    user_emb, item_emb = torch.randn(50, 8, generator=generator), torch.randn(200, 8, generator=generator)
+    rng = np.random.default_rng(0)
+    train_index = InteractionIndex(rng.integers(0, 50, 1500), rng.integers(0, 200, 1500))
+    test_index = InteractionIndex(rng.integers(0, 50, 300), rng.integers(0, 200, 300))
+
+    results = full_ranking_evaluation(user_emb, item_emb, test_index, k=10, train_index=train_index,
+                                      user_chunk=user_chunk, item_chunk=item_chunk)
+    expected = brute_force(user_emb, item_emb, test_index, train_index, 10)
+    for name, value in expected.items():
+        assert results[name] == pytest.approx(value, abs=1e-6)
@@ -0,0 +1,38 @@
+"""Every edge gets exactly one RNN prediction, whatever the sequence layout."""
+
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from rnn import RNNModel
+
+
+def toy_graph(num_users=3, num_items=5, num_edges=8, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    users = torch.randint(0, num_users, (num_edges,), generator=generator)
+    items = torch.randint(num_users, num_users + num_items, (num_edges,), generator=generator)
+    edge_time = torch.randint(0, 10_000, (num_edges,), generator=generator).double()
+    x = torch.randn(num_users + num_items, 4, generator=generator)
+    return x, torch.stack([users, items]), edge_time
+
+
+@pytest.mark.parametrize('options', [{}, {'max_len': None, 'session_gap': 1000},
+                                     {'window': 2}, {'window': 3, 'session_gap': 1000}])
+def test_eval_covers_every_edge(options):
+    x, edge_index, edge_time = toy_graph()
+    model = RNNModel(4, 8, 2, **options).eval()
+    with torch.no_grad():
+        out, edge_ids = model(x, edge_index, edge_time)
+    assert out.shape == (edge_index.size(1), 2)
+    assert sorted(edge_ids.tolist()) == list(range(edge_index.size(1)))
+
+
+def test_training_windows_never_cross_sessions():
+    x, edge_index, edge_time = toy_graph(num_edges=32)
+    model = RNNModel(4, 8, 2, window=2).train()
+    out, edge_ids = model(x, edge_index, edge_time)
+    assert out.size(0) == edge_ids.numel()
+    # Windows do not overlap, so an edge is trained on at most once
+    assert edge_ids.unique().numel() == edge_ids.numel()
+    users = edge_index[0, edge_ids].view(-1, 2)
+    assert bool((users[:, 0] == users[:, 1]).all())
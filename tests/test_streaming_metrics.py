@@ -0,0 +1,41 @@
+"""Batch-by-batch accumulators agree with the whole-array metrics."""
+
+import numpy as np
+import pytest
+
+from rank_metrics import RankedScores
+from streaming_metrics import ConfusionMatrix, GlobalRankAccumulator
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_global_rank_accumulator_matches_ranked_scores(seed):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 2, 1000)
+    # Logit-scale scores rounded to force ties, outside any fixed score range
+    scores = np.round(rng.normal(scale=3, size=1000), 1)
+    accumulator = GlobalRankAccumulator(k=10)
+    for batch in np.array_split(np.arange(1000), 7):
+        accumulator.update(labels[batch], scores[batch])
+
+    ranked = RankedScores(labels, scores)
+    assert accumulator.mrr() == pytest.approx(ranked.mrr())
+    assert accumulator.ndcg() == pytest.approx(ranked.ndcg(k=10))
+
+
+def test_global_rank_accumulator_without_positives():
+    accumulator = GlobalRankAccumulator(k=10)
+    accumulator.update(np.zeros(5), np.arange(5.0))
+    assert accumulator.mrr() == 0.0 and accumulator.ndcg() == 0.0
+
+
+def test_confusion_matrix_counts_batches():
+    rng = np.random.default_rng(0)
+    y_true, y_pred = rng.integers(0, 3, 500), rng.integers(0, 3, 500)
+    confusion = ConfusionMatrix(num_classes=3)
+    for batch in np.array_split(np.arange(500), 4):
+        confusion.update(y_true[batch], y_pred[batch])
+
+    expected = np.zeros((3, 3), dtype=np.int64)
+    np.add.at(expected, (y_true, y_pred), 1)
+    assert (confusion.counts == expected).all()
+    assert confusion.accuracy() == pytest.approx((y_true == y_pred).mean())
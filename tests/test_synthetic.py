@@ -0,0 +1,56 @@
+"""Synthetic event logs: sizes, ordering, id ranges, repeats and the written layouts."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic import SCHEMAS, generate_interactions, write_interactions, write_synthetic_edge_store
+
+
+def test_chunks_are_time_ordered_and_in_range():
+    chunks = list(generate_interactions(50_000, num_users=500, num_items=200, days=30, chunk_size=8_000))
+    frame = pd.concat(chunks, ignore_index=True)
+    assert len(chunks) > 1
+    assert len(frame) == 50_000
+    assert frame['timestamp'].is_monotonic_increasing
+    assert frame['user_id'].between(0, 499).all() and frame['item_id'].between(0, 199).all()
+
+
+def test_same_seed_same_log():
+    first = pd.concat(generate_interactions(5_000, num_users=100, num_items=50, days=7, seed=3))
+    second = pd.concat(generate_interactions(5_000, num_users=100, num_items=50, days=7, seed=3))
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_repeats_reconsume_the_last_item():
+    frame = pd.concat(generate_interactions(20_000, num_users=50, num_items=5_000, repeat_rate=0.5, days=7))
+    # With a large catalog, consecutive identical items per user are almost only repeats
+    same = frame.groupby('user_id')['item_id'].transform(lambda items: items.eq(items.shift()))
+    assert same.mean() == pytest.approx(0.5, abs=0.05)
+
+
+def test_diurnal_peak():
+    frame = pd.concat(generate_interactions(50_000, num_users=100, num_items=100, days=14, peak_hour=20))
+    by_hour = frame['timestamp'].dt.hour.value_counts()
+    assert by_hour.idxmax() in (19, 20, 21)
+    assert by_hour.idxmin() in (7, 8, 9)
+
+
+@pytest.mark.parametrize('schema', sorted(SCHEMAS))
+def test_write_interactions_schema(tmp_path, schema):
+    path = str(tmp_path / 'log.csv')
+    rows = write_interactions(path, 2_000, schema=schema, num_users=50, num_items=40, days=3, chunk_size=500)
+    frame = pd.read_csv(path)
+    assert rows == len(frame) == 2_000
+    assert tuple(frame.columns) == SCHEMAS[schema]
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_edge_store_layout(tmp_path):
+    store = write_synthetic_edge_store(str(tmp_path / 'store'), 3_000, num_users=40, num_items=30, days=3)
+    src, dst = np.asarray(store.src), np.asarray(store.dst)
+    assert len(src) == 3_000
+    assert src.max() < 40 and (dst >= 40).all() and dst.max() < 70
+    assert (np.diff(np.asarray(store.ts)) >= 0).all()
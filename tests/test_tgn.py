@@ -0,0 +1,89 @@
+"""Peak activation memory of TGN training stays flat across epochs."""
+
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from tgn import TGNModel, train_epoch
+
+
+class SavedTensorTracker:
+    """Bytes of tensors currently saved for backward, and the peak, through autograd's saved-tensor hooks."""
+
+    def __init__(self):
+        self.live = 0
+        self.peak = 0
+
+    def pack(self, tensor):
+        return _Saved(self, tensor)
+
+    def unpack(self, saved):
+        return saved.tensor
+
+
+class _Saved:
+    def __init__(self, tracker, tensor):
+        self.tracker = tracker
+        self.tensor = tensor
+        self.nbytes = tensor.numel() * tensor.element_size()
+        tracker.live += self.nbytes
+        tracker.peak = max(tracker.peak, tracker.live)
+
+    def __del__(self):
+        self.tracker.live -= self.nbytes
+
+
+def synthetic_stream(num_nodes=64, num_edges=512, num_features=4, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    edge_index = torch.randint(0, num_nodes, (2, num_edges), generator=generator)
+    edge_time = torch.sort(torch.rand(num_edges, generator=generator) * 1e6).values
+    return SimpleNamespace(x=torch.randn(num_nodes, num_features, generator=generator), edge_index=edge_index,
+                           edge_time=edge_time, y=torch.randint(0, 2, (num_nodes,), generator=generator))
+
+
+def epoch_peaks(mode, epochs=4):
+    torch.manual_seed(0)
+    model = TGNModel(in_channels=4, out_channels=2, event_batch_size=32)
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
+    loader = [synthetic_stream()]
+    peaks = []
+    for _ in range(epochs):
+        tracker = SavedTensorTracker()
+        with torch.autograd.graph.saved_tensors_hooks(tracker.pack, tracker.unpack):
+            train_epoch(model, loader, optimizer, torch.nn.CrossEntropyLoss(), mode=mode)
+        # Nothing saved for backward may outlive the epoch
+        assert tracker.live == 0
+        peaks.append(tracker.peak)
+    return peaks
+
+
+@pytest.mark.parametrize('mode', ['full', 'truncated'])
+def test_peak_memory_flat_across_epochs(mode):
+    peaks = epoch_peaks(mode)
+    assert peaks[0] > 0
+    assert max(peaks) <= peaks[0] * 1.05
+
+
+def test_truncated_peak_bounded_by_one_event_batch():
+    # 512 events in batches of 32: truncated keeps one batch's graph alive, full keeps all 16
+    assert max(epoch_peaks('truncated')) * 4 < min(epoch_peaks('full'))
+
+
+def test_unknown_mode():
+    model = TGNModel(in_channels=4, out_channels=2)
+    with pytest.raises(ValueError):
+        train_epoch(model, [], None, None, mode='tbptt')
+
+
+def test_neighbor_times_keep_epoch_second_resolution():
+    # float32 cannot tell these apart (spacing 128 s at 1.7e9); the neighbor buffer must
+    model = TGNModel(in_channels=4, out_channels=2, num_neighbors=2)
+    edge_index = torch.tensor([[0, 0], [1, 2]])
+    edge_time = torch.tensor([1_700_000_001.0, 1_700_000_002.0], dtype=torch.float64)
+    for i in range(2):
+        model.process_batch(torch.randn(3, 4), edge_index[:, i:i + 1], edge_time[i:i + 1], torch.tensor([i]))
+    _, times, edge_ids, mask = model.neighbors.lookup(torch.tensor([0]))
+    assert times[mask].tolist() == edge_time.tolist()
+    assert edge_ids[mask].tolist() == [0, 1]
@@ -0,0 +1,93 @@
+"""PagedMemory and RecentNeighbors against dense brute-force references."""
+
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from tgn_memory import PagedMemory, RecentNeighbors
+
+
+def random_writes(memory, reference, generator, rounds=5, num_nodes=300):
+    for _ in range(rounds):
+        idx = torch.randint(0, num_nodes, (40,), generator=generator).unique()
+        values = torch.randn(idx.numel(), memory.dim, generator=generator)
+        memory[idx] = values
+        reference[idx] = values
+
+
+@pytest.mark.parametrize('mapped', [False, True])
+def test_paged_memory_matches_dense(tmp_path, mapped):
+    generator = torch.Generator().manual_seed(0)
+    memory = PagedMemory(4, page_size=16, path=str(tmp_path / 'memory.bin') if mapped else None)
+    reference = torch.zeros(320, 4)
+    random_writes(memory, reference, generator)
+
+    nodes = torch.arange(400)  # Past the last written id reads as zeros
+    expected = torch.cat([reference, torch.zeros(80, 4)])
+    assert torch.equal(memory[nodes], expected)
+    # Only the pages that were written are allocated
+    assert memory.num_slots == int((reference.abs().sum(dim=1).view(-1, 16).sum(dim=1) > 0).sum())
+
+
+@pytest.mark.parametrize('mapped', [False, True])
+def test_paged_memory_snapshot_restore(tmp_path, mapped):
+    generator = torch.Generator().manual_seed(1)
+    memory = PagedMemory(4, page_size=16, path=str(tmp_path / 'memory.bin') if mapped else None)
+    reference = torch.zeros(600, 4)
+    random_writes(memory, reference, generator)
+    before, slots = reference.clone(), memory.num_slots
+
+    memory.snapshot()
+    random_writes(memory, reference, generator, num_nodes=600)  # Overwrites old pages and allocates new ones
+    memory.restore()
+    assert torch.equal(memory[torch.arange(600)], before)
+    assert memory.num_slots == slots
+
+
+def test_paged_memory_state_round_trip(tmp_path):
+    generator = torch.Generator().manual_seed(2)
+    memory = PagedMemory(4, page_size=16)
+    reference = torch.zeros(300, 4)
+    random_writes(memory, reference, generator)
+
+    loaded = PagedMemory(4, page_size=16, path=str(tmp_path / 'memory.bin'))
+    loaded.load_state_dict(memory.state_dict())
+    assert torch.equal(loaded[torch.arange(300)], reference)
+
+
+def brute_force_neighbors(src, dst, edge_time, k):
+    history = {}
+    for i, (u, v, t) in enumerate(zip(src.tolist(), dst.tolist(), edge_time.tolist())):
+        history.setdefault(u, []).append((v, t, i))
+        history.setdefault(v, []).append((u, t, i))
+    return {node: events[-k:] for node, events in history.items()}
+
+
+def test_recent_neighbors_keep_the_last_k():
+    generator = torch.Generator().manual_seed(3)
+    src = torch.randint(0, 50, (400,), generator=generator)
+    dst = torch.randint(50, 80, (400,), generator=generator)
+    edge_time = torch.sort(torch.rand(400, generator=generator, dtype=torch.float64) * 1e9).values
+    neighbors = RecentNeighbors(k=3, num_nodes=8)
+    for start in range(0, 400, 64):
+        batch = slice(start, start + 64)
+        neighbors.insert(src[batch], dst[batch], edge_time[batch], torch.arange(400)[batch])
+
+    expected = brute_force_neighbors(src, dst, edge_time, 3)
+    ids, times, edge_ids, mask = neighbors.lookup(torch.arange(100))
+    for node in range(100):
+        found = sorted(zip(ids[node][mask[node]].tolist(), times[node][mask[node]].tolist(),
+                           edge_ids[node][mask[node]].tolist()), key=lambda event: event[2])
+        assert found == expected.get(node, [])
+
+
+def test_recent_neighbors_snapshot_restore():
+    neighbors = RecentNeighbors(k=2, num_nodes=4)
+    neighbors.insert(torch.tensor([0, 1]), torch.tensor([2, 3]), torch.tensor([1.0, 2.0]))
+    before = neighbors.state_dict()
+    neighbors.snapshot()
+    neighbors.insert(torch.tensor([0, 9]), torch.tensor([3, 2]), torch.tensor([3.0, 4.0]))
+    neighbors.restore()
+    after = neighbors.state_dict()
+    for name in ('neighbors', 'times', 'edge_ids', 'ptr'):
+        assert torch.equal(after[name], before[name])
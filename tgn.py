@@ -0,0 +1,207 @@
+"""TGN baseline shared by the dataset notebooks."""
+
+from contextlib import contextmanager
+
+import torch
+import torch.nn as nn
+
+from tgn_memory import PagedMemory, RecentNeighbors
+
+
+def aggregate_messages(messages, index, num_nodes, how='last'):
+    """Reduce per-event messages to one message per node; events are assumed time-ordered."""
+    if how == 'mean':
+        summed = torch.zeros(num_nodes, messages.size(1), dtype=messages.dtype, device=messages.device)
+        summed = summed.index_add(0, index, messages)
+        counts = torch.bincount(index, minlength=num_nodes).clamp(min=1).unsqueeze(1)
+        return summed / counts
+    if how == 'last':
+        positions = torch.arange(index.numel(), device=index.device)
+        last = torch.full((num_nodes,), -1, dtype=torch.long, device=index.device)
+        last = last.scatter_reduce(0, index, positions, reduce='amax')
+        return messages[last]
+    raise ValueError(f'unknown message aggregation: {how}')
+
+
+class TimeEncoder(nn.Module):
+    """cos(w * dt + b) encoding of time deltas, as in TGN/TGAT."""
+
+    def __init__(self, dim):
+        super(TimeEncoder, self).__init__()
+        self.lin = nn.Linear(1, dim)
+
+    def forward(self, dt):
+        return torch.cos(self.lin(dt.unsqueeze(-1)))
+
+
+class TemporalAttentionEmbedding(nn.Module):
+    """Attend from a node's memory over the memories of its k most recent neighbors."""
+
+    def __init__(self, memory_dim, time_dim, out_dim, num_heads=2):
+        super(TemporalAttentionEmbedding, self).__init__()
+        self.time_encoder = TimeEncoder(time_dim)
+        self.query_proj = nn.Linear(memory_dim + time_dim, memory_dim + time_dim)
+        self.attention = nn.MultiheadAttention(memory_dim + time_dim, num_heads, batch_first=True)
+        self.out = nn.Linear(memory_dim + time_dim + memory_dim, out_dim)
+
+    def forward(self, node_memory, query_time, neighbor_memory, neighbor_time, mask):
+        # node_memory [B, M], neighbor_memory [B, k, M], neighbor_time/mask [B, k]
+        # Times stay float64 (float32 epoch seconds are ~128 s apart); only the deltas are cast down
+        dt = (query_time.unsqueeze(1) - neighbor_time).to(node_memory.dtype)
+        zero_dt = self.time_encoder(node_memory.new_zeros(query_time.shape))
+        query = self.query_proj(torch.cat([node_memory, zero_dt], dim=1)).unsqueeze(1)
+        keys = torch.cat([neighbor_memory, self.time_encoder(dt)], dim=2)
+
+        # Nodes without any neighbor yet attend to a dummy slot whose output is zeroed below
+        has_neighbors = mask.any(dim=1)
+        padding = ~mask
+        padding[~has_neighbors, 0] = False
+        attended, _ = self.attention(query, keys, keys, key_padding_mask=padding)
+        attended = attended.squeeze(1) * has_neighbors.unsqueeze(1)
+        return self.out(torch.cat([attended, node_memory], dim=1))
+
+
+class TGNModel(nn.Module):
+    def __init__(self, in_channels, out_channels, memory_dim=8, time_dim=8, page_size=4096, memory_path=None,
+                 event_batch_size=200, aggregation='last', num_neighbors=0):
+        super(TGNModel, self).__init__()
+        self.memory_dim = memory_dim
+        self.time_dim = time_dim
+        self.event_batch_size = event_batch_size
+        self.aggregation = aggregation
+
+        # Memory for each node; grows page by page as new node ids are seen
+        self.memory = PagedMemory(memory_dim, page_size=page_size, path=memory_path)
+
+        # Embedding for time
+        self.time_embedding = nn.Embedding(365, time_dim)
+
+        # Message and memory update functions
+        self.message_fn = nn.Linear(in_channels + memory_dim + time_dim, memory_dim)
+        self.memory_update_fn = nn.GRUCell(memory_dim, memory_dim)
+
+        # Optional temporal attention over each node's most recent neighbors
+        self.neighbors = RecentNeighbors(num_neighbors) if num_neighbors > 0 else None
+        self.embedding = TemporalAttentionEmbedding(memory_dim, time_dim, memory_dim) if num_neighbors > 0 else None
+
+        # Final classification layer
+        self.fc = nn.Linear(memory_dim, out_channels)
+
+    def event_batches(self, edge_time):
+        """Yield index tensors over the edges in time order, `event_batch_size` at a time."""
+        order = torch.argsort(edge_time, stable=True)
+        for start in range(0, order.numel(), self.event_batch_size):
+            yield order[start:start + self.event_batch_size]
+
+    def forward(self, x, edge_index, edge_time):
+        # Walk the events in time order; each batch sees the memory left by the previous ones
+        out = None
+        for batch in self.event_batches(edge_time):
+            batch_out = self.process_batch(x, edge_index[:, batch], edge_time[batch], batch)
+            if out is None:
+                out = batch_out.new_empty(edge_time.numel(), batch_out.size(1))
+            out[batch] = batch_out
+
+        if out is None:
+            out = x.new_empty(0, self.fc.out_features)
+        return out  # One prediction per edge, in the original edge order
+
+    def process_batch(self, x, edge_index, edge_time, edge_ids=None):
+        """One memory update per destination node for a batch of time-ordered events."""
+        src, dst = edge_index
+        src_memory = self.memory[src].to(x.device)
+        time_embeds = self.time_embedding((edge_time.long() % 365).view(-1, 1)).view(-1, self.time_dim)
+        messages = self.message_fn(torch.cat([x[src], src_memory, time_embeds], dim=1))
+
+        # Several events for the same node collapse into a single message and a single GRU step
+        nodes, inverse = torch.unique(dst, return_inverse=True)
+        node_messages = aggregate_messages(messages, inverse, nodes.numel(), self.aggregation)
+        updated_memory = self.memory_update_fn(node_messages, self.memory[nodes].to(x.device))
+        self.memory[nodes] = updated_memory.detach()
+
+        embeddings = updated_memory
+        if self.neighbors is not None:
+            # Neighbors come from earlier batches only; this batch is inserted afterwards
+            node_time = torch.zeros(nodes.numel(), dtype=torch.float64, device=x.device).scatter_reduce(
+                0, inverse, edge_time.double(), reduce='amax', include_self=False)
+            neighbor_ids, neighbor_time, _, mask = self.neighbors.lookup(nodes)
+            neighbor_memory = self.memory[neighbor_ids.clamp(min=0).flatten()].view(*neighbor_ids.shape, -1)
+            embeddings = self.embedding(updated_memory, node_time, neighbor_memory.to(x.device),
+                                        neighbor_time.to(x.device), mask.to(x.device))
+            self.neighbors.insert(src, dst, edge_time, edge_ids)
+
+        return self.fc(embeddings)[inverse]
+
+    def reset_memory(self):
+        self.memory.reset()
+        if self.neighbors is not None:
+            self.neighbors.reset()
+
+    @contextmanager
+    def preserved_memory(self):
+        """Roll node memory back on exit, e.g. so evaluation does not leak into training."""
+        stores = [self.memory] + ([self.neighbors] if self.neighbors is not None else [])
+        for store in stores:
+            store.snapshot()
+        try:
+            yield
+        finally:
+            for store in stores:
+                store.restore()
+
+    # The memory store is not a tensor, so it travels in state_dict() as extra state
+    def get_extra_state(self):
+        state = {'memory': self.memory.state_dict()}
+        if self.neighbors is not None:
+            state['neighbors'] = self.neighbors.state_dict()
+        return state
+
+    def set_extra_state(self, state):
+        self.memory.load_state_dict(state['memory'])
+        if self.neighbors is not None and 'neighbors' in state:
+            self.neighbors.load_state_dict(state['neighbors'])
+
+
+def train_truncated(model, loader, optimizer, loss_fn):
+    """Truncated backprop through memory: one optimizer step per event batch.
+
+    Memory is written detached at every batch boundary, so each backward pass only sees the
+    graph of its own batch and nothing is retained across steps (no `retain_graph=True`).
+    """
+    model.train()
+    total_loss, steps = 0, 0
+    for data in loader:
+        for batch in model.event_batches(data.edge_time):
+            optimizer.zero_grad()
+            edge_index = data.edge_index[:, batch]
+            out = model.process_batch(data.x, edge_index, data.edge_time[batch], batch)
+            loss = loss_fn(out, data.y[edge_index[1]])  # Only compute loss for destination nodes
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+            steps += 1
+    return total_loss / max(steps, 1)
+
+
+def train_full(model, loader, optimizer, loss_fn):
+    """Full backprop: one optimizer step per loader batch, through all of its event batches."""
+    model.train()
+    total_loss = 0
+    for data in loader:
+        optimizer.zero_grad()
+        out = model(data.x, data.edge_index, data.edge_time)
+        loss = loss_fn(out, data.y[data.edge_index[1]])  # Only compute loss for destination nodes
+        loss.backward()
+        optimizer.step()
+        total_loss += loss.item()
+    return total_loss / max(len(loader), 1)
+
+
+TRAINING_MODES = {'full': train_full, 'truncated': train_truncated}
+
+
+def train_epoch(model, loader, optimizer, loss_fn, mode='full'):
+    """One training epoch; `mode` is 'full' (the default) or 'truncated' (bounded activation memory)."""
+    if mode not in TRAINING_MODES:
+        raise ValueError(f'unknown training mode {mode!r}; use one of {tuple(TRAINING_MODES)}')
+    return TRAINING_MODES[mode](model, loader, optimizer, loss_fn)
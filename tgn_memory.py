@@ -0,0 +1,305 @@
+"""Growable, paged node-memory store for TGN models."""
+
+import os
+
+import numpy as np
+import torch
+
+
+class PagedMemory:
+    """Per-node memory rows stored in fixed-size pages that are allocated on first write.
+
+    A page table maps `node // page_size` to a slot in one contiguous slab, so reads and
+    writes stay single vectorized gathers/scatters. Untouched nodes read as zeros and cost
+    nothing. Both the page table and the slab grow by doubling, which keeps growth amortized
+    O(1) per page. With `path` set, the slab is a memory-mapped file that is extended in place
+    (sparse on most filesystems) instead of being copied.
+    """
+
+    def __init__(self, dim, page_size=4096, dtype=torch.float32, device='cpu', path=None, initial_pages=1):
+        self.dim = dim
+        self.page_size = page_size
+        self.dtype = dtype
+        self.device = torch.device(device)
+        self.path = path
+        if path is not None and self.device.type != 'cpu':
+            raise ValueError('memory-mapped PagedMemory must live on the CPU')
+
+        self.page_table = torch.full((max(1, initial_pages),), -1, dtype=torch.long, device=self.device)
+        self.num_slots = 0
+        self.slab = self._allocate_slab(max(1, initial_pages))
+        self._journal = None
+
+    def _allocate_slab(self, capacity):
+        rows = capacity * self.page_size
+        if self.path is None:
+            slab = torch.zeros(rows, self.dim, dtype=self.dtype, device=self.device)
+            if getattr(self, 'slab', None) is not None:
+                used = self.num_slots * self.page_size
+                slab[:used] = self.slab[:used]
+            return slab
+
+        # Extending the file keeps existing pages where they are; only the mapping is redone
+        np_dtype = torch.empty(0, dtype=self.dtype).numpy().dtype
+        nbytes = rows * self.dim * np_dtype.itemsize
+        mode = 'r+b' if os.path.exists(self.path) and getattr(self, 'slab', None) is not None else 'w+b'
+        with open(self.path, mode) as f:
+            f.truncate(nbytes)
+        self._mmap = np.memmap(self.path, dtype=np_dtype, mode='r+', shape=(rows, self.dim))
+        return torch.from_numpy(self._mmap)
+
+    @property
+    def capacity_pages(self):
+        return self.slab.size(0) // self.page_size
+
+    @property
+    def num_nodes(self):
+        """Number of addressable node ids (grows automatically on write)."""
+        return self.page_table.numel() * self.page_size
+
+    @property
+    def allocated_rows(self):
+        return self.num_slots * self.page_size
+
+    def _grow_page_table(self, num_pages):
+        if num_pages <= self.page_table.numel():
+            return
+        new_size = max(num_pages, 2 * self.page_table.numel())
+        table = torch.full((new_size,), -1, dtype=torch.long, device=self.device)
+        table[:self.page_table.numel()] = self.page_table
+        self.page_table = table
+
+    def _ensure_pages(self, pages):
+        """Assign slab slots to any page in `pages` (unique, sorted) that has none yet."""
+        self._grow_page_table(int(pages.max()) + 1)
+        missing = pages[self.page_table[pages] < 0]
+        if missing.numel() == 0:
+            return
+        needed = self.num_slots + missing.numel()
+        if needed > self.capacity_pages:
+            self.slab = self._allocate_slab(max(needed, 2 * self.capacity_pages))
+        self.page_table[missing] = torch.arange(self.num_slots, needed, device=self.device)
+        self.num_slots = needed
+
+    def _rows(self, idx):
+        pages = torch.div(idx, self.page_size, rounding_mode='floor')
+        slots = self.page_table[pages]
+        return slots * self.page_size + idx % self.page_size, slots >= 0
+
+    def read(self, idx):
+        idx = idx.to(self.device)
+        out = torch.zeros(idx.numel(), self.dim, dtype=self.dtype, device=self.device)
+        if idx.numel() == 0:
+            return out
+        in_range = idx < self.num_nodes
+        safe_idx = torch.where(in_range, idx, torch.zeros_like(idx))
+        rows, allocated = self._rows(safe_idx)
+        hit = in_range & allocated
+        out[hit] = self.slab[rows[hit]]
+        return out
+
+    def write(self, idx, values):
+        idx = idx.to(self.device)
+        if idx.numel() == 0:
+            return
+        self._ensure_pages(torch.unique(torch.div(idx, self.page_size, rounding_mode='floor')))
+        rows, _ = self._rows(idx)
+        if self._journal is not None:
+            self._record(rows)
+        self.slab[rows] = values.detach().to(device=self.device, dtype=self.dtype)
+
+    def __getitem__(self, idx):
+        return self.read(idx)
+
+    def __setitem__(self, idx, values):
+        self.write(idx, values)
+
+    def snapshot(self):
+        """Start a dirty-row journal; `restore()` rolls back every write made after this call.
+
+        Only rows that are overwritten get their previous values saved, so a snapshot/restore
+        pair costs time and memory proportional to the rows touched, not to the node count.
+        """
+        self._journal = {
+            'page_table': self.page_table.clone(),
+            'num_slots': self.num_slots,
+            'rows': [],
+            'values': [],
+        }
+
+    def _record(self, rows):
+        # Rows in pages allocated after the snapshot are simply zeroed again on restore
+        old = rows[rows < self._journal['num_slots'] * self.page_size]
+        if old.numel():
+            self._journal['rows'].append(old)
+            self._journal['values'].append(self.slab[old].clone())
+
+    def restore(self):
+        journal, self._journal = self._journal, None
+        if journal is None:
+            raise RuntimeError('restore() called without an active snapshot')
+
+        if journal['rows']:
+            rows = torch.cat(journal['rows'])
+            values = torch.cat(journal['values'])
+            # The first journaled value of a row is the one it had at snapshot time
+            unique_rows, inverse = torch.unique(rows, return_inverse=True)
+            positions = torch.arange(rows.numel(), device=rows.device)
+            first = torch.full((unique_rows.numel(),), rows.numel(), dtype=torch.long, device=rows.device)
+            first = first.scatter_reduce(0, inverse, positions, reduce='amin')
+            self.slab[unique_rows] = values[first]
+
+        self.slab[journal['num_slots'] * self.page_size:self.allocated_rows] = 0
+        self.num_slots = journal['num_slots']
+        self.page_table = torch.full_like(self.page_table, -1)
+        self.page_table[:journal['page_table'].numel()] = journal['page_table']
+
+    def discard_snapshot(self):
+        self._journal = None
+
+    def reset(self):
+        self._journal = None
+        self.slab[:self.allocated_rows] = 0
+        self.page_table.fill_(-1)
+        self.num_slots = 0
+
+    def flush(self):
+        if self.path is not None:
+            self._mmap.flush()
+
+    def state_dict(self):
+        used = self.num_slots * self.page_size
+        return {
+            'dim': self.dim,
+            'page_size': self.page_size,
+            'page_table': self.page_table.cpu().clone(),
+            'slab': self.slab[:used].cpu().clone(),
+        }
+
+    def load_state_dict(self, state):
+        if state['dim'] != self.dim or state['page_size'] != self.page_size:
+            raise ValueError('PagedMemory state has a different dim or page_size')
+        self.reset()
+        self.page_table = state['page_table'].to(self.device).clone()
+        num_slots = state['slab'].size(0) // self.page_size
+        if num_slots > self.capacity_pages:
+            self.slab = self._allocate_slab(num_slots)
+        self.num_slots = num_slots
+        self.slab[:self.allocated_rows] = state['slab'].to(self.device, self.dtype)
+
+
+class RecentNeighbors:
+    """Fixed-size ring buffer of the last `k` (neighbor, time, edge id) entries per node.
+
+    Inserts for a whole event batch are a handful of vectorized scatters; lookups are plain
+    O(k) row gathers that never take a lock, so readers can run alongside the ingest path.
+    Empty slots hold neighbor id -1. Times are float64, which keeps epoch seconds exact.
+    """
+
+    def __init__(self, k=10, num_nodes=1024, device='cpu'):
+        self.k = k
+        self.device = torch.device(device)
+        self.neighbors = torch.full((num_nodes, k), -1, dtype=torch.long, device=self.device)
+        self.times = torch.zeros(num_nodes, k, dtype=torch.float64, device=self.device)
+        self.edge_ids = torch.full((num_nodes, k), -1, dtype=torch.long, device=self.device)
+        self.ptr = torch.zeros(num_nodes, dtype=torch.long, device=self.device)
+        self._journal = None
+
+    @property
+    def num_nodes(self):
+        return self.ptr.numel()
+
+    def _grow(self, num_nodes):
+        if num_nodes <= self.num_nodes:
+            return
+        new_size = max(num_nodes, 2 * self.num_nodes)
+        extra = new_size - self.num_nodes
+        self.neighbors = torch.cat([self.neighbors, self.neighbors.new_full((extra, self.k), -1)])
+        self.times = torch.cat([self.times, self.times.new_zeros(extra, self.k)])
+        self.edge_ids = torch.cat([self.edge_ids, self.edge_ids.new_full((extra, self.k), -1)])
+        self.ptr = torch.cat([self.ptr, self.ptr.new_zeros(extra)])
+
+    def insert(self, src, dst, edge_time, edge_ids=None, both_directions=True):
+        """Append a time-ordered batch of events to the buffers of their endpoints."""
+        if edge_ids is None:
+            edge_ids = torch.arange(src.numel(), device=src.device)
+        if both_directions:
+            nodes = torch.cat([src, dst])
+            others = torch.cat([dst, src])
+            times = torch.cat([edge_time, edge_time])
+            edge_ids = torch.cat([edge_ids, edge_ids])
+        else:
+            nodes, others, times = src, dst, edge_time
+        if nodes.numel() == 0:
+            return
+        nodes, others, times, edge_ids = (t.to(self.device) for t in (nodes, others, times, edge_ids))
+        self._grow(int(nodes.max()) + 1)
+
+        # Rank each event among the events of the same node (stable sort keeps time order)
+        order = torch.argsort(nodes, stable=True)
+        nodes, others, times, edge_ids = nodes[order], others[order], times[order], edge_ids[order]
+        unique_nodes, counts = torch.unique_consecutive(nodes, return_counts=True)
+        group_start = torch.repeat_interleave(torch.cumsum(counts, 0) - counts, counts)
+        group_count = torch.repeat_interleave(counts, counts)
+        rank = torch.arange(nodes.numel(), device=self.device) - group_start
+
+        # Only the newest k events of a node survive, so older ones never race for a slot
+        keep = rank >= group_count - self.k
+        nodes, others, times, edge_ids, rank = nodes[keep], others[keep], times[keep], edge_ids[keep], rank[keep]
+
+        if self._journal is not None:
+            self._record(unique_nodes)
+        slots = (self.ptr[nodes] + rank) % self.k
+        self.neighbors[nodes, slots] = others
+        self.times[nodes, slots] = times.to(self.times.dtype)
+        self.edge_ids[nodes, slots] = edge_ids
+        self.ptr[unique_nodes] += counts
+
+    def lookup(self, nodes):
+        """Return (neighbors, times, edge_ids, mask) of shape [len(nodes), k]; mask marks filled slots."""
+        nodes = nodes.to(self.device)
+        in_range = nodes < self.num_nodes
+        safe = torch.where(in_range, nodes, torch.zeros_like(nodes))
+        neighbors = self.neighbors[safe].masked_fill(~in_range.unsqueeze(1), -1)
+        return neighbors, self.times[safe], self.edge_ids[safe], neighbors >= 0
+
+    def snapshot(self):
+        self._journal = {'num_nodes': self.num_nodes, 'nodes': [], 'rows': []}
+
+    def _record(self, nodes):
+        old = nodes[nodes < self._journal['num_nodes']]
+        if old.numel():
+            self._journal['nodes'].append(old)
+            self._journal['rows'].append((self.neighbors[old].clone(), self.times[old].clone(),
+                                          self.edge_ids[old].clone(), self.ptr[old].clone()))
+
+    def restore(self):
+        journal, self._journal = self._journal, None
+        if journal is None:
+            raise RuntimeError('restore() called without an active snapshot')
+        # Apply saved rows newest first so the oldest (snapshot-time) copy of each node wins
+        for nodes, (neighbors, times, edge_ids, ptr) in zip(reversed(journal['nodes']), reversed(journal['rows'])):
+            self.neighbors[nodes], self.times[nodes], self.edge_ids[nodes], self.ptr[nodes] = neighbors, times, edge_ids, ptr
+        n = journal['num_nodes']
+        self.neighbors, self.times = self.neighbors[:n], self.times[:n]
+        self.edge_ids, self.ptr = self.edge_ids[:n], self.ptr[:n]
+
+    def reset(self):
+        self._journal = None
+        self.neighbors.fill_(-1)
+        self.times.zero_()
+        self.edge_ids.fill_(-1)
+        self.ptr.zero_()
+
+    def state_dict(self):
+        return {'k': self.k, 'neighbors': self.neighbors.cpu().clone(), 'times': self.times.cpu().clone(),
+                'edge_ids': self.edge_ids.cpu().clone(), 'ptr': self.ptr.cpu().clone()}
+
+    def load_state_dict(self, state):
+        if state['k'] != self.k:
+            raise ValueError('RecentNeighbors state has a different k')
+        self._journal = None
+        self.neighbors = state['neighbors'].to(self.device).clone()
+        self.times = state['times'].to(self.device, torch.float64).clone()
+        self.edge_ids = state['edge_ids'].to(self.device).clone()
+        self.ptr = state['ptr'].to(self.device).clone()
@@ -0,0 +1,111 @@
+"""Online event ingestion for a trained TGNModel."""
+
+import threading
+import time
+
+import numpy as np
+import torch
+
+
+class StreamingTGN:
+    """Feed (user, item, timestamp) events into a TGNModel one at a time or in micro-batches.
+
+    Each event updates only the memory rows of the nodes it touches, through the same
+    `process_batch` path used in training. Concurrent callers are coalesced: events submitted
+    while a flush is running are queued and applied together by the next flush. Every event
+    carries a stream-wide id (given, or assigned in arrival order) that the model's
+    recent-neighbor buffer records. Node embeddings for scoring are read straight from the
+    model's memory store.
+    """
+
+    def __init__(self, model, node_features, max_batch_size=256, latency_window=100000):
+        self.model = model.eval()
+        self.node_features = node_features
+        self.max_batch_size = max_batch_size
+        self.latency_window = latency_window
+
+        self._pending = []
+        self._next_event_id = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._latencies = []
+
+    def _grow_features(self, max_node):
+        # Unseen node ids get random features, like the nodes of the offline graphs
+        if max_node >= self.node_features.size(0):
+            extra = torch.randn(max_node + 1 - self.node_features.size(0), self.node_features.size(1))
+            self.node_features = torch.cat([self.node_features, extra])
+
+    def _event_ids(self, count, event_ids=None):
+        # Caller holds self._lock
+        if event_ids is None:
+            event_ids = range(self._next_event_id, self._next_event_id + count)
+        self._next_event_id = max(self._next_event_id, max(event_ids, default=-1) + 1)
+        return event_ids
+
+    def submit(self, user, item, timestamp, event_id=None):
+        """Queue one event and return its id; call `flush()` (or use `ingest`) to apply it."""
+        with self._lock:
+            (event_id,) = self._event_ids(1, None if event_id is None else [event_id])
+            self._pending.append((user, item, timestamp, event_id, time.perf_counter()))
+            full = len(self._pending) >= self.max_batch_size
+        if full:
+            self.flush()
+        return event_id
+
+    def ingest(self, user, item, timestamp, event_id=None):
+        """Apply one event now (together with anything already queued)."""
+        event_id = self.submit(user, item, timestamp, event_id)
+        self.flush()
+        return event_id
+
+    def ingest_many(self, users, items, timestamps, event_ids=None):
+        for start in range(0, len(users), self.max_batch_size):
+            stop = start + self.max_batch_size
+            with self._lock:
+                now = time.perf_counter()
+                chunk_ids = self._event_ids(len(users[start:stop]), None if event_ids is None else event_ids[start:stop])
+                self._pending.extend(zip(users[start:stop], items[start:stop], timestamps[start:stop], chunk_ids,
+                                         [now] * len(users[start:stop])))
+            self.flush()
+
+    @torch.no_grad()
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                events, self._pending = self._pending, []
+            if not events:
+                return
+
+            users, items, timestamps, event_ids, submitted = zip(*events)
+            edge_index = torch.tensor([users, items], dtype=torch.long)
+            edge_time = torch.tensor(timestamps, dtype=torch.float64)
+            edge_ids = torch.tensor(event_ids, dtype=torch.long)
+            self._grow_features(int(edge_index.max()))
+
+            # A micro-batch may hold several events for one node; process_batch aggregates them
+            for batch in self.model.event_batches(edge_time):
+                self.model.process_batch(self.node_features, edge_index[:, batch], edge_time[batch], edge_ids[batch])
+
+            done = time.perf_counter()
+            self._latencies.extend(done - t for t in submitted)
+            if len(self._latencies) > self.latency_window:
+                del self._latencies[:-self.latency_window]
+
+    def embeddings(self, nodes):
+        """Current memory rows for `nodes` (zeros for nodes never seen)."""
+        return self.model.memory[torch.as_tensor(nodes, dtype=torch.long)]
+
+    @torch.no_grad()
+    def score(self, users, items):
+        return (self.embeddings(users) * self.embeddings(items)).sum(dim=1)
+
+    def latency_percentiles(self, percentiles=(50, 90, 99, 99.9)):
+        """Submit-to-applied latency per event, in milliseconds."""
+        if not self._latencies:
+            return {f'p{p}': float('nan') for p in percentiles}
+        values = np.percentile(np.asarray(self._latencies) * 1000.0, percentiles)
+        return {f'p{p}': float(v) for p, v in zip(percentiles, values)}
+
+    def reset_latencies(self):
+        self._latencies = []